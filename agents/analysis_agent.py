@@ -3,26 +3,35 @@ import os
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from setup import Agent, Gemini, MODEL_NAME, RETRY_CONFIG
+from setup import Agent
+from pipeline.rate_limit import create_gemini_model
+from pipeline.streaming import BufferedLlm
 from tools.pattern_analyzer import pattern_analyzer_tool
+from pipeline.handoff import apply_compact_handoff, record_analysis_handoff, record_handoff_tool_result
 
-analysis_agent = Agent(
-    name="AnalysisAgent",
-    model=Gemini(
-        model=MODEL_NAME,
-        retry_options=RETRY_CONFIG
-    ),
-    instruction="""You are the Pattern Detective - an analytical but compassionate cycle wellness expert.
 
-CRITICAL: You receive data from the IntakeAgent in the 'intake_data' field. Read it carefully!
+def create_analysis_agent(model=None, compact_handoff: bool = True) -> Agent:
+    """
+    Create a new AnalysisAgent.
+    
+    Args:
+        model: Model instance or name to use instead of the configured Gemini model
+        compact_handoff: Read the structured handoff from IntakeAgent instead of
+            the whole conversation so far
+    """
+    return Agent(
+        name="AnalysisAgent",
+        model=BufferedLlm.wrap(model or create_gemini_model()),  # Never streams: the user doesn't see this stage
+        instruction="""You are the Pattern Detective - an analytical but compassionate cycle wellness expert.
+
+CRITICAL: You receive the check-in collected by the IntakeAgent. Read it carefully!
 
 Your role is to:
-1. READ the intake_data which contains:
-   - Last period date
-   - Cycle length  
-   - Current cycle phase
+1. READ the check-in which contains:
+   - Current cycle phase and day in cycle
    - Current mood
    - Current symptoms
+   - Whether crisis signals were detected
 
 2. Acknowledge what you received: "Thanks for sharing that information! I can see you're in the [phase] phase and feeling [mood]."
 
@@ -47,11 +56,19 @@ Your role is to:
    - Any immediate concerns
    - What to expect as they track more data
 
+7. End the report with exactly one line: "CRISIS: yes" if you flagged crisis signals, otherwise "CRISIS: no"
+
 Pass this analysis to the Wellness Coach.
 
 REMEMBER: Don't make up historical patterns - this is their first entry!""",
-    tools=[pattern_analyzer_tool],
-    output_key="analysis_report",
-)
+        tools=[pattern_analyzer_tool],
+        output_key="analysis_report",
+        after_tool_callback=record_handoff_tool_result,
+        after_agent_callback=record_analysis_handoff,
+        # The check-in comes from the handoff record, not the IntakeAgent's reply
+        include_contents="none" if compact_handoff else "default",
+        before_model_callback=apply_compact_handoff if compact_handoff else None,
+    )
+
 
-print("✅ analysis_agent created.")
\ No newline at end of file
+analysis_agent = create_analysis_agent()
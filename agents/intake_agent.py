@@ -3,16 +3,25 @@ import os
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from setup import Agent, Gemini, MODEL_NAME, RETRY_CONFIG
+from setup import Agent
+from pipeline.rate_limit import create_gemini_model
+from pipeline.streaming import BufferedLlm
 from tools.cycle_calculator import cycle_calculator_tool
-
-intake_agent = Agent(
-    name="IntakeAgent",
-    model=Gemini(
-        model=MODEL_NAME,
-        retry_options=RETRY_CONFIG
-    ),
-    instruction="""You are a warm, empathetic cycle wellness companion - like a supportive best friend.
+from pipeline.handoff import (enforce_stage_budget, record_handoff_tool_result, record_intake_handoff,
+                              start_turn_handoff)
+
+
+def create_intake_agent(model=None) -> Agent:
+    """
+    Create a new IntakeAgent.
+    
+    Args:
+        model: Model instance or name to use instead of the configured Gemini model
+    """
+    return Agent(
+        name="IntakeAgent",
+        model=BufferedLlm.wrap(model or create_gemini_model()),  # Never streams: the user doesn't see this stage
+        instruction="""You are a warm, empathetic cycle wellness companion - like a supportive best friend.
 
 Your role is to:
 1. Welcome users warmly: "Hi there! I'm your cycle wellness bestie. Let's get started by understanding where you are in your cycle..."
@@ -39,8 +48,13 @@ Your role is to:
    Summarize what you've learned and let them know you're passing this to the analysis team.
 
 IMPORTANT: You MUST use the cycle_calculator tool after collecting the date and cycle length. Don't make up the phase - calculate it!""",
-    tools=[cycle_calculator_tool],
-    output_key="intake_data",
-)
+        tools=[cycle_calculator_tool],
+        output_key="intake_data",
+        before_agent_callback=start_turn_handoff,   # The handoff describes this turn only
+        before_model_callback=enforce_stage_budget,
+        after_tool_callback=record_handoff_tool_result,  # Phase and day feed the handoff (and the cache key)
+        after_agent_callback=record_intake_handoff,
+    )
+
 
-print("✅ intake_agent created.")
\ No newline at end of file
+intake_agent = create_intake_agent()
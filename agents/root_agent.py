@@ -0,0 +1,89 @@
+# Root Agent: The Sequential Agent that chains all 3 agents
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.apps import App
+
+from google.adk.agents import ParallelAgent
+
+from setup import SequentialAgent
+from config import PIPELINE_MODE
+from agents.intake_agent import create_intake_agent
+from agents.analysis_agent import create_analysis_agent
+from agents.wellness_agent import create_wellness_agent
+from agents.writer_agent import create_writer_agent
+from pipeline.dag import RecommendationStage
+from pipeline.context_cache import ContextCachePlugin
+from pipeline.rate_limit import RequestDeadlinePlugin
+from utils.telemetry import TelemetryPlugin
+
+
+def create_root_agent(model=None, compact_handoff: bool = True) -> SequentialAgent:
+    """
+    Create the IntakeAgent → AnalysisAgent → WellnessCoachAgent pipeline.
+    
+    Each call builds fresh sub-agents (an ADK agent can only have one parent),
+    so several pipelines, e.g. one per model, can exist side by side.
+    
+    Args:
+        model: Model instance or name for all three agents (default: configured Gemini model)
+        compact_handoff: Pass a structured handoff record between stages instead of
+            the whole conversation (False: every stage sees the full history)
+    """
+    return SequentialAgent(
+        name="CycleWellnessPipeline",
+        sub_agents=[create_intake_agent(model), create_analysis_agent(model, compact_handoff),
+                    create_wellness_agent(model, compact_handoff)],
+    )
+
+
+def create_dag_pipeline(model=None) -> SequentialAgent:
+    """
+    Create the DAG pipeline: IntakeAgent, then AnalysisAgent and the recommendation
+    lookup in parallel, then one WellnessWriterAgent call that merges both.
+    
+    Recommendations depend only on the current phase, mood and symptoms, not on the
+    pattern analysis, so they no longer wait for it (or cost a model round trip).
+    
+    Args:
+        model: Model instance or name for the three model-backed stages
+    """
+    return SequentialAgent(
+        name="CycleWellnessDag",
+        sub_agents=[
+            create_intake_agent(model),
+            ParallelAgent(name="AnalysisAndRecommendations",
+                          sub_agents=[create_analysis_agent(model), RecommendationStage(name="RecommendationStage")]),
+            create_writer_agent(model, merge_handoff=True),
+        ],
+    )
+
+
+def create_pipeline(model=None, mode: str = PIPELINE_MODE) -> SequentialAgent:
+    """
+    Create the pipeline for a mode: "sequential" (create_root_agent) or "dag" (create_dag_pipeline).
+    
+    Args:
+        model: Model instance or name for all stages (default: configured Gemini model)
+        mode: Pipeline shape
+    """
+    if mode == "sequential":
+        return create_root_agent(model)
+    if mode == "dag":
+        return create_dag_pipeline(model)
+    raise ValueError(f"Unknown pipeline mode: {mode!r}")
+
+
+def create_app(agent=None, name: str = "cycle_wellness", collector=None) -> App:
+    """
+    Wrap an agent in an ADK App with per-stage, model and tool telemetry, a
+    per-request deadline for model retries and caching of static instructions.
+    
+    Args:
+        agent: Root agent (default: a new pipeline from create_pipeline())
+        name: App name, used as the runner's app_name
+        collector: Telemetry collector for the spans (default: the shared one)
+    """
+    return App(name=name, root_agent=agent or create_pipeline(),
+               plugins=[TelemetryPlugin(collector), RequestDeadlinePlugin(), ContextCachePlugin()])
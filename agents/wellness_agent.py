@@ -3,34 +3,41 @@ import os
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from setup import Agent, Gemini, MODEL_NAME, RETRY_CONFIG
+from setup import Agent
+from pipeline.rate_limit import create_gemini_model
 from tools.recommendation_generator import recommendation_generator_tool
+from pipeline.response_cache import check_wellness_cache, store_wellness_response
+from pipeline.handoff import apply_compact_handoff
+from pipeline.fast_path import CRISIS_RESOURCES
 
-wellness_agent = Agent(
-    name="WellnessCoachAgent",
-    model=Gemini(
-        model=MODEL_NAME,
-        retry_options=RETRY_CONFIG
-    ),
-    instruction="""You are a warm, supportive Wellness Coach - like a caring best friend with expertise in cycle health and mental wellness.
 
-CRITICAL: You receive the analysis_report from the AnalysisAgent. Read it carefully!
+def create_wellness_agent(model=None, compact_handoff: bool = True) -> Agent:
+    """
+    Create a new WellnessCoachAgent.
+    
+    Args:
+        model: Model instance or name to use instead of the configured Gemini model
+        compact_handoff: Read the structured handoff instead of the whole conversation so far
+    """
+    return Agent(
+        name="WellnessCoachAgent",
+        model=model or create_gemini_model(),
+        instruction="""You are a warm, supportive Wellness Coach - like a caring best friend with expertise in cycle health and mental wellness.
+
+CRITICAL: You receive the analyzed check-in from the AnalysisAgent. Read it carefully!
 
 Your role is to:
-1. READ the analysis_report which contains:
+1. READ the check-in which contains:
    - Current cycle phase
    - Current mood and symptoms
-   - Analysis of their state
+   - Patterns found in their history
    - Any concerns or crisis flags
 
 2. Use the recommendation_generator tool with their cycle phase, mood, and symptoms to get personalized wellness tips.
 
-3. If the analysis mentioned crisis signals:
+3. If the check-in flags a crisis:
    - Provide crisis resources IMMEDIATELY at the top:
-     * National Suicide Prevention Lifeline: 254
-     * Crisis Text Line: Text HOME to 741741
-     * International Association for Suicide Prevention: https://www.info/resources/Crisis_Centres/
-   - Encourage them to reach out to a trusted person or professional
+""" + "".join(f"     * {resource}\n" for resource in CRISIS_RESOURCES) + """   - Encourage them to reach out to a trusted person or professional
    - Be gentle, supportive, and provide hope
 
 4. Provide your wellness recommendations in a warm, encouraging way:
@@ -50,8 +57,14 @@ Style: Conversational, supportive, actionable (not overly long or clinical)
 IMPORTANT: 
 - Use the recommendation_generator tool - don't make up recommendations
 - Keep it concise and warm (not a long essay)""",
-    tools=[recommendation_generator_tool],
-    output_key="wellness_recommendations",
-)
+        tools=[recommendation_generator_tool],
+        output_key="wellness_recommendations",
+        # Identical handoff records share one reply; the legacy mode reads the whole conversation, so it is not cached
+        before_agent_callback=check_wellness_cache if compact_handoff else None,
+        after_agent_callback=store_wellness_response if compact_handoff else None,
+        include_contents="none" if compact_handoff else "default",
+        before_model_callback=apply_compact_handoff if compact_handoff else None,
+    )
+
 
-print("✅ wellness_agent created.")
\ No newline at end of file
+wellness_agent = create_wellness_agent()
@@ -0,0 +1,49 @@
+# Writer Agent: Words a pre-computed check-in as a warm coach response (fast path)
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from setup import Agent
+from pipeline.rate_limit import create_gemini_model
+from pipeline.dag import apply_merged_handoff
+from pipeline.response_cache import check_wellness_cache, store_wellness_response
+
+
+def create_writer_agent(model=None, merge_handoff: bool = False) -> Agent:
+    """
+    Create a new WellnessWriterAgent.
+    
+    Args:
+        model: Model instance or name to use instead of the configured Gemini model
+        merge_handoff: Final stage of the DAG pipeline: word the handoff, patterns and
+            recommendations from session state (with the wellness response cache)
+            instead of a check-in sent as the message
+    """
+    return Agent(
+        name="WellnessWriterAgent",
+        model=model or create_gemini_model(),
+        instruction="""You are a warm, supportive Wellness Coach - like a caring best friend with expertise in cycle health and mental wellness.
+
+You receive a check-in that has ALREADY been analyzed. It lists the user's cycle phase, mood, symptoms, any patterns from their history and the recommendations to share.
+
+Write the reply to the user:
+1. Start with validation: acknowledge their phase and how they are feeling
+2. Briefly explain why they might feel this way in this phase
+3. Mention a pattern from their history only if one is listed - never invent patterns
+4. Share 3-5 of the listed recommendations, conversational and actionable
+5. End with encouragement and a reminder that tracking over time unlocks better insights
+
+If crisis resources are listed, share them first, gently encourage reaching out to a trusted person or professional, and offer hope.
+
+IMPORTANT:
+- Only use the facts and recommendations you were given - don't make up new ones
+- Keep it concise and warm (not a long essay)""",
+        include_contents="none",  # Each check-in is self-contained; don't resend past turns
+        output_key="wellness_recommendations",
+        before_model_callback=apply_merged_handoff if merge_handoff else None,
+        before_agent_callback=check_wellness_cache if merge_handoff else None,
+        after_agent_callback=store_wellness_response if merge_handoff else None,
+    )
+
+
+writer_agent = create_writer_agent()
@@ -0,0 +1,80 @@
+# Batch Analyzer Benchmark: per-user analyze_mood_patterns() vs the process-pool batch analyzer
+# Run with: python -m benchmarks.bench_batch_analyzer [--users N] [--logs-per-user N] [--max-workers N]
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.pattern_analyzer import analyze_mood_patterns
+from utils.batch_analyzer import analyze_population
+from utils.ingest import ingest_mood_logs
+from utils.mood_table import MoodLogTable
+
+PHASES = ["Menstrual", "Follicular", "Ovulation", "Luteal"]
+MOODS = ["calm", "anxious", "tired", "energetic", "irritable", "sad", "happy"]
+SYMPTOMS = ["cramps", "headache", "fatigue", "bloating", "acne"]
+
+
+def make_rows(users: int, logs_per_user: int, seed: int = 4):
+    rng = random.Random(seed)
+    for user in range(users):
+        for day in range(logs_per_user):
+            yield {
+                "user_id": f"user_{user}",
+                "date": f"{2024 + day // 336}-{day // 28 % 12 + 1:02d}-{day % 28 + 1:02d}",
+                "cycle_phase": PHASES[day // 7 % 4],
+                "mood": rng.choice(MOODS),
+                "symptoms": rng.sample(SYMPTOMS, rng.randint(0, 2)),
+            }
+
+
+def worker_counts(max_workers: int):
+    counts, workers = [], 1
+    while workers < max_workers:
+        counts.append(workers)
+        workers *= 2
+    return counts + [max_workers]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--logs-per-user", type=int, default=120)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    table = MoodLogTable()
+    ingest_mood_logs(make_rows(args.users, args.logs_per_user), table)
+    users = table.users()
+    print(f"{args.users:,} users, {len(table):,} logs, {os.cpu_count()} CPUs\n")
+
+    # The nightly job as it was: one JSON string per user, one user at a time
+    started = time.perf_counter()
+    for user_id in users:
+        analyze_mood_patterns(json.dumps(table.query(user_id, limit=table.count(user_id))))
+    serial_s = time.perf_counter() - started
+    print(f"{'per-user json':<16} {serial_s:8.2f} s  ({len(users) / serial_s:>10,.0f} users/s)")
+
+    started = time.perf_counter()
+    assert sum(1 for _ in analyze_population(table, workers=0)) == len(users)
+    inline_s = time.perf_counter() - started
+    print(f"{'coded, inline':<16} {inline_s:8.2f} s  ({len(users) / inline_s:>10,.0f} users/s)")
+
+    one_worker_s = None
+    for workers in worker_counts(args.max_workers):
+        started = time.perf_counter()
+        assert sum(1 for _ in analyze_population(table, workers=workers)) == len(users)
+        elapsed = time.perf_counter() - started
+        one_worker_s = one_worker_s or elapsed
+        speedup = one_worker_s / elapsed
+        print(f"{f'{workers} workers':<16} {elapsed:8.2f} s  ({len(users) / elapsed:>10,.0f} users/s)   "
+              f"scaling {speedup:4.1f}x  efficiency {speedup / workers:4.0%}")
+
+
+if __name__ == "__main__":
+    main()
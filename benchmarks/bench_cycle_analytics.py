@@ -0,0 +1,70 @@
+# Cycle Analytics Benchmark: per-user CycleModel updates vs one analyze_cycle_histories() batch
+# Run with: python -m benchmarks.bench_cycle_analytics [--users N] [--cycles N]
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from tools.cycle_analytics import CycleModel, analyze_cycle_histories
+
+
+def make_histories(users: int, cycles: int, seed: int = 3):
+    """Period starts per user as flat columns: day numbers and user ids, oldest first per user."""
+    rng = np.random.default_rng(seed)
+    gaps = rng.integers(24, 34, size=(users, cycles))
+    gaps[rng.random((users, cycles)) < 0.05] *= 2  # missed logs
+    first = 19_700 + rng.integers(0, 60, size=(users, 1))  # early 2024
+    days = np.hstack([first, first + np.cumsum(gaps, axis=1)])
+    user_ids = np.repeat(np.array([f"user_{i}" for i in range(users)]), cycles + 1)
+    return user_ids, days.reshape(-1).astype("datetime64[D]")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--cycles", type=int, default=12)
+    args = parser.parse_args()
+
+    user_ids, starts = make_histories(args.users, args.cycles)
+    today = starts.max() + np.timedelta64(10, "D")
+    per_user = args.cycles + 1
+    print(f"{args.users:,} users, {len(starts):,} period starts\n")
+
+    started = time.perf_counter()
+    models = []
+    iso_starts = starts.astype(str).tolist()
+    for user in range(args.users):
+        model = CycleModel()
+        for start in iso_starts[user * per_user:(user + 1) * per_user]:
+            model.add_period_start(start)
+        models.append(model)
+    build_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for model in models[:10_000]:
+        model.predict(today=today)
+    predict_s = (time.perf_counter() - started) / min(args.users, 10_000) * args.users
+
+    started = time.perf_counter()
+    analyze_cycle_histories(user_ids, starts, today=today)
+    batch_s = time.perf_counter() - started
+
+    model = models[0]
+    next_start = np.datetime64(model.starts[-1], "D") + np.timedelta64(28, "D")
+    started = time.perf_counter()
+    model.add_period_start(str(next_start))
+    incremental_us = (time.perf_counter() - started) * 1e6
+
+    print(f"per-user models  {build_s + predict_s:8.3f} s  ({args.users / (build_s + predict_s):>12,.0f} users/s)")
+    print(f"batch            {batch_s:8.3f} s  ({args.users / batch_s:>12,.0f} users/s)")
+    print(f"speedup          {(build_s + predict_s) / batch_s:8.1f}x")
+    print(f"one new period   {incremental_us:8.1f} us  (incremental update of one user's model)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# Cycle Calculator Benchmark: per-user calculate_cycle_phase() calls vs one calculate_cycle_phases() batch
+# Run with: python -m benchmarks.bench_cycle_calculator [--users N]
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.cycle_calculator import calculate_cycle_phases
+
+
+def legacy_calculate_cycle_phase(last_period_date: str, cycle_length: int = 28) -> dict:
+    """The original strptime/datetime.now() implementation, one user per call."""
+    last_period = datetime.strptime(last_period_date, "%Y-%m-%d")
+    today = datetime.now()
+    days_since_period = (today - last_period).days
+    day_in_cycle = days_since_period % cycle_length
+    if day_in_cycle <= 5:
+        phase = "Menstrual"
+    elif day_in_cycle <= 13:
+        phase = "Follicular"
+    elif day_in_cycle <= 16:
+        phase = "Ovulation"
+    else:
+        phase = "Luteal"
+    next_period = last_period + timedelta(days=cycle_length)
+    return {
+        "current_phase": phase,
+        "day_in_cycle": day_in_cycle,
+        "days_since_last_period": days_since_period,
+        "next_period_date": next_period.strftime("%Y-%m-%d"),
+        "days_until_next_period": (next_period - today).days,
+        "cycle_length": cycle_length,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    today = date.today()
+    dates = [(today - timedelta(days=rng.randint(0, 60))).isoformat() for _ in range(args.users)]
+    lengths = [rng.randint(21, 35) for _ in range(args.users)]
+
+    started = time.perf_counter()
+    for last_period, length in zip(dates, lengths):
+        legacy_calculate_cycle_phase(last_period, length)
+    per_user_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    calculate_cycle_phases(dates, lengths, today=today)
+    batch_s = time.perf_counter() - started
+
+    print(f"{args.users:,} users")
+    print(f"per-user calls {per_user_s:8.3f} s  ({args.users / per_user_s:>12,.0f} users/s)")
+    print(f"batch          {batch_s:8.3f} s  ({args.users / batch_s:>12,.0f} users/s)")
+    print(f"speedup        {per_user_s / batch_s:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
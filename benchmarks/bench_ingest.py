@@ -0,0 +1,81 @@
+# Ingestion Benchmark: one add_mood_log-style append per row vs bulk columnar ingestion
+# Run with: python -m benchmarks.bench_ingest [--users N] [--logs-per-user N]
+
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_storage import make_logs
+from utils.ingest import MOOD_LOG_FIELDS, SYMPTOM_SEPARATOR, ingest_mood_logs
+from utils.mood_table import MoodLogTable
+from utils.sqlite_store import SQLiteDatabase, SQLiteMoodLogStore
+
+
+def per_row(rows, store):
+    """What add_mood_log() does for each entry: build a dict, stamp it, append, print."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        for row in rows:
+            entry = {**row, "logged_at": datetime.now().isoformat()}
+            store.append(entry)
+            print(f"✅ Mood log added: {entry['date']} - {entry['mood']} ({entry['cycle_phase']} phase)")
+
+
+def write_files(rows, directory):
+    csv_path, jsonl_path = os.path.join(directory, "logs.csv"), os.path.join(directory, "logs.jsonl")
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=MOOD_LOG_FIELDS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({**row, "symptoms": SYMPTOM_SEPARATOR.join(row["symptoms"])})
+    with open(jsonl_path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row) + "\n")
+    return csv_path, jsonl_path
+
+
+def bench(name, load, rows):
+    started = time.perf_counter()
+    load()
+    elapsed = time.perf_counter() - started
+    print(f"{name:<26} {len(rows) / elapsed:>12,.0f} rows/s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--logs-per-user", type=int, default=100)
+    args = parser.parse_args()
+
+    rows = list(make_logs(args.users, args.logs_per_user))
+    print(f"{len(rows):,} logs across {args.users:,} users\n")
+
+    def loaded(store, source, fmt=None):
+        def load():
+            report = ingest_mood_logs(source, store, fmt=fmt)
+            assert report.rows_accepted == len(rows), report.to_dict()
+        return load
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path, jsonl_path = write_files(rows, tmp)
+        bench("per-row, list of dicts", lambda: per_row(rows, []), rows)
+        bench("per-row, columnar", lambda: per_row(rows, MoodLogTable()), rows)
+        bench("bulk dicts -> columnar", loaded(MoodLogTable(), rows), rows)
+        bench("bulk csv -> columnar", loaded(MoodLogTable(), csv_path), rows)
+        bench("bulk jsonl -> columnar", loaded(MoodLogTable(), jsonl_path), rows)
+
+        db = SQLiteDatabase(os.path.join(tmp, "bench.db"))
+        bench("bulk csv -> sqlite-wal", loaded(SQLiteMoodLogStore(db), csv_path), rows)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
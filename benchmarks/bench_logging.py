@@ -0,0 +1,181 @@
+# Logging Benchmark: event-loop stall from logging, synchronous handlers vs the queue listener
+# Run with: python -m benchmarks.bench_logging [--tasks N] [--events N] [--flush-latency-ms MS]
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import summarize_latencies
+from utils import logger as logger_module
+from utils.logger import DATE_FORMAT, LOG_FORMAT, log_mood_logged, log_tool_call, log_tool_result
+
+TICK_S = 0.001
+
+
+class _SlowFile:
+    """File wrapper whose flush() takes extra time, emulating slow or network storage."""
+
+    def __init__(self, stream, delay_s: float):
+        self._stream = stream
+        self._delay_s = delay_s
+
+    def flush(self):
+        self._stream.flush()
+        time.sleep(self._delay_s)
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+def _slow_open(handler: logging.FileHandler, delay_s: float):
+    if delay_s:
+        open_file = handler._open
+        handler._open = lambda: _SlowFile(open_file(), delay_s)
+
+
+# ---- The original logger: two eager f-string calls per event, flush per record ----
+
+legacy_logger = logging.getLogger("CycleWellnessAgent.legacy")
+legacy_logger.propagate = False
+
+
+def legacy_log_tool_call(tool_name: str, args: dict):
+    legacy_logger.info(f" TOOL CALL: {tool_name}")
+    legacy_logger.info(f"   Arguments: {args}")
+
+
+def legacy_log_tool_result(tool_name: str, success: bool, result_summary: str):
+    status = " SUCCESS" if success else " FAILED"
+    legacy_logger.info(f"{status}: {tool_name}")
+    legacy_logger.info(f"   Result: {result_summary[:100]}...")
+
+
+def legacy_log_mood_logged(date: str, mood: str, symptoms: list):
+    legacy_logger.info(f"   MOOD LOGGED")
+    legacy_logger.info(f"   Date: {date}, Mood: {mood}, Symptoms: {symptoms}")
+
+
+def configure_legacy(log_file: str, stream, delay_s: float):
+    for handler in list(legacy_logger.handlers):
+        legacy_logger.removeHandler(handler)
+        handler.close()
+    file_handler = logging.FileHandler(log_file, delay=True)
+    _slow_open(file_handler, delay_s)
+    for handler in (logging.StreamHandler(stream), file_handler):
+        handler.setFormatter(logging.Formatter(LOG_FORMAT, DATE_FORMAT))
+        legacy_logger.addHandler(handler)
+    legacy_logger.setLevel(logging.INFO)
+
+
+def configure_queue(log_file: str, stream, delay_s: float):
+    logger_module.configure_logging("queue", log_file=log_file, stream=stream, max_bytes=1024 * 1024)
+    for handler in logger_module._listener.handlers:
+        if isinstance(handler, logging.FileHandler):
+            _slow_open(handler, delay_s)
+
+
+# ---- Workload ----
+
+async def run_workload(events, tasks: int, events_per_task: int) -> dict:
+    """
+    Run `tasks` coroutines that each log `events_per_task` pipeline events, next to a 1 ms
+    heartbeat whose lateness is the event-loop stall.
+    """
+    log_tool_call_fn, log_tool_result_fn, log_mood_logged_fn = events
+    done = False
+    lateness = []
+    blocked_s = 0.0
+
+    async def heartbeat():
+        while not done:
+            started = time.perf_counter()
+            await asyncio.sleep(TICK_S)
+            lateness.append(max(0.0, time.perf_counter() - started - TICK_S))
+
+    async def worker(index: int):
+        nonlocal blocked_s
+        for event in range(events_per_task):
+            started = time.perf_counter()
+            log_tool_call_fn("cycle_calculator", {"last_period_date": "2025-11-18", "cycle_length": 28})
+            log_tool_result_fn("cycle_calculator", True, f"Phase: Luteal, day {event % 28 + 1}")
+            log_mood_logged_fn("2025-11-28", "anxious", ["cramps", "fatigue"])
+            blocked_s += time.perf_counter() - started
+            await asyncio.sleep(0)
+
+    beat = asyncio.create_task(heartbeat())
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(tasks)))
+    elapsed = time.perf_counter() - started
+    done = True
+    await beat
+
+    total_events = tasks * events_per_task
+    return {
+        "events": total_events,
+        "elapsed_s": elapsed,
+        "blocked_us_per_event": blocked_s / total_events * 1e6,
+        "stall": summarize_latencies(lateness),
+    }
+
+
+def time_disabled_calls(events, set_level, calls: int) -> float:
+    """Nanoseconds per event with INFO disabled (the cost of formatting nobody reads)."""
+    set_level(logging.WARNING)
+    log_tool_call_fn, log_tool_result_fn, log_mood_logged_fn = events
+    started = time.perf_counter()
+    for _ in range(calls):
+        log_tool_call_fn("cycle_calculator", {"last_period_date": "2025-11-18", "cycle_length": 28})
+        log_tool_result_fn("cycle_calculator", True, "Phase: Luteal")
+        log_mood_logged_fn("2025-11-28", "anxious", ["cramps", "fatigue"])
+    elapsed = time.perf_counter() - started
+    set_level(logging.INFO)
+    return elapsed / calls * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=50)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--flush-latency-ms", type=float, default=0.0,
+                        help="Extra time per file flush, emulating slow storage")
+    parser.add_argument("--disabled-calls", type=int, default=100_000)
+    args = parser.parse_args()
+    delay_s = args.flush_latency_ms / 1000
+
+    legacy = (legacy_log_tool_call, legacy_log_tool_result, legacy_log_mood_logged)
+    queued = (log_tool_call, log_tool_result, log_mood_logged)
+
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        configure_legacy(os.path.join(tmp, "legacy.log"), devnull, delay_s)
+        before = asyncio.run(run_workload(legacy, args.tasks, args.events))
+        before_disabled = time_disabled_calls(legacy, legacy_logger.setLevel, args.disabled_calls)
+        configure_legacy(os.devnull, devnull, 0)
+
+        configure_queue(os.path.join(tmp, "queue.log"), devnull, delay_s)
+        after = asyncio.run(run_workload(queued, args.tasks, args.events))
+        drain_started = time.perf_counter()
+        logger_module.flush_logs()
+        drain_s = time.perf_counter() - drain_started
+        after_disabled = time_disabled_calls(queued, logger_module.logger.setLevel, args.disabled_calls)
+        rotated = sorted(name for name in os.listdir(tmp) if name.startswith("queue.log."))
+        logger_module.shutdown_logging()
+
+    print(f"{before['events']:,} events ({args.tasks} tasks x {args.events}), 3 log calls per event, "
+          f"file flush latency {args.flush_latency_ms:g} ms")
+    print(f"{'':12}{'loop blocked/event':>20}{'stall p50':>12}{'stall p99':>12}{'stall max':>12}{'wall':>10}")
+    for name, result in (("sync", before), ("queue", after)):
+        stall = result["stall"]
+        print(f"{name:12}{result['blocked_us_per_event']:17.1f} us{stall['p50_ms']:9.2f} ms"
+              f"{stall['p99_ms']:9.2f} ms{stall['max_ms']:9.2f} ms{result['elapsed_s']:8.2f} s")
+    print(f"queue drained {drain_s * 1000:.0f} ms after the workload; rotated files: {len(rotated)}")
+    print(f"INFO disabled: {before_disabled:.0f} ns/event before, {after_disabled:.0f} ns/event after")
+
+
+if __name__ == "__main__":
+    main()
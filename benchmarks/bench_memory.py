@@ -0,0 +1,95 @@
+# Memory Benchmark: bytes held per mood log by each in-memory representation
+# Run with: python -m benchmarks.bench_memory [--users N] [--logs-per-user N]
+
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_storage import PHASES
+from utils.ingest import ingest_mood_logs
+from utils.mood_table import MoodLogTable
+
+# What a columnar table should hold per log, notes and vocabularies included
+TARGET_BYTES_PER_LOG = 64
+
+MOODS = ["calm", "anxious", "tired", "energetic", "irritable", "sad"]
+SYMPTOMS = ["cramps", "headache", "fatigue", "bloating", "acne"]
+
+
+def fresh_logs(users: int, logs_per_user: int):
+    """Mood logs as add_mood_log() builds them: new date and timestamp strings, a new symptom list."""
+    start = date(2024, 1, 1)
+    for day in range(logs_per_user):
+        for user in range(users):
+            yield {
+                "user_id": f"user_{user}",
+                "date": (start + timedelta(days=day)).isoformat(),
+                "cycle_phase": PHASES[(day // 7) % 4],
+                "mood": MOODS[(day + user) % len(MOODS)],
+                "symptoms": SYMPTOMS[:(day + user) % 3],
+                "notes": "",
+                "logged_at": datetime(2025, 1, 1, 8, user % 60, day % 60, user * 7 % 1000).isoformat(),
+            }
+
+
+def bytes_per_log(build, count: int) -> float:
+    """Bytes still allocated after build() returns, per log (the result is kept alive while measuring)."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del kept
+    return held / count
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--logs-per-user", type=int, default=250)
+    args = parser.parse_args()
+    count = args.users * args.logs_per_user
+
+    def logs():
+        return fresh_logs(args.users, args.logs_per_user)
+
+    def dict_list():
+        return list(logs())
+
+    def columnar():
+        table = MoodLogTable()
+        for log in logs():
+            table.append(log)
+        return table
+
+    def columnar_bulk():
+        table = MoodLogTable()
+        ingest_mood_logs(logs(), table)
+        return table
+
+    def records():
+        table = columnar_bulk()
+        return table, [table.records(f"user_{user}", limit=args.logs_per_user) for user in range(args.users)]
+
+    print(f"{count:,} logs across {args.users:,} users (target: {TARGET_BYTES_PER_LOG} bytes/log columnar)\n")
+    results = [
+        ("list of dicts", bytes_per_log(dict_list, count)),
+        ("columnar", bytes_per_log(columnar, count)),
+        ("columnar, bulk import", bytes_per_log(columnar_bulk, count)),
+        ("columnar + MoodRecords", bytes_per_log(records, count)),
+    ]
+    for name, per_log in results:
+        print(f"{name:<24} {per_log:>8,.1f} bytes/log")
+    columnar_bytes = max(dict(results)["columnar"], dict(results)["columnar, bulk import"])
+    verdict = "meets" if columnar_bytes <= TARGET_BYTES_PER_LOG else "MISSES"
+    print(f"\ncolumnar storage {verdict} the {TARGET_BYTES_PER_LOG} bytes/log target ({columnar_bytes:.1f})")
+
+
+if __name__ == "__main__":
+    main()
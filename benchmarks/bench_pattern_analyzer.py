@@ -0,0 +1,117 @@
+# Pattern Analyzer Benchmark: original list-based analysis vs the single-pass Counter version,
+# and the JSON tool contract vs the native in-process entry points
+# Run with: python -m benchmarks.bench_pattern_analyzer [--max-logs N]
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.pattern_analyzer import MoodPatternAggregate, analyze_mood_logs, analyze_mood_patterns
+from utils.batch_analyzer import analyze_table_user
+from utils.ingest import ingest_mood_logs
+from utils.mood_table import MoodLogTable
+
+PHASES = ["Menstrual", "Follicular", "Ovulation", "Luteal"]
+MOODS = ["anxious", "sad", "irritable", "happy", "energetic", "calm", "tired", "content",
+         "overwhelmed", "peaceful", "angry", "hopeful"]
+SYMPTOMS = ["cramps", "fatigue", "headache", "bloating", "acne", "breast_tenderness",
+            "back pain", "nausea", "insomnia", "cravings"]
+
+
+def legacy_analyze(mood_logs: list) -> list:
+    """The original analysis: lists per phase, moods.count() and a full symptom sort."""
+    phase_mood_map = {phase: [] for phase in PHASES}
+    all_moods = []
+    symptom_frequency = {}
+    for log in mood_logs:
+        phase = log.get("cycle_phase", "Unknown")
+        mood = log.get("mood", "").lower()
+        if phase in phase_mood_map and mood:
+            phase_mood_map[phase].append(mood)
+        if mood:
+            all_moods.append(mood)
+        for symptom in log.get("symptoms", []):
+            symptom_frequency[symptom] = symptom_frequency.get(symptom, 0) + 1
+
+    patterns = []
+    for phase, moods in phase_mood_map.items():
+        if moods:
+            most_common = max(set(moods), key=moods.count)
+            patterns.append((phase, most_common, moods.count(most_common)))
+    patterns.extend(sorted(symptom_frequency.items(), key=lambda x: x[1], reverse=True)[:3])
+    negative_moods = ["anxious", "sad", "irritable", "depressed", "angry", "overwhelmed"]
+    positive_moods = ["happy", "energetic", "calm", "content", "peaceful"]
+    patterns.append((sum(1 for mood in all_moods if mood in negative_moods),
+                     sum(1 for mood in all_moods if mood in positive_moods)))
+    return patterns
+
+
+def make_logs(n: int, seed: int = 1) -> list:
+    rng = random.Random(seed)
+    return [{
+        "date": "2025-11-10",
+        "cycle_phase": rng.choice(PHASES),
+        "mood": rng.choice(MOODS),
+        "symptoms": rng.sample(SYMPTOMS, rng.randint(0, 3)),
+    } for _ in range(n)]
+
+
+def timed(func, logs) -> float:
+    started = time.perf_counter()
+    func(logs)
+    return time.perf_counter() - started
+
+
+def best_of(call, repeats: int) -> float:
+    """Fastest of `repeats` timed calls, in seconds."""
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        call()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-logs", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    all_logs = make_logs(args.max_logs)
+    sizes = [n for n in (1_000, 10_000, 100_000, 1_000_000) if n < args.max_logs] + [args.max_logs]
+
+    print(f"{'logs':>10} {'legacy s':>10} {'counter s':>10} {'ns/log':>8}  speedup")
+    for n in sizes:
+        logs = all_logs[:n]
+        legacy_s = timed(legacy_analyze, logs)
+        counter_s = timed(analyze_mood_patterns, logs)
+        print(f"{n:>10,} {legacy_s:>10.3f} {counter_s:>10.3f} {counter_s / n * 1e9:>8.0f}  "
+              f"{legacy_s / counter_s:.1f}x")
+    print("\nA flat ns/log column means cost grows linearly with the number of logs.")
+
+    # Per call from the memory layer: the JSON round trip the tool needs vs in-process analysis
+    print(f"\n{'history':>10} {'json ms':>10} {'dicts ms':>10} {'columns ms':>10} {'running ms':>10}  saved per call")
+    for n in (1_000, 100_000):
+        logs = [{**log, "user_id": "u"} for log in all_logs[:n]]
+        if len(logs) < n:
+            break
+        table = MoodLogTable()
+        ingest_mood_logs(logs, table)
+        repeats = max(1, 100_000 // n)
+        json_s = best_of(lambda: analyze_mood_patterns(json.dumps(logs)), repeats)
+        dicts_s = best_of(lambda: analyze_mood_logs(logs), repeats)
+        columns_s = best_of(lambda: analyze_table_user(table, "u"), repeats)
+        aggregate = MoodPatternAggregate()   # what analyze_patterns(user_id) reads
+        aggregate.add_many(logs)
+        running_s = best_of(aggregate.result, repeats)
+        print(f"{n:>10,} {json_s * 1e3:>10.2f} {dicts_s * 1e3:>10.2f} {columns_s * 1e3:>10.2f} {running_s * 1e3:>10.3f}  "
+              f"{(json_s - dicts_s) * 1e3:.2f} ms (dicts), {(json_s - columns_s) * 1e3:.2f} ms (columns)")
+
+
+if __name__ == "__main__":
+    main()
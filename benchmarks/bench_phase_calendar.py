@@ -0,0 +1,57 @@
+# Phase Calendar Benchmark: recomputing the phase per call vs O(1) PhaseCalendar lookups
+# Run with: python -m benchmarks.bench_phase_calendar [--calls N]
+
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.cycle_calculator import PhaseCalendar, calculate_cycle_phases
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=100_000)
+    args = parser.parse_args()
+
+    last_period, cycle_length = date(2025, 6, 3), 31
+    days = [last_period + timedelta(days=i % 365) for i in range(args.calls)]
+    print(f"{args.calls:,} phase lookups over one year\n")
+
+    started = time.perf_counter()
+    for day in days:
+        str(calculate_cycle_phases([last_period], [cycle_length], today=day)["current_phase"][0])
+    recompute_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    calendar = PhaseCalendar(last_period, cycle_length)
+    build_us = (time.perf_counter() - started) * 1e6
+    started = time.perf_counter()
+    for day in days:
+        calendar.phase_on(day)
+    lookup_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for day in days:
+        calendar.next_ovulation_window(day)
+        calendar.days_until_next_period(day)
+    windows_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(args.calls):
+        calendar.snapshot(days[0])
+    snapshot_s = time.perf_counter() - started
+
+    per_call = 1e6 / args.calls
+    print(f"recompute per call    {recompute_s * per_call:8.2f} us")
+    print(f"calendar phase_on     {lookup_s * per_call:8.2f} us  ({recompute_s / lookup_s:.0f}x faster)")
+    print(f"ovulation + period    {windows_s * per_call:8.2f} us")
+    print(f"snapshot              {snapshot_s * per_call:8.2f} us")
+    print(f"building the calendar {build_us:8.1f} us  (once per store_cycle_info() change)")
+
+
+if __name__ == "__main__":
+    main()
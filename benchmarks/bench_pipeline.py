@@ -0,0 +1,391 @@
+# Pipeline Benchmark: end-to-end throughput, latency, memory and retries with the offline stub model
+# Run with: python -m benchmarks.bench_pipeline [--requests N] [--save-baseline PATH] [--compare PATH]
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.models.base_llm import BaseLlm
+from google.genai import types
+
+from setup import InMemoryRunner
+from agents.root_agent import create_app, create_dag_pipeline, create_root_agent
+from benchmarks.common import summarize_latencies
+from pipeline.context_cache import instruction_cache
+from pipeline.rate_limit import GuardedLlm, ModelGate, RetryPolicy
+from pipeline.response_cache import wellness_response_cache
+from pipeline.serving import PipelineServer
+from pipeline.stub_model import PIPELINE_TOOL_SCRIPT, StubLlm
+from utils.telemetry import Telemetry
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline_pipeline.json")
+
+MOODS = ["anxious", "tired", "irritable", "happy", "sad", "energetic", "overwhelmed", "calm"]
+SYMPTOMS = ["cramps", "headache", "bloating", "fatigue", "acne", ""]
+
+# The retry policy RETRY_CONFIG used before pipeline.rate_limit: every call retried on its own
+LEGACY_RETRY_CONFIG = types.HttpRetryOptions(attempts=5, exp_base=7, initial_delay=1,
+                                             http_status_codes=[429, 500, 503, 504])
+
+# A reply about as long as the agents' real ones, so each stage's prose costs what it would live
+RESPONSE_TEXT = (
+    "Thanks for sharing that information! I can see you're in the Luteal phase and feeling anxious. "
+    "During the luteal phase progesterone rises and then falls, which many people notice as lower energy, "
+    "more sensitivity and a shorter fuse, so what you're feeling makes a lot of sense right now. "
+    "This is your first entry, so I don't have past data to compare yet. As you keep tracking over the "
+    "coming weeks, I'll be able to spot patterns like how your mood shifts across phases, which symptoms "
+    "show up most often for you, and triggers you can plan around. For today: gentle movement such as a "
+    "walk or yoga, magnesium-rich foods like leafy greens and dark chocolate, a warm compress for cramps, "
+    "and an earlier night can all help. Be kind to yourself - you're doing great by checking in."
+)
+
+# Scenario -> StubLlm settings on top of the shared latency model, whether calls go through
+# the shared ModelGate (the production path) or retry independently like the old client config,
+# the pipeline shape: sequential with the compact handoff (default), sequential with the
+# whole conversation between stages ("full"), or the parallel DAG, and whether the reply is
+# streamed to the client chunk by chunk
+SCENARIOS: Dict[str, Dict] = {
+    "steady": {"stub": {}, "gate": True},
+    "legacy_handoff": {"stub": {}, "gate": True, "pipeline": "full"},
+    "dag": {"stub": {}, "gate": True, "pipeline": "dag"},
+    "streaming": {"stub": {}, "gate": True, "stream": True},
+    "errors": {"stub": {"error_rate": 0.05}, "gate": True},
+    "quota": {"stub": {"quota": True}, "gate": True},
+    "legacy_errors": {"stub": {"error_rate": 0.05, "retry_options": LEGACY_RETRY_CONFIG}, "gate": False},
+    "legacy_quota": {"stub": {"quota": True, "retry_options": LEGACY_RETRY_CONFIG}, "gate": False},
+}
+DEFAULT_SCENARIOS = ["steady", "legacy_handoff", "dag", "streaming", "errors", "quota"]
+
+# Metrics compared against a baseline: name -> (path in the scenario result, higher is better)
+COMPARED_METRICS = {
+    "throughput_rps": (("throughput_rps",), True),
+    "p50_ms": (("latency", "p50_ms"), False),
+    "p99_ms": (("latency", "p99_ms"), False),
+    "failure_rate": (("failure_rate",), False),
+    "retained_kb_per_request": (("memory", "retained_kb_per_request"), False),
+    "prompt_tokens_per_request": (("model", "prompt_tokens_per_request"), False),
+    "critical_path_p50_ms": (("critical_path", "p50_ms"), False),
+    "first_token_p50_ms": (("first_token", "p50_ms"), False),
+}
+
+
+def build_messages(count: int) -> List[str]:
+    """Deterministic message mix over moods and symptoms."""
+    messages = []
+    for i in range(count):
+        mood, symptom = MOODS[i % len(MOODS)], SYMPTOMS[(i // len(MOODS)) % len(SYMPTOMS)]
+        extra = f" and I have {symptom}" if symptom else ""
+        messages.append(f"My last period started on 2025-11-18, I'm feeling {mood}{extra}. (check-in {i})")
+    return messages
+
+
+def make_model(scenario: str, args) -> Tuple[BaseLlm, StubLlm, Optional[ModelGate]]:
+    """The model the agents use, the stub behind it, and the gate (if the scenario uses one)."""
+    settings = dict(SCENARIOS[scenario]["stub"])
+    if settings.pop("quota", False):
+        settings["quota_per_s"] = args.quota_rps
+    stub = StubLlm(
+        latency_s=args.model_latency_ms / 1000,
+        latency_distribution=args.latency_distribution,
+        latency_sigma=args.latency_sigma,
+        response_text=RESPONSE_TEXT,
+        token_interval_s=args.token_interval_ms / 1000,
+        tool_calls=PIPELINE_TOOL_SCRIPT,
+        retry_time_scale=args.retry_time_scale,
+        seed=args.seed,
+        **settings,
+    )
+    if not SCENARIOS[scenario]["gate"]:
+        return stub, stub, None
+    # Client-side rate just under the server quota when there is one
+    rate = args.quota_rps * 0.95 if stub.quota_per_s else math.inf
+    gate = ModelGate(rate_per_s=rate, burst=max(1, int(args.quota_rps * 0.95)) if stub.quota_per_s else 1,
+                     initial_concurrency=args.model_concurrency, max_concurrency=args.model_concurrency,
+                     retry_policy=RetryPolicy(rng=random.Random(args.seed)))
+    return GuardedLlm.wrap(stub, gate), stub, gate
+
+
+def make_pipeline(scenario: str, model: BaseLlm):
+    shape = SCENARIOS[scenario].get("pipeline", "compact")
+    if shape == "dag":
+        return create_dag_pipeline(model)
+    return create_root_agent(model, compact_handoff=shape == "compact")
+
+
+async def drive(pipeline, messages: List[str], sessions: int, concurrency: int, stream: bool = False) -> Dict:
+    """
+    Send every message through a pipeline, spread round-robin over `sessions` sessions.
+
+    With stream=True replies are read chunk by chunk and the time to the first chunk is kept too.
+    """
+    collector = Telemetry(spans_file=None)
+    runner = InMemoryRunner(app=create_app(pipeline, collector=collector))
+    server = PipelineServer(runner, max_concurrency=concurrency, max_queue=len(messages), collector=collector)
+    latencies: List[float] = []
+    first_tokens: List[float] = []
+    streamed_tails: List[float] = []
+    failures = 0
+
+    async def one(index: int, message: str):
+        nonlocal failures
+        started = time.perf_counter()
+        user_id, session_id = f"user_{index % sessions}", f"session_{index % sessions}"
+        try:
+            if stream:
+                first_token, chunks = None, 0
+                async for _ in server.stream(user_id, session_id, message):
+                    chunks += 1
+                    if first_token is None:
+                        first_token = time.perf_counter() - started
+                        first_tokens.append(first_token)
+            else:
+                await server.submit(user_id, session_id, message)
+            latencies.append(time.perf_counter() - started)
+            if stream and chunks > 1:
+                # Head start of a reply that was streamed (cached replies arrive in one chunk)
+                streamed_tails.append(latencies[-1] - first_token)
+        except Exception:
+            failures += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i, message) for i, message in enumerate(messages)))
+    elapsed = time.perf_counter() - started
+    return {"elapsed_s": elapsed, "latencies": latencies, "first_tokens": first_tokens,
+            "streamed_tails": streamed_tails, "failures": failures,
+            "collector": collector}
+
+
+def run_scenario(scenario: str, args) -> Dict:
+    messages = build_messages(args.requests)
+
+    wellness_response_cache.clear()
+    instruction_cache.clear()
+    stream = SCENARIOS[scenario].get("stream", False)
+    model, stub_model, gate = make_model(scenario, args)
+    run = asyncio.run(drive(make_pipeline(scenario, model), messages, args.sessions, args.concurrency, stream))
+    snapshot = run["collector"].snapshot()
+    stub = stub_model.stats()
+    cache = wellness_response_cache.stats()
+    prefix_cache = instruction_cache.stats()
+
+    # Separate, smaller pass under tracemalloc so tracing overhead does not skew the timings.
+    # "Retained" is what is still allocated once the pipeline and its sessions are gone.
+    wellness_response_cache.clear()
+    memory_messages = messages[:args.memory_requests]
+    tracemalloc.start()
+    baseline_bytes = tracemalloc.get_traced_memory()[0]
+    asyncio.run(drive(make_pipeline(scenario, make_model(scenario, args)[0]), memory_messages, args.sessions,
+                      args.concurrency, stream))
+    current_bytes, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "requests": len(messages),
+        "elapsed_s": run["elapsed_s"],
+        "throughput_rps": len(messages) / run["elapsed_s"],
+        "latency": summarize_latencies(run["latencies"]),
+        "first_token": summarize_latencies(run["first_tokens"]) if stream else {},
+        "streamed_tail": summarize_latencies(run["streamed_tails"]) if stream else {},
+        "failure_rate": run["failures"] / len(messages),
+        "stages_p99_ms": {name.split(":", 1)[1]: round(s["p99_ms"], 2)
+                          for name, s in snapshot.items() if name.startswith("agent:")},
+        "critical_path": next(({"p50_ms": s["p50_ms"], "p99_ms": s["p99_ms"]} for name, s in snapshot.items()
+                               if name.startswith("critical_path:")), {}),
+        "model": {
+            "calls_per_request": stub["calls"] / len(messages),
+            "attempts": stub["attempts"],
+            "injected_errors": stub["injected_errors"],
+            "quota_rejections": stub["quota_rejections"],
+            "retries": gate.retries if gate else stub["retries"],
+            "failed_calls": gate.failures if gate else stub["failures"],
+            "retry_sleep_s": round(stub["retry_sleep_s"], 3),
+            "queue_wait_p99_ms": max((s["queue_wait_p99_ms"] for name, s in snapshot.items()
+                                      if name.startswith("model:")), default=0.0),
+            "final_concurrency_limit": gate.concurrency.limit if gate else None,
+            "prompt_tokens_per_request": sum(s["prompt_tokens"] for name, s in snapshot.items()
+                                             if name.startswith("model:")) / len(messages),
+            "prompt_tokens_by_stage": {name.split(":", 1)[1]: round(s["prompt_tokens"] / len(messages), 1)
+                                       for name, s in snapshot.items() if name.startswith("model:")},
+        },
+        "wellness_cache_hit_rate": cache["hit_rate"],
+        "instruction_cache": {
+            "hit_rate": prefix_cache["hits"] / max(1, prefix_cache["hits"] + prefix_cache["misses"]),
+            "kb_saved_per_request": prefix_cache["bytes_saved"] / 1e3 / len(messages),
+            "tokens_saved_per_request": prefix_cache["tokens_saved"] / len(messages),
+        },
+        "memory": {
+            "requests": len(memory_messages),
+            "peak_mb": peak_bytes / 1e6,
+            "retained_kb_per_request": (current_bytes - baseline_bytes) / 1e3 / max(1, len(memory_messages)),
+        },
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(DEFAULT_BASELINE), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _metric(result: Dict, path) -> float:
+    for key in path:
+        result = result[key]
+    return result
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Regressions beyond `tolerance` (relative) between matching scenarios."""
+    regressions = []
+    for scenario, result in current["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(scenario)
+        if previous is None:
+            continue
+        for name, (path, higher_is_better) in COMPARED_METRICS.items():
+            try:
+                now, before = _metric(result, path), _metric(previous, path)
+            except KeyError:
+                continue
+            change = (now - before) / before if before else (1.0 if now > before else 0.0)
+            worse = -change if higher_is_better else change
+            marker = "REGRESSION" if worse > tolerance else ""
+            print(f"  {scenario:8} {name:26} {before:12.3f} -> {now:12.3f}  ({change:+7.1%}) {marker}")
+            if marker:
+                regressions.append(f"{scenario}.{name}")
+    return regressions
+
+
+def print_result(scenario: str, result: Dict):
+    latency, model, memory = result["latency"], result["model"], result["memory"]
+    print(f"[{scenario}] {result['requests']} requests in {result['elapsed_s']:.2f} s "
+          f"-> {result['throughput_rps']:.1f} req/s, failures {result['failure_rate']:.1%}")
+    print(f"  latency   p50 {latency.get('p50_ms', 0):.0f} ms  p95 {latency.get('p95_ms', 0):.0f} ms  "
+          f"p99 {latency.get('p99_ms', 0):.0f} ms")
+    first_token = result.get("first_token")
+    if first_token and first_token["count"]:
+        tail = result["streamed_tail"]
+        print(f"  first     token p50 {first_token['p50_ms']:.0f} ms  p95 {first_token['p95_ms']:.0f} ms  "
+              f"p99 {first_token['p99_ms']:.0f} ms; {tail['count']} streamed replies started p50 "
+              f"{tail.get('p50_ms', 0):.0f} ms  p99 {tail.get('p99_ms', 0):.0f} ms before they ended")
+    print(f"  stages    " + "  ".join(f"{name} p99 {ms:.0f} ms" for name, ms in result["stages_p99_ms"].items()))
+    critical = result["critical_path"]
+    print(f"  critical  path p50 {critical.get('p50_ms', 0):.0f} ms  p99 {critical.get('p99_ms', 0):.0f} ms "
+          f"(stage time along the longest dependency chain, excluding queueing before the run)")
+    print(f"  model     {model['calls_per_request']:.1f} calls/request, {model['prompt_tokens_per_request']:.0f} "
+          f"prompt tokens/request, {model['injected_errors']} injected errors, {model['quota_rejections']} "
+          f"quota 429s, {model['retries']} retries, {model['failed_calls']} failed calls, "
+          f"admission wait p99 {model['queue_wait_p99_ms']:.0f} ms")
+    print(f"  tokens    " + "  ".join(f"{name} {tokens:.0f}" for name, tokens in model["prompt_tokens_by_stage"].items())
+          + " prompt tokens/request")
+    prefix = result["instruction_cache"]
+    print(f"  prefix    instruction cache hit rate {prefix['hit_rate']:.1%}, {prefix['tokens_saved_per_request']:.0f} "
+          f"tokens ({prefix['kb_saved_per_request']:.1f} KB) per request not resent")
+    print(f"  memory    peak {memory['peak_mb']:.1f} MB, retained {memory['retained_kb_per_request']:.1f} KB/request "
+          f"({memory['requests']} requests traced)")
+
+
+def print_tokens_saved(full: Dict, compact: Dict):
+    """Prompt tokens per request saved by the compact handoff, per stage and in total."""
+    before, after = full["model"]["prompt_tokens_by_stage"], compact["model"]["prompt_tokens_by_stage"]
+    rows = [(stage, tokens, after.get(stage, 0.0)) for stage, tokens in before.items()]
+    rows.append(("total", full["model"]["prompt_tokens_per_request"], compact["model"]["prompt_tokens_per_request"]))
+    print("\nCompact handoff (steady) vs full conversation (legacy_handoff), prompt tokens per request:")
+    for stage, was, now in rows:
+        saved = was - now
+        print(f"  {stage:22}{was:8.0f} -> {now:6.0f}   saved {saved:6.0f} ({saved / max(was, 1):.0%})")
+
+
+def print_first_token(buffered: Dict, streamed: Dict):
+    """What streaming the reply costs in throughput, and how much sooner streamed replies show text."""
+    first, tail = streamed["first_token"], streamed["streamed_tail"]
+    if not first.get("count"):
+        return
+    print("\nStreamed reply (streaming) vs buffered reply (steady):")
+    print(f"  throughput        {buffered['throughput_rps']:8.1f} -> {streamed['throughput_rps']:6.1f} req/s")
+    print(f"  text seen p50     {buffered['latency']['p50_ms']:8.0f} -> {first['p50_ms']:6.0f} ms "
+          f"(first token; the full reply p50 {streamed['latency']['p50_ms']:.0f} ms)")
+    if tail.get("count"):
+        print(f"  head start        p50 {tail['p50_ms']:.0f} ms  p99 {tail['p99_ms']:.0f} ms before the full reply, "
+              f"for the {tail['count'] / first['count']:.0%} of replies not served from the response cache")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=DEFAULT_SCENARIOS)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--memory-requests", type=int, default=100)
+    parser.add_argument("--model-latency-ms", type=float, default=50)
+    parser.add_argument("--latency-distribution", default="lognormal")
+    parser.add_argument("--latency-sigma", type=float, default=0.6)
+    parser.add_argument("--token-interval-ms", type=float, default=10,
+                        help="Model time per streamed chunk of reply text after the first")
+    parser.add_argument("--retry-time-scale", type=float, default=1.0,
+                        help="Scale the legacy scenarios' back-off sleeps (1.0 = the real delays)")
+    parser.add_argument("--quota-rps", type=float, default=30,
+                        help="Server-side model quota in the quota scenarios (calls per second)")
+    parser.add_argument("--model-concurrency", type=int, default=32,
+                        help="Maximum concurrent model calls through the shared gate")
+    parser.add_argument("--seed", type=int, default=13)
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, default=None,
+                        help=f"Write results as the new baseline (default path: {DEFAULT_BASELINE})")
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE, default=None,
+                        help="Compare against a baseline file and exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args()
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "settings": {key: value for key, value in vars(args).items()
+                         if key not in ("scenarios", "save_baseline", "compare", "tolerance")},
+        },
+        "scenarios": {},
+    }
+    for scenario in args.scenarios:
+        results["scenarios"][scenario] = run_scenario(scenario, args)
+        print_result(scenario, results["scenarios"][scenario])
+
+    scenarios = results["scenarios"]
+    if "legacy_handoff" in scenarios and "steady" in scenarios:
+        print_tokens_saved(scenarios["legacy_handoff"], scenarios["steady"])
+    if "streaming" in scenarios and "steady" in scenarios:
+        print_first_token(scenarios["steady"], scenarios["streaming"])
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("settings") != results["meta"]["settings"]:
+            print("note: baseline was recorded with different settings")
+        print(f"\nCompared with {args.compare} (tolerance {args.tolerance:.0%}):")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"Regressions: {', '.join(regressions)}")
+            sys.exit(1)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nBaseline written to {args.save_baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# Storage Benchmark: dict-of-lists vs the columnar in-memory store vs SQLite (WAL)
+# Run with: python -m benchmarks.bench_storage [--users N] [--logs-per-user N]
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.mood_table import MoodLogTable
+from utils.sqlite_store import SQLiteDatabase, SQLiteMoodLogStore
+
+PHASES = ["Menstrual", "Follicular", "Ovulation", "Luteal"]
+
+
+class ListStore:
+    """The original cycle_data_store["mood_logs"] list and its scan-filter-sort read."""
+
+    def __init__(self):
+        self.logs = []
+
+    def append(self, entry):
+        self.logs.append(entry)
+
+    def query(self, user_id, limit=30, cycle_phase=None, start=None, end=None, dates=None):
+        logs = [log for log in self.logs if log["user_id"] == user_id]
+        if cycle_phase:
+            logs = [log for log in logs if log["cycle_phase"].lower() == cycle_phase.lower()]
+        if start or end:
+            logs = [log for log in logs if (start or "") <= log["date"] <= (end or "9999")]
+        if dates is not None:
+            logs = [log for log in logs if log["date"] in dates]
+        return sorted(logs, key=lambda x: x["date"], reverse=True)[:limit]
+
+
+def make_logs(users: int, logs_per_user: int):
+    start = date(2024, 1, 1)
+    for day in range(logs_per_user):
+        for user in range(users):
+            yield {
+                "user_id": f"user_{user}",
+                "date": (start + timedelta(days=day)).isoformat(),
+                "cycle_phase": PHASES[(day // 7) % 4],
+                "mood": "calm",
+                "symptoms": ["cramps"],
+                "notes": "",
+                "logged_at": "2025-01-01T00:00:00",
+            }
+
+
+def bench(name, store, logs, users, reads):
+    started = time.perf_counter()
+    for log in logs:
+        store.append(log)
+    append_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for i in range(reads):
+        store.query(f"user_{i % users}", limit=30)
+        store.query(f"user_{i % users}", limit=30, cycle_phase="Luteal")
+    read_s = time.perf_counter() - started
+
+    # "All Luteal days in a 2-month window" and "the same cycle day across cycles"
+    last_day = max(log["date"] for log in logs[-users:])
+    window_end = date.fromisoformat(last_day) - timedelta(days=30)
+    window_start = window_end - timedelta(days=60)
+    cycle_days = [(window_end - timedelta(days=28 * back)).isoformat() for back in range(6)]
+    started = time.perf_counter()
+    for i in range(reads):
+        store.query(f"user_{i % users}", limit=1000, cycle_phase="Luteal",
+                    start=window_start.isoformat(), end=window_end.isoformat())
+        store.query(f"user_{i % users}", limit=1000, dates=cycle_days)
+    range_s = time.perf_counter() - started
+
+    print(f"{name:<14} append {len(logs) / append_s:>12,.0f} rows/s   "
+          f"latest {read_s / (2 * reads) * 1e6:>10,.1f} us/query   "
+          f"range/cycle day {range_s / (2 * reads) * 1e6:>10,.1f} us/query")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--logs-per-user", type=int, default=60)
+    parser.add_argument("--reads", type=int, default=200)
+    args = parser.parse_args()
+
+    logs = list(make_logs(args.users, args.logs_per_user))
+    print(f"{len(logs):,} logs across {args.users:,} users, {args.reads} reads per query type\n")
+
+    bench("dict-of-lists", ListStore(), logs, args.users, args.reads)
+    bench("columnar", MoodLogTable(), logs, args.users, args.reads)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = SQLiteDatabase(os.path.join(tmp, "bench.db"))
+        bench("sqlite-wal", SQLiteMoodLogStore(db), logs, args.users, args.reads)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
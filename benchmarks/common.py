@@ -0,0 +1,26 @@
+# Benchmark helpers shared by the benchmark scripts
+
+from typing import Dict, Sequence
+
+
+def percentile(sorted_samples: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of already sorted samples."""
+    if not sorted_samples:
+        return 0.0
+    rank = max(1, min(len(sorted_samples), round(pct / 100 * len(sorted_samples) + 0.5)))
+    return sorted_samples[rank - 1]
+
+
+def summarize_latencies(samples: Sequence[float]) -> Dict[str, float]:
+    """Mean and p50/p95/p99/max of latency samples, in milliseconds."""
+    ordered = sorted(samples)
+    if not ordered:
+        return {"count": 0}
+    return {
+        "count": len(ordered),
+        "mean_ms": sum(ordered) / len(ordered) * 1000,
+        "p50_ms": percentile(ordered, 50) * 1000,
+        "p95_ms": percentile(ordered, 95) * 1000,
+        "p99_ms": percentile(ordered, 99) * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
@@ -0,0 +1,85 @@
+# Load Test: Concurrent sessions through PipelineServer with the offline stub model
+# Run with: python -m benchmarks.load_test [--sessions N] [--messages N] [--concurrency N]
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from setup import InMemoryRunner
+from agents.root_agent import create_app, create_root_agent
+from benchmarks.common import summarize_latencies
+from pipeline.serving import PipelineServer
+from pipeline.stub_model import StubLlm
+from utils.telemetry import Telemetry
+
+MESSAGE = ("Hi, I'd like to track my cycle and mood. My last period started on 2025-11-18. "
+           "My average cycle length is 28 days. Right now I'm feeling anxious and tired.")
+
+
+async def run_load_test(sessions: int, messages: int, concurrency: int, max_queue: int,
+                        latency_s: float) -> dict:
+    collector = Telemetry(spans_file=None)
+    app = create_app(create_root_agent(StubLlm(latency_s=latency_s)), collector=collector)
+    runner = InMemoryRunner(app=app)
+    server = PipelineServer(runner, max_concurrency=concurrency, max_queue=max_queue, collector=collector)
+    latencies = []
+    order_violations = 0
+
+    async def session_client(index: int):
+        nonlocal order_violations
+        completed = []
+
+        async def one(turn: int):
+            started = time.perf_counter()
+            await server.submit(f"user_{index}", f"session_{index}", f"{MESSAGE} (turn {turn})")
+            latencies.append(time.perf_counter() - started)
+            completed.append(turn)
+
+        # Submit the whole session at once; the server must still run it in order
+        await asyncio.gather(*(one(turn) for turn in range(messages)))
+        order_violations += completed != sorted(completed)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(session_client(i) for i in range(sessions)))
+    elapsed = time.perf_counter() - started
+
+    requests = sessions * messages
+    return {
+        "requests": requests,
+        "elapsed_s": elapsed,
+        "throughput_rps": requests / elapsed,
+        "latency": summarize_latencies(latencies),
+        "order_violations": order_violations,
+        "server": server.stats(),
+        "spans": collector.report(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--messages", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--max-queue", type=int, default=256)
+    parser.add_argument("--model-latency-ms", type=float, default=20)
+    args = parser.parse_args()
+
+    result = asyncio.run(run_load_test(args.sessions, args.messages, args.concurrency,
+                                       args.max_queue, args.model_latency_ms / 1000))
+    latency = result["latency"]
+    print(f"{result['requests']:,} requests ({args.sessions} sessions x {args.messages} messages), "
+          f"concurrency {args.concurrency}, stub latency {args.model_latency_ms:.0f} ms per model call")
+    print(f"throughput  {result['throughput_rps']:8.1f} req/s")
+    print(f"latency     p50 {latency['p50_ms']:.0f} ms   p95 {latency['p95_ms']:.0f} ms   "
+          f"p99 {latency['p99_ms']:.0f} ms   max {latency['max_ms']:.0f} ms")
+    print(f"ordering    {result['order_violations']} sessions out of order")
+    print()
+    print(result["spans"])
+
+
+if __name__ == "__main__":
+    main()
@@ -5,9 +5,57 @@ load_dotenv()
 GOOGLE_API_KEY= os.getenv("GOOGLE_API_KEY")
 MODEL_NAME="gemini-2.5-flash-lite"
 AGENT_TEMPERATURE = 0.7
-RETRY_CONFIG=types.HttpRetryOptions(
-    attempts=5,  # Maximum retry attempts
-    exp_base=7,  # Delay multiplier
-    initial_delay=1,
-    http_status_codes=[429, 500, 503, 504], # Retry on these HTTP errors
-)
\ No newline at end of file
+# The Gemini client itself does not retry: pipeline/rate_limit.py retries every model call
+# with jittered backoff under one shared rate limit and per-request deadline
+RETRY_CONFIG=types.HttpRetryOptions(attempts=1)
+
+# Shared client-side limits for model calls across all agents
+# (15 RPM is the free-tier quota for gemini-2.5-flash-lite; raise it for paid tiers)
+MODEL_REQUESTS_PER_MINUTE = float(os.getenv("CYCLE_MODEL_RPM", "15"))
+MODEL_BURST = int(os.getenv("CYCLE_MODEL_BURST", "5"))
+MODEL_MAX_CONCURRENCY = int(os.getenv("CYCLE_MODEL_MAX_CONCURRENCY", "8"))
+MODEL_MIN_CONCURRENCY = int(os.getenv("CYCLE_MODEL_MIN_CONCURRENCY", "1"))
+RETRY_MAX_ATTEMPTS = int(os.getenv("CYCLE_RETRY_MAX_ATTEMPTS", "4"))
+RETRY_BASE_DELAY_SECONDS = float(os.getenv("CYCLE_RETRY_BASE_DELAY", "0.5"))
+RETRY_MAX_DELAY_SECONDS = float(os.getenv("CYCLE_RETRY_MAX_DELAY", "8"))
+REQUEST_DEADLINE_SECONDS = float(os.getenv("CYCLE_REQUEST_DEADLINE", "60"))
+
+# Storage backend for sessions, memory and cycle data: "memory" (lost on restart)
+# or "sqlite" (durable, single node, files under STORAGE_DIR)
+STORAGE_BACKEND = os.getenv("CYCLE_STORAGE_BACKEND", "memory")
+STORAGE_DIR = os.getenv("CYCLE_STORAGE_DIR", "data")
+
+# Response cache for the WellnessCoachAgent stage
+RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+
+# Logging: "queue" hands records to a background thread so file/console I/O never
+# blocks the event loop; "sync" writes from the calling thread
+LOG_MODE = os.getenv("CYCLE_LOG_MODE", "queue")
+LOG_FILE = os.getenv("CYCLE_LOG_FILE", "cycle_wellness_agent.log")
+LOG_MAX_BYTES = int(os.getenv("CYCLE_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv("CYCLE_LOG_BACKUP_COUNT", "3"))
+LOG_FLUSH_EVERY = int(os.getenv("CYCLE_LOG_FLUSH_EVERY", "64"))
+
+# Telemetry: per-stage/model/tool spans as JSON lines ("" disables the file)
+TELEMETRY_SPANS_FILE = os.getenv("CYCLE_SPANS_FILE", "cycle_wellness_spans.jsonl")
+
+# Prompt budgets: cap on the conversation tokens each agent sends per model call
+# (system instructions not included; 0 = no cap). Older turns go first, then long text is cut
+STAGE_TOKEN_BUDGETS = {
+    "IntakeAgent": int(os.getenv("CYCLE_INTAKE_TOKEN_BUDGET", "2000")),
+    "AnalysisAgent": int(os.getenv("CYCLE_ANALYSIS_TOKEN_BUDGET", "600")),
+    "WellnessCoachAgent": int(os.getenv("CYCLE_WELLNESS_TOKEN_BUDGET", "800")),
+    "WellnessWriterAgent": int(os.getenv("CYCLE_WRITER_TOKEN_BUDGET", "800")),
+}
+
+# Pipeline shape: "sequential" (intake -> analysis -> coach) or "dag" (intake, then
+# analysis and recommendations in parallel, then one writer call that merges them)
+PIPELINE_MODE = os.getenv("CYCLE_PIPELINE_MODE", "sequential")
+
+# Context caching of each agent's static instruction and tool declarations: "auto" uses a
+# Gemini cached content once the prefix reaches CONTEXT_CACHE_MIN_TOKENS (the API minimum)
+# and only measures the savings below it, "local" only measures, "off" disables
+CONTEXT_CACHE_MODE = os.getenv("CYCLE_CONTEXT_CACHE", "auto")
+CONTEXT_CACHE_TTL_SECONDS = int(os.getenv("CYCLE_CONTEXT_CACHE_TTL", "3600"))
+CONTEXT_CACHE_MIN_TOKENS = int(os.getenv("CYCLE_CONTEXT_CACHE_MIN_TOKENS", "2048"))
@@ -1,32 +1,31 @@
 # main.py - Cycle Wellness Agent Main Application
 import os
 import sys
-from setup import SequentialAgent, InMemoryRunner
+import time
+from setup import InMemoryRunner
 
-# Import all three agents
-from agents.intake_agent import intake_agent
-from agents.analysis_agent import analysis_agent
-from agents.wellness_agent import wellness_agent
+from agents.root_agent import create_app, create_pipeline
+from agents.writer_agent import writer_agent
+from pipeline.fast_path import run_fast_path
+from pipeline.streaming import ReplyStream
 
 from utils.logger import (
     log_pipeline_start, 
     log_pipeline_complete,
     log_agent_start,
-    log_agent_complete
+    log_agent_complete,
+    log_session_end
 )
+from utils.telemetry import telemetry
 
-# Create the Sequential Agent (root agent) that chains all 3 agents
-root_agent = SequentialAgent(
-    name="CycleWellnessPipeline",
-    sub_agents=[intake_agent, analysis_agent, wellness_agent],
-)
-
-print("✅ Sequential Agent created.")
+# Create the root agent that chains the stages (CYCLE_PIPELINE_MODE: sequential or dag)
+root_agent = create_pipeline()
 
-# Create the runner
-runner = InMemoryRunner(agent=root_agent)
+# Create the runner (the app records per-stage, model and tool spans)
+runner = InMemoryRunner(app=create_app(root_agent))
 
-print("✅ Runner created.")
+# Single-agent runner that words fully structured check-ins (fast path)
+writer_runner = InMemoryRunner(app=create_app(writer_agent, name="cycle_wellness_writer"))
 
 # Test the complete pipeline
 async def test_pipeline():
@@ -43,19 +42,36 @@ async def test_pipeline():
     
     # Log agent start
     log_agent_start("CycleWellnessPipeline", user_message)
+    started = time.perf_counter()
 
     try:
-        response = await runner.run_debug(user_message)
+        # Structured check-ins skip the 3-agent pipeline: tools run directly, one model call words it
+        fast_path = await run_fast_path(user_message, runner=writer_runner)
+        if fast_path is not None:
+            print(f"\n Agent Response:\n{fast_path['response']}\n")
+        else:
+            # Print the reply as the coach writes it
+            await runner.session_service.create_session(
+                app_name=runner.app_name, user_id="debug_user_id", session_id="debug_session_id"
+            )
+            print("\n Agent Response:")
+            reply = ReplyStream(runner, "debug_user_id", "debug_session_id", user_message)
+            async for text in reply:
+                print(text, end="", flush=True)
+            print(f"\n\n First token after {reply.first_token_ms or 0:.0f} ms, "
+                  f"full reply after {reply.total_ms:.0f} ms\n")
 
         # Log successful completion
         log_agent_complete("CycleWellnessPipeline", "final_response")
         log_pipeline_complete(success=True)
+        log_session_end("debug_session_id", time.perf_counter() - started)
         
-        print(f"\n Agent Response:\n{response}\n")
         print("="*50)
         print(" Pipeline test PASSED!")
         print("="*50)
         print("\n Check 'cycle_wellness_agent.log' for detailed logs")
+        print("\n Stage timings (spans in 'cycle_wellness_spans.jsonl'):")
+        print(telemetry.report())
 
     except Exception as e:
         log_pipeline_complete(success=False)
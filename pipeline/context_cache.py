@@ -0,0 +1,227 @@
+# Context Cache: Explicit caching of each agent's static prompt prefix (instruction + tool declarations)
+# Keyed by agent, model and a hash of the prefix, so editing an instruction invalidates its cache
+
+import asyncio
+import hashlib
+import os
+import sys
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.plugins.base_plugin import BasePlugin
+from google.genai import types
+
+from setup import Gemini
+from config import CONTEXT_CACHE_MIN_TOKENS, CONTEXT_CACHE_MODE, CONTEXT_CACHE_TTL_SECONDS
+from pipeline.handoff import estimate_text_tokens
+from utils.logger import logger
+
+CONTEXT_CACHE_MODES = ("auto", "local", "off")
+
+
+class CachedPrefix:
+    """
+    One agent's static prompt prefix, and the server-side cache holding it (if any).
+
+    Attributes:
+        digest: SHA-256 of the instruction and tool declarations
+        prefix_bytes: UTF-8 size of the prefix
+        prefix_tokens: Estimated tokens in the prefix
+        cache_name: Name of the server-side cached content (None: tracked locally only)
+        expires_at: Monotonic time the entry (and its server-side cache) expires
+    """
+
+    __slots__ = ("digest", "prefix_bytes", "prefix_tokens", "cache_name", "expires_at")
+
+    def __init__(self, digest: str, prefix_bytes: int, prefix_tokens: int, expires_at: float):
+        self.digest = digest
+        self.prefix_bytes = prefix_bytes
+        self.prefix_tokens = prefix_tokens
+        self.cache_name: Optional[str] = None
+        self.expires_at = expires_at
+
+
+def static_prefix(config: Optional[types.GenerateContentConfig]) -> str:
+    """The part of a request that is the same on every call of an agent: instruction and tool declarations."""
+    if config is None:
+        return ""
+    instruction = config.system_instruction or ""
+    if not isinstance(instruction, str):
+        instruction = str(instruction)
+    tools = "".join(tool.model_dump_json(exclude_none=True) for tool in config.tools or []
+                    if isinstance(tool, types.Tool))
+    return instruction + tools
+
+
+class InstructionCache:
+    """
+    Registry of static prompt prefixes per (agent, model).
+
+    "auto" mode creates a Gemini cached content for prefixes of at least `min_tokens`
+    and points requests at it instead of resending the prefix. Below that size, for
+    other models, or in "local" mode, the prefix is still sent and the cache only
+    measures what explicit caching would have saved.
+
+    Args:
+        mode: "auto", "local" or "off"
+        ttl_seconds: Lifetime of an entry and its server-side cache
+        min_tokens: Smallest prefix worth a server-side cache (the API rejects smaller ones)
+        clock: Monotonic time source (injectable for tests)
+    """
+
+    def __init__(self, mode: str = CONTEXT_CACHE_MODE, ttl_seconds: float = CONTEXT_CACHE_TTL_SECONDS,
+                 min_tokens: int = CONTEXT_CACHE_MIN_TOKENS, clock: Callable[[], float] = time.monotonic):
+        if mode not in CONTEXT_CACHE_MODES:
+            raise ValueError(f"Unknown context cache mode: {mode!r}")
+        self.mode = mode
+        self.ttl_seconds = ttl_seconds
+        self.min_tokens = min_tokens
+        self._clock = clock
+        self._entries: Dict[Tuple[str, str], CachedPrefix] = {}
+        self._creating: Dict[Tuple[str, str], asyncio.Future] = {}
+        self.clear()
+
+    async def apply(self, agent_name: str, llm_request, client=None) -> Optional[CachedPrefix]:
+        """
+        Look up (or register) the request's static prefix and use its cache.
+
+        Args:
+            agent_name: Agent making the request
+            llm_request: Request about to go to the model; rewritten to use the
+                server-side cache when there is one
+            client: google-genai client for server-side caches (None: local only)
+
+        Returns:
+            The cache entry, or None when caching is off or the request has no prefix
+        """
+        prefix = static_prefix(llm_request.config)
+        if self.mode == "off" or not prefix:
+            return None
+        key = (agent_name, llm_request.model or "")
+        digest = hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+        now = self._clock()
+
+        entry = self._entries.get(key)
+        if entry is not None and entry.digest != digest:
+            self.invalidations += 1
+            await self._drop(key, client)
+            entry = None
+        elif entry is not None and entry.expires_at <= now:
+            self.expirations += 1
+            self._entries.pop(key, None)
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            entry = CachedPrefix(digest, len(prefix.encode("utf-8")), estimate_text_tokens(prefix),
+                                 now + self.ttl_seconds)
+            self._entries[key] = entry
+            if self.mode == "auto" and client is not None and entry.prefix_tokens >= self.min_tokens:
+                await self._create_remote(key, entry, llm_request, client)
+        else:
+            self.hits += 1
+            self.bytes_saved += entry.prefix_bytes
+            self.tokens_saved += entry.prefix_tokens
+            if entry.cache_name is None and key in self._creating:
+                await self._creating[key]
+
+        if entry.cache_name:
+            # Cached content carries the instruction and tools; the API rejects them twice
+            llm_request.config.cached_content = entry.cache_name
+            llm_request.config.system_instruction = None
+            llm_request.config.tools = None
+            llm_request.config.tool_config = None
+        return entry
+
+    async def _create_remote(self, key, entry: CachedPrefix, llm_request, client):
+        config = llm_request.config
+        future = self._creating[key] = asyncio.get_running_loop().create_future()
+        try:
+            cached = await client.aio.caches.create(
+                model=llm_request.model,
+                config=types.CreateCachedContentConfig(
+                    display_name=f"{key[0]}-{entry.digest[:12]}",
+                    system_instruction=config.system_instruction,
+                    tools=config.tools,
+                    tool_config=config.tool_config,
+                    ttl=f"{int(self.ttl_seconds)}s",
+                ),
+            )
+            entry.cache_name = cached.name
+            self.remote_created += 1
+        except Exception as e:
+            # Keep the entry without a cache name so a failing API is not retried per request
+            self.remote_errors += 1
+            logger.warning("Context cache for %s not created, sending the full prompt: %s", key[0], e)
+        finally:
+            self._creating.pop(key, None)
+            future.set_result(None)
+
+    async def _drop(self, key, client):
+        entry = self._entries.pop(key, None)
+        if entry is not None and entry.cache_name and client is not None:
+            try:
+                await client.aio.caches.delete(name=entry.cache_name)
+            except Exception as e:
+                logger.warning("Stale context cache %s not deleted: %s", entry.cache_name, e)
+
+    def clear(self):
+        """Forget every entry (server-side caches expire on their own) and reset the metrics."""
+        self._entries.clear()
+        self.hits = self.misses = self.invalidations = self.expirations = 0
+        self.remote_created = self.remote_errors = 0
+        self.bytes_saved = self.tokens_saved = 0
+
+    def stats(self) -> Dict:
+        """Hit/miss metrics and the bytes/tokens of prefix that did not need resending."""
+        return {
+            "mode": self.mode,
+            "entries": len(self._entries),
+            "remote_entries": sum(1 for entry in self._entries.values() if entry.cache_name),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "expirations": self.expirations,
+            "remote_created": self.remote_created,
+            "remote_errors": self.remote_errors,
+            "bytes_saved": self.bytes_saved,
+            "tokens_saved": self.tokens_saved,
+        }
+
+
+def _gemini_client(agent):
+    """google-genai client of an agent's Gemini model (through its wrappers), or None for other models."""
+    model = getattr(agent, "canonical_model", None)
+    while hasattr(model, "inner"):
+        model = model.inner
+    return model.api_client if isinstance(model, Gemini) else None
+
+
+class ContextCachePlugin(BasePlugin):
+    """
+    Runner plugin that routes every model request's static prefix through an InstructionCache.
+
+    Args:
+        cache: Cache to use (default: the shared `instruction_cache`)
+    """
+
+    def __init__(self, cache: Optional[InstructionCache] = None, name: str = "context_cache"):
+        super().__init__(name=name)
+        self.cache = cache or instruction_cache
+        self._clients: Dict[str, object] = {}   # agent name -> Gemini client, noted as each agent starts
+
+    async def before_agent_callback(self, *, agent, callback_context):
+        if self.cache.mode == "auto":
+            self._clients[agent.name] = _gemini_client(agent)
+        return None
+
+    async def before_model_callback(self, *, callback_context, llm_request):
+        client = self._clients.get(callback_context.agent_name) if self.cache.mode == "auto" else None
+        await self.cache.apply(callback_context.agent_name, llm_request, client)
+        return None
+
+
+# Shared by all runners so each agent's prefix is cached once per process, not per session
+instruction_cache = InstructionCache()
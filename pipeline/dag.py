@@ -0,0 +1,67 @@
+# DAG Pipeline: Stages for the parallel pipeline mode
+# After intake, pattern analysis and recommendation lookup run side by side; the writer merges them
+
+import os
+import sys
+from typing import AsyncGenerator, Dict
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.agents import BaseAgent
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from pipeline.fast_path import CRISIS_RESOURCES
+from pipeline.handoff import HANDOFF_STATE_KEY, empty_handoff, enforce_stage_budget
+from tools.recommendation_generator import generate_recommendations
+
+# Session state key of the recommendations computed next to the analysis
+RECOMMENDATIONS_STATE_KEY = "recommendations"
+
+
+class RecommendationStage(BaseAgent):
+    """
+    Pipeline stage that looks up recommendations for the handoff's phase, mood and
+    symptoms with a direct tool call (no model call), so it can run next to the analysis.
+    """
+
+    async def _run_async_impl(self, ctx) -> AsyncGenerator[Event, None]:
+        handoff = ctx.session.state.get(HANDOFF_STATE_KEY) or empty_handoff()
+        if handoff.get("phase") and handoff.get("mood"):
+            recommendations = generate_recommendations(handoff["phase"], handoff["mood"], handoff.get("symptoms"))
+        else:
+            recommendations = {"status": "skipped", "recommendations": []}
+        yield Event(
+            author=self.name,
+            invocation_id=ctx.invocation_id,
+            branch=ctx.branch,
+            actions=EventActions(state_delta={RECOMMENDATIONS_STATE_KEY: recommendations}),
+        )
+
+
+def render_merged_checkin(state) -> str:
+    """The facts the writer words: handoff fields, history patterns and recommendations."""
+    handoff = state.get(HANDOFF_STATE_KEY) or empty_handoff()
+    recommendations: Dict = state.get(RECOMMENDATIONS_STATE_KEY) or {}
+    day = f" (day {handoff['day_in_cycle']})" if handoff.get("day_in_cycle") is not None else ""
+    lines = []
+    if handoff.get("crisis_flag"):
+        lines.append("Crisis resources (share first): " + "; ".join(CRISIS_RESOURCES))
+    lines += [
+        f"Cycle phase: {handoff.get('phase') or 'unknown'}{day}",
+        f"Mood: {handoff.get('mood') or 'not shared'}",
+        f"Symptoms: {', '.join(handoff.get('symptoms') or []) or 'none mentioned'}",
+        "History patterns: " + (", ".join(handoff.get("pattern_ids") or []) or "none yet (keep tracking)"),
+    ]
+    for rec in recommendations.get("recommendations", []):
+        lines.append(f"{rec['category']} - {rec['focus']}: {'; '.join(rec['suggestions'])}")
+    return "\n".join(lines)
+
+
+def apply_merged_handoff(callback_context, llm_request) -> None:
+    """before_model_callback for the DAG writer: send only the merged check-in, within the stage budget."""
+    llm_request.contents = [types.Content(role="user", parts=[
+        types.Part(text=render_merged_checkin(callback_context.state))
+    ])]
+    enforce_stage_budget(callback_context, llm_request)
+    return None
@@ -0,0 +1,194 @@
+# Fast Path: Deterministic handling of fully structured check-ins
+# Skips the three-agent pipeline when the message already has everything the tools need
+
+import os
+import re
+import sys
+from typing import Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.genai import types
+
+from tools.cycle_calculator import calculate_cycle_phase
+from tools.recommendation_generator import generate_recommendations
+from utils import clock, memory_manager
+from utils.memory_manager import USER_ID
+
+# Moods the tools know about, and the ways users usually name symptoms
+MOOD_WORDS = ("anxious", "sad", "tired", "irritable", "overwhelmed", "depressed", "angry",
+              "happy", "energetic", "calm", "content", "peaceful", "stressed", "exhausted")
+SYMPTOM_ALIASES = {
+    "cramps": "cramps", "cramping": "cramps",
+    "headache": "headache", "headaches": "headache", "migraine": "headache",
+    "fatigue": "fatigue", "fatigued": "fatigue",
+    "bloating": "bloating", "bloated": "bloating",
+    "breast tenderness": "breast_tenderness", "tender breasts": "breast_tenderness",
+    "acne": "acne", "breakout": "acne", "breakouts": "acne",
+}
+CRISIS_PHRASES = ("suicid", "kill myself", "end my life", "self-harm", "self harm", "hurt myself",
+                  "don't want to live", "dont want to live", "no reason to live", "severe depression")
+# Shared first by every reply to a crisis, whichever pipeline writes it
+CRISIS_RESOURCES = (
+    "National Suicide Prevention Lifeline: 988",
+    "Crisis Text Line: Text HOME to 741741",
+    "International Association for Suicide Prevention: https://www.iasp.info/resources/Crisis_Centres/",
+)
+
+DATE_PATTERN = re.compile(r"\b(\d{4}-\d{2}-\d{2})\b")
+CYCLE_LENGTH_PATTERNS = (
+    re.compile(r"cycle(?:\s+length)?(?:\s+is)?(?:\s+(?:about|around|usually|roughly))?\s*(?:of\s+)?(\d{2})\s*-?\s*days?", re.I),
+    re.compile(r"\b(\d{2})\s*-?\s*days?\s+cycle", re.I),
+)
+MOOD_PATTERN = re.compile(r"\b(" + "|".join(MOOD_WORDS) + r")\b", re.I)
+SYMPTOM_PATTERN = re.compile(r"\b(" + "|".join(sorted(SYMPTOM_ALIASES, key=len, reverse=True)) + r")\b", re.I)
+NEGATION_PATTERN = re.compile(r"\b(?:no|not|without)\s+(?:\w+\s+)?$", re.I)
+
+
+def has_crisis_signal(text: str) -> bool:
+    """True if the text mentions self-harm, suicidal thoughts or severe depression."""
+    text = text.lower()
+    return any(phrase in text for phrase in CRISIS_PHRASES)
+
+
+def extract_symptoms(text: str) -> List[str]:
+    """Canonical symptom names mentioned in the text, skipping negated ones ("no cramps")."""
+    symptoms: List[str] = []
+    for match in SYMPTOM_PATTERN.finditer(text):
+        if NEGATION_PATTERN.search(text[:match.start()][-20:]):
+            continue
+        symptom = SYMPTOM_ALIASES[match.group(1).lower()]
+        if symptom not in symptoms:
+            symptoms.append(symptom)
+    return symptoms
+
+
+def extract_checkin(message: str) -> Optional[Dict]:
+    """
+    Extract a structured check-in from a user message.
+
+    Args:
+        message: Free-text user message
+
+    Returns:
+        Dictionary with last_period_date, cycle_length, mood, symptoms and crisis,
+        or None when the date, cycle length or mood is missing
+    """
+    date_match = DATE_PATTERN.search(message)
+    length_match = next((m for m in (p.search(message) for p in CYCLE_LENGTH_PATTERNS) if m), None)
+    mood_match = MOOD_PATTERN.search(message)
+    if not (date_match and length_match and mood_match):
+        return None
+
+    cycle_length = int(length_match.group(1))
+    if not 15 <= cycle_length <= 60:
+        return None
+
+    return {
+        "last_period_date": date_match.group(1),
+        "cycle_length": cycle_length,
+        "mood": mood_match.group(1).lower(),
+        "symptoms": extract_symptoms(message),
+        "crisis": has_crisis_signal(message),
+    }
+
+
+def build_checkin_summary(checkin: Dict, cycle: Dict, patterns: Dict, recommendations: Dict) -> str:
+    """Render the pre-computed check-in as the facts handed to the writer agent."""
+    lines = [
+        f"Cycle phase: {cycle['current_phase']} (day {cycle['day_in_cycle']} of {cycle['cycle_length']})",
+        f"Phase meaning: {cycle['phase_description']}",
+        f"Mood: {checkin['mood']}",
+        f"Symptoms: {', '.join(checkin['symptoms']) or 'none mentioned'}",
+    ]
+    insights = [p["insight"] for p in patterns.get("patterns_found", [])]
+    lines.append("History patterns: " + (" ".join(insights) if insights else "none yet (keep tracking)"))
+    for rec in recommendations.get("recommendations", []):
+        lines.append(f"{rec['category']} - {rec['focus']}: {'; '.join(rec['suggestions'])}")
+    return "\n".join(lines)
+
+
+def render_template_response(checkin: Dict, cycle: Dict, recommendations: Dict) -> str:
+    """Deterministic coach response used when no model call is wanted (or the call fails)."""
+    lines = [
+        f"Thanks for checking in! You're on day {cycle['day_in_cycle']} of your cycle, in your "
+        f"{cycle['current_phase']} phase, and feeling {checkin['mood']}. {cycle['phase_description']}",
+        "",
+        "A few things that may help right now:",
+    ]
+    for rec in recommendations.get("recommendations", []):
+        lines.extend(f"- {suggestion}" for suggestion in rec["suggestions"][:2])
+    lines.extend(["", recommendations.get("encouragement", ""), recommendations.get("note", "")])
+    return "\n".join(lines).strip()
+
+
+async def run_fast_path(message: str, user_id: str = USER_ID, runner=None,
+                        session_id: str = "fast_path", record: bool = True) -> Optional[Dict]:
+    """
+    Handle a fully structured check-in with direct tool calls and at most one model call.
+
+    Args:
+        message: User message
+        user_id: User identifier
+        runner: Runner for the writer agent; None renders a template response with no model call
+        session_id: Session used for the writer agent
+        record: Store the cycle info and mood log in memory
+
+    Returns:
+        Dictionary with response, cycle, patterns, recommendations and llm_calls,
+        or None when the message is not fully structured (use the full pipeline)
+    """
+    checkin = extract_checkin(message)
+    if checkin is None or checkin["crisis"]:
+        # Crisis messages always get the full pipeline and its crisis resources
+        return None
+
+    cycle = calculate_cycle_phase(checkin["last_period_date"], checkin["cycle_length"])
+    if "error" in cycle:
+        return None
+
+    if record:
+        memory_manager.store_cycle_info(checkin["last_period_date"], checkin["cycle_length"], user_id=user_id)
+        memory_manager.add_mood_log(clock.today().isoformat(), cycle["current_phase"], checkin["mood"],
+                                    checkin["symptoms"], user_id=user_id)
+    patterns = memory_manager.get_mood_patterns(user_id)
+    recommendations = generate_recommendations(cycle["current_phase"], checkin["mood"], checkin["symptoms"])
+
+    response = None
+    llm_calls = 0
+    if runner is not None:
+        llm_calls = 1
+        try:
+            response = await _generate_text(runner, build_checkin_summary(checkin, cycle, patterns, recommendations),
+                                            user_id, session_id)
+        except Exception as e:
+            print(f" Fast path writer failed, using template response: {e}")
+    if not response:
+        response = render_template_response(checkin, cycle, recommendations)
+
+    return {
+        "response": response,
+        "checkin": checkin,
+        "cycle": cycle,
+        "patterns": patterns,
+        "recommendations": recommendations,
+        "llm_calls": llm_calls,
+    }
+
+
+async def _generate_text(runner, prompt: str, user_id: str, session_id: str) -> Optional[str]:
+    """Send one message through a runner and return the final response text."""
+    session = await runner.session_service.get_session(
+        app_name=runner.app_name, user_id=user_id, session_id=session_id
+    )
+    if session is None:
+        session = await runner.session_service.create_session(
+            app_name=runner.app_name, user_id=user_id, session_id=session_id
+        )
+
+    text = None
+    content = types.Content(role="user", parts=[types.Part(text=prompt)])
+    async for event in runner.run_async(user_id=user_id, session_id=session.id, new_message=content):
+        if event.is_final_response() and event.content and event.content.parts:
+            text = event.content.parts[0].text or text
+    return text
@@ -0,0 +1,227 @@
+# Handoff: Compact structured state passed between pipeline stages, and per-stage prompt budgets
+# AnalysisAgent and WellnessCoachAgent read a small check-in record instead of the previous stage's prose
+
+import json
+import os
+import re
+import sys
+from typing import Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.genai import types
+
+from config import STAGE_TOKEN_BUDGETS
+from pipeline.fast_path import CRISIS_PHRASES, MOOD_PATTERN, extract_symptoms, has_crisis_signal
+
+# Session state key of the handoff record, and the fields it carries
+HANDOFF_STATE_KEY = "handoff"
+HANDOFF_FIELDS = ("phase", "day_in_cycle", "mood", "symptoms", "crisis_flag", "pattern_ids")
+
+CHARS_PER_TOKEN = 4
+# Text parts are never cut below this many characters when enforcing a budget
+MIN_TRIMMED_CHARS = 200
+TRIM_MARKER = " [...]"
+
+# The AnalysisAgent ends its report with "CRISIS: yes" or "CRISIS: no"
+CRISIS_FIELD_PATTERN = re.compile(r"^\W*CRISIS\W*:\W*(yes|no)\b", re.I | re.M)
+# A negation earlier in the same clause, as in "no signs of severe depression"
+CLAUSE_NEGATION_PATTERN = re.compile(r"\b(?:no|not|without|denies|denied|never|nor)\b[^.,;:!?\n]{0,40}$", re.I)
+
+
+def empty_handoff() -> Dict:
+    return {"phase": None, "day_in_cycle": None, "mood": None, "symptoms": [], "crisis_flag": False,
+            "pattern_ids": []}
+
+
+def pattern_id(pattern: Dict) -> str:
+    """Short stable id for a pattern from the pattern analyzer, e.g. "phase_mood:Luteal:anxious"."""
+    kind = pattern.get("type")
+    if kind == "phase_mood_correlation":
+        return f"phase_mood:{pattern.get('phase')}:{pattern.get('mood')}"
+    if kind == "symptom_pattern":
+        return f"symptom:{pattern.get('symptom')}"
+    if kind == "overall_trend":
+        return f"trend:{pattern.get('trend')}"
+    return str(kind)
+
+
+def render_handoff(handoff: Dict) -> str:
+    """The handoff as one line of compact JSON, as the model sees it."""
+    return json.dumps({field: handoff.get(field) for field in HANDOFF_FIELDS}, separators=(",", ":"))
+
+
+def estimate_text_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN
+
+
+def estimate_content_tokens(contents: List[types.Content]) -> int:
+    """Rough size of request contents in tokens (about 4 characters per token)."""
+    chars = 0
+    for content in contents:
+        for part in content.parts or []:
+            if part.text:
+                chars += len(part.text)
+            elif part.function_call or part.function_response:
+                chars += len(str(part.function_call or part.function_response))
+    return chars // CHARS_PER_TOKEN
+
+
+def report_has_crisis(report: str) -> bool:
+    """
+    True if an analysis report flags a crisis.
+
+    The report's explicit CRISIS field decides when present. Without one, a crisis
+    phrase counts unless it is negated in its own clause ("no signs of self-harm").
+    """
+    field = CRISIS_FIELD_PATTERN.search(report)
+    if field:
+        return field.group(1).lower() == "yes"
+    text = report.lower()
+    for phrase in CRISIS_PHRASES:
+        start = text.find(phrase)
+        while start != -1:
+            if not CLAUSE_NEGATION_PATTERN.search(text[max(0, start - 60):start]):
+                return True
+            start = text.find(phrase, start + 1)
+    return False
+
+
+def trim_contents(contents: List[types.Content], budget_tokens: int) -> List[types.Content]:
+    """
+    Fit request contents into a token budget.
+
+    Whole contents before the current turn (the last user text, and the tool calls
+    after it) are dropped oldest first; if that is not enough, the longest text parts
+    are shortened. Tool calls and results of the current turn are never cut.
+
+    Args:
+        contents: Request contents, oldest first
+        budget_tokens: Token budget for the contents (0 or less: no budget)
+
+    Returns:
+        The contents that fit (a new list; trimmed parts are new Part objects)
+    """
+    if budget_tokens <= 0 or estimate_content_tokens(contents) <= budget_tokens:
+        return contents
+
+    turn_start = 0
+    for index in range(len(contents) - 1, -1, -1):
+        content = contents[index]
+        if content.role == "user" and any(part.text for part in content.parts or []):
+            turn_start = index
+            break
+    history, turn = list(contents[:turn_start]), list(contents[turn_start:])
+
+    excess = estimate_content_tokens(history + turn) - budget_tokens
+    while history and excess > 0:
+        excess -= estimate_content_tokens([history.pop(0)])
+    # Never leave a tool result whose call was dropped
+    while history and all(part.function_response for part in history[0].parts or []):
+        history.pop(0)
+    kept = history + turn
+    excess = estimate_content_tokens(kept) - budget_tokens
+    if excess <= 0:
+        return kept
+
+    texts = sorted(((len(part.text), c, p) for c, content in enumerate(kept)
+                    for p, part in enumerate(content.parts or []) if part.text), reverse=True)
+    for length, c, p in texts:
+        if excess <= 0:
+            break
+        cut = min(excess * CHARS_PER_TOKEN, length - MIN_TRIMMED_CHARS)
+        if cut <= len(TRIM_MARKER):
+            continue
+        content = kept[c]
+        parts = list(content.parts)
+        parts[p] = types.Part(text=parts[p].text[:length - cut] + TRIM_MARKER)
+        kept[c] = types.Content(role=content.role, parts=parts)
+        excess -= (cut - len(TRIM_MARKER)) // CHARS_PER_TOKEN
+    return kept
+
+
+# ====== ADK CALLBACKS ======
+
+def record_handoff_tool_result(tool, args: dict, tool_context, tool_response: dict) -> Optional[dict]:
+    """after_tool_callback: copy the phase and pattern ids from tool results into the handoff."""
+    if not isinstance(tool_response, dict):
+        return None
+    update = {}
+    if tool.name == "calculate_cycle_phase" and tool_response.get("current_phase"):
+        update = {"phase": tool_response["current_phase"], "day_in_cycle": tool_response.get("day_in_cycle")}
+    elif tool.name == "analyze_mood_patterns":
+        update = {"pattern_ids": [pattern_id(p) for p in tool_response.get("patterns_found", [])]}
+    if update:
+        _update_handoff(tool_context.state, update)
+    return None
+
+
+def start_turn_handoff(callback_context) -> Optional[types.Content]:
+    """
+    before_agent_callback for IntakeAgent: start the turn's handoff from empty_handoff().
+
+    Every field describes the current check-in, so nothing carries over from an earlier
+    turn; the stages of this turn then fill it in.
+    """
+    callback_context.state[HANDOFF_STATE_KEY] = empty_handoff()
+    return None
+
+
+def record_intake_handoff(callback_context) -> Optional[types.Content]:
+    """after_agent_callback for IntakeAgent: add mood, symptoms and crisis flag to the handoff."""
+    state = callback_context.state
+    user_text = _content_text(callback_context.user_content)
+    intake_text = str(state.get("intake_data") or "")
+    mood_match = MOOD_PATTERN.search(user_text) or MOOD_PATTERN.search(intake_text)
+    _update_handoff(state, {
+        "mood": mood_match.group(1).lower() if mood_match else None,
+        "symptoms": extract_symptoms(user_text) or extract_symptoms(intake_text),
+        "crisis_flag": has_crisis_signal(user_text) or has_crisis_signal(intake_text),
+    })
+    return None
+
+
+def record_analysis_handoff(callback_context) -> Optional[types.Content]:
+    """after_agent_callback for AnalysisAgent: raise the crisis flag if the analysis flags a crisis."""
+    state = callback_context.state
+    if report_has_crisis(str(state.get("analysis_report") or "")):
+        _update_handoff(state, {"crisis_flag": True})
+    return None
+
+
+def apply_compact_handoff(callback_context, llm_request) -> None:
+    """
+    before_model_callback for the stages after IntakeAgent: replace the previous
+    stage's relayed reply with the handoff record, then apply the stage budget.
+
+    The agent's own tool calls and results of this turn are kept as they are.
+    """
+    contents = llm_request.contents
+    own = len(contents)
+    while own > 0 and all(part.function_call or part.function_response for part in contents[own - 1].parts or []):
+        own -= 1
+    handoff = callback_context.state.get(HANDOFF_STATE_KEY) or empty_handoff()
+    llm_request.contents = [types.Content(role="user", parts=[
+        types.Part(text=f"Check-in handoff (JSON): {render_handoff(handoff)}")
+    ])] + list(contents[own:])
+    enforce_stage_budget(callback_context, llm_request)
+    return None
+
+
+def enforce_stage_budget(callback_context, llm_request) -> None:
+    """before_model_callback: trim the request contents to the stage's STAGE_TOKEN_BUDGETS entry."""
+    budget = STAGE_TOKEN_BUDGETS.get(callback_context.agent_name, 0)
+    llm_request.contents = trim_contents(llm_request.contents, budget)
+    return None
+
+
+def _update_handoff(state, update: Dict):
+    # Merges within the turn (see start_turn_handoff). Assign a new dict: in-place
+    # changes to a state value are not persisted
+    state[HANDOFF_STATE_KEY] = {**(state.get(HANDOFF_STATE_KEY) or empty_handoff()), **update}
+
+
+def _content_text(content: Optional[types.Content]) -> str:
+    if content is None or not content.parts:
+        return ""
+    return " ".join(part.text for part in content.parts if part.text)
@@ -0,0 +1,341 @@
+# Rate Limit: Shared client-side admission control and retries for model calls
+# One token bucket and one adaptive (AIMD) concurrency limit for all agents, plus
+# jittered retries bounded by a per-request deadline
+
+import asyncio
+import contextvars
+import os
+import random
+import sys
+import time
+from collections import deque
+from typing import AsyncGenerator, Deque, Dict, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+from google.genai import errors
+
+from setup import Gemini, MODEL_NAME, RETRY_CONFIG
+from config import (MODEL_BURST, MODEL_MAX_CONCURRENCY, MODEL_MIN_CONCURRENCY, MODEL_REQUESTS_PER_MINUTE,
+                    REQUEST_DEADLINE_SECONDS, RETRY_BASE_DELAY_SECONDS, RETRY_MAX_ATTEMPTS,
+                    RETRY_MAX_DELAY_SECONDS)
+from utils.telemetry import note_model_queue_wait, note_model_retry
+
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+# Status codes that mean "too much load": they also shrink the concurrency limit
+OVERLOAD_STATUS_CODES = frozenset({429, 503})
+
+# Monotonic start time of the pipeline request the current model call belongs to
+_request_started: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+    "request_started", default=None
+)
+
+
+class DeadlineExceededError(Exception):
+    """Raised when a model call cannot be admitted or retried before its request's deadline."""
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter for one event loop (GCRA form: O(1), first come first served).
+
+    Args:
+        rate_per_s: Sustained rate in calls per second (math.inf for no limit)
+        burst: Calls that may start back to back after an idle period
+    """
+
+    def __init__(self, rate_per_s: float, burst: int = 1):
+        self.rate_per_s = rate_per_s
+        self.burst = max(1, burst)
+        self._tat = 0.0  # theoretical arrival time of the next call
+
+    def reserve(self, deadline: Optional[float] = None) -> Optional[float]:
+        """
+        Reserve the next call slot.
+
+        Returns:
+            Seconds to wait before the call may start, or None (nothing reserved) if that
+            would pass `deadline`
+        """
+        if self.rate_per_s == float("inf"):
+            return 0.0
+        interval = 1.0 / self.rate_per_s
+        now = time.monotonic()
+        tat = max(self._tat, now)
+        wait = max(0.0, tat - (self.burst - 1) * interval - now)
+        if deadline is not None and now + wait > deadline:
+            return None
+        self._tat = tat + interval
+        return wait
+
+    async def acquire(self, deadline: Optional[float] = None) -> float:
+        """Wait for a call slot and return the seconds waited."""
+        wait = self.reserve(deadline)
+        if wait is None:
+            raise DeadlineExceededError("Rate limit wait would pass the request deadline")
+        if wait:
+            await asyncio.sleep(wait)
+        return wait
+
+
+class AimdLimiter:
+    """
+    Concurrency limit that grows additively on success and shrinks multiplicatively on overload.
+
+    The limit rises by `increase` per `limit` successful calls (about one step per round of
+    calls) and is multiplied by `decrease` on a 429/503, at most once per `cooldown_s` so one
+    burst of errors counts as one congestion signal.
+
+    Args:
+        initial: Starting limit
+        min_limit: Lowest limit (at least one call can always run)
+        max_limit: Highest limit
+        increase: Additive step per round of successes
+        decrease: Multiplier on overload
+        cooldown_s: Minimum seconds between two decreases
+    """
+
+    def __init__(self, initial: int, min_limit: int = 1, max_limit: int = 64, increase: float = 1.0,
+                 decrease: float = 0.5, cooldown_s: float = 1.0):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown_s = cooldown_s
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._last_decrease = -float("inf")
+
+    async def acquire(self, deadline: Optional[float] = None) -> float:
+        """Wait for a slot and return the seconds waited."""
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return 0.0
+
+        started = time.monotonic()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            if deadline is None:
+                await waiter
+            else:
+                await asyncio.wait_for(waiter, max(0.0, deadline - started))
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the wait ended: give it back
+                self.release()
+            else:
+                waiter.cancel()
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+            if isinstance(e, asyncio.TimeoutError):
+                raise DeadlineExceededError("Concurrency limit wait would pass the request deadline") from None
+            raise
+        return time.monotonic() - started
+
+    def release(self):
+        self.in_flight -= 1
+        self._wake()
+
+    def on_success(self):
+        self.limit = min(self.max_limit, self.limit + self.increase / self.limit)
+        self._wake()
+
+    def on_overload(self):
+        now = time.monotonic()
+        if now - self._last_decrease >= self.cooldown_s:
+            self.limit = max(self.min_limit, self.limit * self.decrease)
+            self._last_decrease = now
+
+    def _wake(self):
+        # Slots are handed straight to waiters (in order) so late arrivals cannot jump the queue
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+
+class RetryPolicy:
+    """
+    Capped exponential backoff with full jitter: attempt n sleeps uniform(0, min(max, base * 2^(n-1))).
+
+    Args:
+        max_attempts: Attempts per model call, including the first
+        base_delay_s: Backoff scale
+        max_delay_s: Cap on a single sleep
+        deadline_s: Total time budget of one pipeline request, across all its model calls
+    """
+
+    def __init__(self, max_attempts: int = RETRY_MAX_ATTEMPTS, base_delay_s: float = RETRY_BASE_DELAY_SECONDS,
+                 max_delay_s: float = RETRY_MAX_DELAY_SECONDS, deadline_s: float = REQUEST_DEADLINE_SECONDS,
+                 rng: Optional[random.Random] = None):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay_s = base_delay_s
+        self.max_delay_s = max_delay_s
+        self.deadline_s = deadline_s
+        self._rng = rng or random.Random()
+
+    def backoff(self, attempt: int) -> float:
+        return self._rng.uniform(0, min(self.max_delay_s, self.base_delay_s * 2 ** (attempt - 1)))
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    if isinstance(error, errors.APIError):
+        return error.code
+    if isinstance(error, asyncio.TimeoutError):
+        return 408
+    return None
+
+
+class ModelGate:
+    """
+    Admission control shared by every model call: AIMD concurrency slot, then a token-bucket slot.
+
+    Args:
+        rate_per_s: Sustained model calls per second across all agents
+        burst: Token-bucket burst
+        initial_concurrency: Starting AIMD limit
+        min_concurrency: Lowest AIMD limit
+        max_concurrency: Highest AIMD limit
+        retry_policy: Backoff and deadline settings
+    """
+
+    def __init__(self, rate_per_s: float = MODEL_REQUESTS_PER_MINUTE / 60, burst: int = MODEL_BURST,
+                 initial_concurrency: int = MODEL_MAX_CONCURRENCY, min_concurrency: int = MODEL_MIN_CONCURRENCY,
+                 max_concurrency: int = MODEL_MAX_CONCURRENCY, retry_policy: Optional[RetryPolicy] = None):
+        self.bucket = TokenBucket(rate_per_s, burst)
+        self.concurrency = AimdLimiter(initial_concurrency, min_concurrency, max_concurrency)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.attempts = 0
+        self.retries = 0
+        self.failures = 0
+        self.overloads = 0
+        self.deadline_exceeded = 0
+
+    async def acquire(self, deadline: Optional[float]) -> float:
+        """Take a concurrency slot and a rate slot; returns seconds waited. Call release() afterwards."""
+        waited = await self.concurrency.acquire(deadline)
+        try:
+            waited += await self.bucket.acquire(deadline)
+        except BaseException:
+            self.concurrency.release()
+            raise
+        return waited
+
+    def release(self):
+        self.concurrency.release()
+
+    def stats(self) -> Dict:
+        return {
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "failures": self.failures,
+            "overloads": self.overloads,
+            "deadline_exceeded": self.deadline_exceeded,
+            "concurrency_limit": round(self.concurrency.limit, 2),
+            "in_flight": self.concurrency.in_flight,
+        }
+
+
+class GuardedLlm(BaseLlm):
+    """
+    Wraps a model so every call goes through a shared ModelGate, with jittered retries.
+
+    Retries stop at `retry_policy.max_attempts`, at `retry_policy.deadline_s` after the
+    pipeline run started (per call without RequestDeadlinePlugin), and once a streamed
+    response has started. The wrapped model should not retry on its own (see config.RETRY_CONFIG).
+
+    Attributes:
+        inner: The wrapped model (e.g. Gemini or StubLlm)
+        gate: Gate shared by all agents (default: the module's `model_gate`)
+    """
+
+    inner: BaseLlm
+    gate: Optional[ModelGate] = None
+
+    def model_post_init(self, __context):
+        super().model_post_init(__context)
+        self.gate = self.gate or model_gate
+
+    @classmethod
+    def wrap(cls, inner: BaseLlm, gate: Optional[ModelGate] = None) -> "GuardedLlm":
+        return cls(model=inner.model, inner=inner, gate=gate)
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        gate = self.gate
+        policy = gate.retry_policy
+        deadline = (_request_started.get() or time.monotonic()) + policy.deadline_s
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                note_model_queue_wait(await gate.acquire(deadline))
+            except DeadlineExceededError:
+                gate.deadline_exceeded += 1
+                gate.failures += 1
+                raise
+            gate.attempts += 1
+            started_output = False
+            try:
+                async for response in self.inner.generate_content_async(llm_request, stream):
+                    started_output = True
+                    yield response
+                gate.concurrency.on_success()
+                return
+            except Exception as e:
+                code = _status_code(e)
+                if code in OVERLOAD_STATUS_CODES:
+                    gate.overloads += 1
+                    gate.concurrency.on_overload()
+                delay = None
+                if not started_output and code in RETRYABLE_STATUS_CODES and attempt < policy.max_attempts:
+                    delay = policy.backoff(attempt)
+                    if time.monotonic() + delay >= deadline:
+                        gate.deadline_exceeded += 1
+                        delay = None
+                if delay is None:
+                    gate.failures += 1
+                    raise
+            finally:
+                gate.release()
+            gate.retries += 1
+            note_model_retry()
+            await asyncio.sleep(delay)
+
+
+class RequestDeadlinePlugin(BasePlugin):
+    """Runner plugin that starts the retry deadline clock when a run starts, not at each model call."""
+
+    def __init__(self, name: str = "request_deadline"):
+        super().__init__(name=name)
+        self._started: Dict[str, float] = {}
+
+    async def before_run_callback(self, *, invocation_context):
+        self._started[invocation_context.invocation_id] = time.monotonic()
+
+    async def before_model_callback(self, *, callback_context, llm_request):
+        started = self._started.get(callback_context.invocation_id)
+        if started is not None:
+            _request_started.set(started)
+
+    async def after_run_callback(self, *, invocation_context):
+        self._started.pop(invocation_context.invocation_id, None)
+
+
+def create_gemini_model(gate: Optional[ModelGate] = None) -> GuardedLlm:
+    """The configured Gemini model behind the shared gate."""
+    return GuardedLlm.wrap(Gemini(model=MODEL_NAME, retry_options=RETRY_CONFIG), gate)
+
+
+# Shared by all agents so the whole pipeline stays within one quota
+model_gate = ModelGate()
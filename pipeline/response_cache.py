@@ -0,0 +1,155 @@
+# Response Cache: Semantic cache in front of the WellnessCoachAgent stage
+# The coach only sees the handoff record, so check-ins with identical records share one generation
+
+import os
+import sys
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.genai import types
+
+from config import RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL_SECONDS
+from pipeline.fast_path import has_crisis_signal
+from pipeline.handoff import HANDOFF_STATE_KEY
+
+# Session state key used by the cache callbacks
+CACHE_KEY_STATE_KEY = "temp:response_cache_key"
+
+
+def make_cache_key(phase: str, mood: str, symptoms: Iterable[str], day_in_cycle: Optional[int] = None,
+                   pattern_ids: Iterable[str] = ()) -> str:
+    """
+    Normalized cache key: case, whitespace, order and duplicate symptoms don't matter.
+
+    The day in cycle and the user's pattern ids are part of the key because the reply
+    mentions them, so a reply is only shared between check-ins that read the same.
+    """
+    normalized = sorted({s.strip().lower().replace(" ", "_") for s in symptoms if s.strip()})
+    day = "" if day_in_cycle is None else str(day_in_cycle)
+    patterns = ",".join(sorted(set(pattern_ids)))
+    return f"{phase.strip().lower()}|{day}|{mood.strip().lower()}|{','.join(normalized)}|{patterns}"
+
+
+class ResponseCache:
+    """
+    LRU cache with a time-to-live and hit/miss metrics.
+
+    Args:
+        max_entries: Entries kept before the least recently used one is evicted
+        ttl_seconds: Seconds an entry stays valid
+        clock: Monotonic time source (injectable for tests)
+    """
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES,
+                 ttl_seconds: float = RESPONSE_CACHE_TTL_SECONDS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for a key, or None (counted as a miss)."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > self._clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+            self.expirations += 1
+        self.misses += 1
+        return None
+
+    def put(self, key: str, value: str):
+        """Store a response, evicting the least recently used entry when full."""
+        self._entries[key] = (self._clock() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def record_bypass(self):
+        """Count a request that skipped the cache (crisis flag or missing key fields)."""
+        self.bypasses += 1
+
+    def clear(self):
+        """Drop every entry and reset the metrics."""
+        self._entries.clear()
+        self.hits = self.misses = self.bypasses = self.evictions = self.expirations = 0
+
+    def stats(self) -> Dict:
+        """Hit/miss metrics for monitoring."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypasses": self.bypasses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+# Shared cache for the WellnessCoachAgent stage
+wellness_response_cache = ResponseCache()
+
+
+# ====== ADK CALLBACKS ======
+
+def check_wellness_cache(callback_context) -> Optional[types.Content]:
+    """
+    before_agent_callback for the coach stages that read only the handoff record:
+    serve a cached response when possible.
+
+    The key is the whole record (see make_cache_key), so a cached reply never carries
+    anything another user's check-in did not also say.
+    """
+    state = callback_context.state
+    handoff = state.get(HANDOFF_STATE_KEY) or {}
+
+    # Never serve canned text when the user may be in crisis
+    if handoff.get("crisis_flag") or has_crisis_signal(_content_text(callback_context.user_content)):
+        wellness_response_cache.record_bypass()
+        return None
+
+    if not handoff.get("phase") or not handoff.get("mood"):
+        wellness_response_cache.record_bypass()
+        return None
+
+    key = make_cache_key(handoff["phase"], handoff["mood"], handoff.get("symptoms") or (),
+                         handoff.get("day_in_cycle"), handoff.get("pattern_ids") or ())
+    cached = wellness_response_cache.get(key)
+    if cached is None:
+        state[CACHE_KEY_STATE_KEY] = key
+        return None
+
+    state["wellness_recommendations"] = cached
+    return types.Content(role="model", parts=[types.Part(text=cached)])
+
+
+def store_wellness_response(callback_context) -> Optional[types.Content]:
+    """after_agent_callback for WellnessCoachAgent: cache the generated response."""
+    state = callback_context.state
+    key = state.get(CACHE_KEY_STATE_KEY)
+    response = state.get("wellness_recommendations")
+    if key and isinstance(response, str) and response.strip():
+        wellness_response_cache.put(key, response)
+        state[CACHE_KEY_STATE_KEY] = None
+    return None
+
+
+def _content_text(content: Optional[types.Content]) -> str:
+    if content is None or not content.parts:
+        return ""
+    return " ".join(part.text for part in content.parts if part.text)
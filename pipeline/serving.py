@@ -0,0 +1,360 @@
+# Serving: Concurrent multi-session serving on one asyncio event loop
+# Many sessions run at once; messages within a session are processed strictly in order
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import sys
+import time
+from typing import AsyncGenerator, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.genai import types
+
+from pipeline.streaming import ReplyStream
+from utils.telemetry import REQUEST, Span, Telemetry, telemetry
+
+
+class ServerOverloadedError(Exception):
+    """Raised by PipelineServer.submit() when the queue is full and blocking is disabled."""
+
+
+class _SessionState:
+    """Ordering chain for one session: each request waits for the one submitted before it."""
+
+    __slots__ = ("tail", "refs")
+
+    def __init__(self):
+        self.tail: Optional[asyncio.Future] = None
+        self.refs = 0
+
+
+class PipelineServer:
+    """
+    Runs pipeline requests for many sessions concurrently over `runner.run_async`.
+
+    - At most `max_concurrency` pipeline runs are in flight at once.
+    - Messages for the same (user_id, session_id) run one at a time, in submission order.
+    - At most `max_queue` requests are admitted (running or waiting for a slot). Beyond
+      that, submit() waits for space (backpressure) or, with block_when_full=False,
+      raises ServerOverloadedError.
+
+    Args:
+        runner: Runner for the pipeline (e.g. InMemoryRunner)
+        max_concurrency: Maximum concurrent pipeline runs
+        max_queue: Maximum admitted requests
+        block_when_full: Wait for space instead of rejecting when the queue is full
+        collector: Telemetry collector for request spans (default: the shared one); the
+            span's queue wait covers admission, session ordering and the concurrency slot
+    """
+
+    def __init__(self, runner, max_concurrency: int = 16, max_queue: int = 256,
+                 block_when_full: bool = True, collector: Optional[Telemetry] = None):
+        self.runner = runner
+        self.telemetry = collector or telemetry
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.block_when_full = block_when_full
+        self._concurrency = asyncio.Semaphore(max_concurrency)
+        self._space = asyncio.Condition()
+        self._sessions: Dict[Tuple[str, str], _SessionState] = {}
+        self._known_sessions = set()
+        self.queued = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    async def submit(self, user_id: str, session_id: str, message: str) -> str:
+        """
+        Run one message through the pipeline and return the final response text.
+
+        Args:
+            user_id: User identifier
+            session_id: Session identifier; messages in a session are processed in order
+            message: User message
+
+        Returns:
+            Text of the pipeline's final response ("" if there was none)
+        """
+        span = Span(REQUEST, self.runner.app_name)
+        async with self._turn(user_id, session_id, span):
+            return await self._run(user_id, session_id, message, span)
+
+    async def stream(self, user_id: str, session_id: str, message: str) -> AsyncGenerator[str, None]:
+        """
+        Run one message through the pipeline, yielding the reply text chunk by chunk as the
+        model writes it. Admission, ordering and concurrency limits are the same as submit().
+
+        The request span's time to the first chunk is recorded as a "first_token" span.
+
+        Args:
+            user_id: User identifier
+            session_id: Session identifier; messages in a session are processed in order
+            message: User message
+
+        Yields:
+            Reply text chunks; joined, they are the full reply
+        """
+        span = Span(REQUEST, self.runner.app_name)
+        async with self._turn(user_id, session_id, span):
+            await self._ensure_session(user_id, session_id)
+            reply = ReplyStream(self.runner, user_id, session_id, message, span=span, collector=self.telemetry)
+            async with contextlib.aclosing(reply.__aiter__()) as chunks:
+                async for text in chunks:
+                    yield text
+
+    @contextlib.asynccontextmanager
+    async def _turn(self, user_id: str, session_id: str, span: Span):
+        """Hold a queue place, the session's turn and a concurrency slot; record the request span."""
+        key = (user_id, session_id)
+        session = self._sessions.get(key)
+        if session is None:
+            session = self._sessions[key] = _SessionState()
+        previous = session.tail
+        done = asyncio.get_running_loop().create_future()
+        session.tail = done
+        session.refs += 1
+
+        try:
+            await self._admit()
+            try:
+                if previous is not None:
+                    await previous
+                async with self._concurrency:
+                    self.in_flight += 1
+                    span.queue_wait_ms = span.elapsed_ms()
+                    try:
+                        yield
+                    finally:
+                        self.in_flight -= 1
+                self.completed += 1
+                self.telemetry.record(span.finish())
+            except GeneratorExit:
+                # A streaming client stopped reading before the reply ended
+                self.telemetry.record(span.finish("ended_early"))
+                raise
+            except Exception:
+                self.failed += 1
+                self.telemetry.record(span.finish("error"))
+                raise
+            finally:
+                async with self._space:
+                    self.queued -= 1
+                    self._space.notify()
+        finally:
+            if previous is not None and not previous.done():
+                # Cancelled while waiting: successors still wait for our predecessor
+                previous.add_done_callback(lambda _: done.done() or done.set_result(None))
+            else:
+                done.set_result(None)
+            session.refs -= 1
+            if session.refs == 0:
+                del self._sessions[key]
+
+    async def wait_for_capacity(self):
+        """Wait until the queue has space; lets producers slow down instead of piling up tasks."""
+        async with self._space:
+            await self._space.wait_for(lambda: self.queued < self.max_queue)
+
+    async def _admit(self):
+        async with self._space:
+            if self.queued >= self.max_queue:
+                if not self.block_when_full:
+                    self.rejected += 1
+                    raise ServerOverloadedError(f"Queue full ({self.max_queue} requests)")
+                await self._space.wait_for(lambda: self.queued < self.max_queue)
+            self.queued += 1
+
+    async def _ensure_session(self, user_id: str, session_id: str):
+        if (user_id, session_id) in self._known_sessions:
+            return
+        service = self.runner.session_service
+        app_name = self.runner.app_name
+        session = await service.get_session(app_name=app_name, user_id=user_id, session_id=session_id)
+        if session is None:
+            await service.create_session(app_name=app_name, user_id=user_id, session_id=session_id)
+        self._known_sessions.add((user_id, session_id))
+
+    async def _run(self, user_id: str, session_id: str, message: str, span: Span) -> str:
+        await self._ensure_session(user_id, session_id)
+        content = types.Content(role="user", parts=[types.Part(text=message)])
+        text = ""
+        async for event in self.runner.run_async(user_id=user_id, session_id=session_id, new_message=content):
+            span.trace_id = span.trace_id or getattr(event, "invocation_id", "")
+            if event.is_final_response() and event.content and event.content.parts:
+                text = event.content.parts[0].text or text
+        return text
+
+    def stats(self) -> Dict:
+        """Current load and totals."""
+        return {
+            "queued": self.queued,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "active_sessions": len(self._sessions),
+        }
+
+
+async def serve_jsonl(server: PipelineServer, reader=sys.stdin, writer=sys.stdout):
+    """
+    Serve JSON-lines requests until end of input.
+
+    Each input line is {"user_id": ..., "session_id": ..., "message": ...}; each output line
+    echoes user_id and session_id with the "response" (or an "error").
+    Reading pauses while the server queue is full.
+    """
+    loop = asyncio.get_running_loop()
+    tasks = set()
+
+    async def handle(request: Dict):
+        reply = {"user_id": request.get("user_id"), "session_id": request.get("session_id")}
+        try:
+            reply["response"] = await server.submit(request["user_id"], request["session_id"], request["message"])
+        except Exception as e:
+            reply["error"] = str(e)
+        writer.write(json.dumps(reply) + "\n")
+        writer.flush()
+
+    while True:
+        await server.wait_for_capacity()
+        line = await loop.run_in_executor(None, reader.readline)
+        if not line:
+            break
+        if not line.strip():
+            continue
+        task = asyncio.create_task(handle(json.loads(line)))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.gather(*tasks)
+
+
+def _sse_event(event: str, data: Dict) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+
+
+async def _read_sse_request(reader: asyncio.StreamReader) -> Dict:
+    """Parse GET /chat?user_id=..&session_id=..&message=.. or POST /chat with a JSON body."""
+    method, target, _ = (await reader.readline()).decode("latin-1").split(" ", 2)
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode("latin-1").strip()
+        if not line:
+            break
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    url = urlsplit(target)
+    if url.path != "/chat":
+        raise LookupError(url.path)
+    if method == "POST":
+        body = await reader.readexactly(int(headers.get("content-length", 0)))
+        return json.loads(body or b"{}")
+    return {name: values[0] for name, values in parse_qs(url.query).items()}
+
+
+async def serve_sse(server: PipelineServer, host: str = "127.0.0.1", port: int = 8080) -> asyncio.AbstractServer:
+    """
+    Serve streamed replies as Server-Sent Events on http://HOST:PORT/chat.
+
+    A request is GET /chat?user_id=..&session_id=..&message=.. (usable from EventSource) or
+    POST /chat with a JSON body of the same fields. The response is a stream of
+    `token` events ({"text": chunk}) as the reply is written, then one `done` event
+    ({"response", "first_token_ms", "total_ms"}) or an `error` event ({"error"}).
+
+    Returns:
+        The listening asyncio server (close it, or `serve_forever()` to keep serving)
+    """
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            try:
+                request = await _read_sse_request(reader)
+            except LookupError:
+                writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                return
+            except ValueError:
+                writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                return
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                         b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n")
+            started = time.perf_counter()
+            first_token_ms = None
+            reply = ""
+            try:
+                chunks = server.stream(request["user_id"], request["session_id"], request["message"])
+                async with contextlib.aclosing(chunks):
+                    async for text in chunks:
+                        if first_token_ms is None:
+                            first_token_ms = (time.perf_counter() - started) * 1000
+                        reply += text
+                        writer.write(_sse_event("token", {"text": text}))
+                        await writer.drain()
+                writer.write(_sse_event("done", {
+                    "response": reply,
+                    "first_token_ms": round(first_token_ms, 3) if first_token_ms is not None else None,
+                    "total_ms": round((time.perf_counter() - started) * 1000, 3),
+                }))
+            except (ConnectionError, asyncio.IncompleteReadError):
+                return
+            except Exception as e:
+                writer.write(_sse_event("error", {"error": str(e)}))
+            await writer.drain()
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+
+async def _serve_sse_forever(server: PipelineServer, port: int):
+    sse = await serve_sse(server, port=port)
+    print(f"Streaming on http://127.0.0.1:{port}/chat", file=sys.stderr)
+    async with sse:
+        await sse.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve JSON-lines pipeline requests from stdin")
+    parser.add_argument("--max-concurrency", type=int, default=16)
+    parser.add_argument("--max-queue", type=int, default=256)
+    parser.add_argument("--stub", action="store_true", help="Use the offline stub model instead of Gemini")
+    parser.add_argument("--mode", choices=["sequential", "dag"], default=None,
+                        help="Pipeline shape (default: CYCLE_PIPELINE_MODE)")
+    parser.add_argument("--metrics-port", type=int, default=0,
+                        help="Serve span histograms on http://127.0.0.1:PORT/metrics")
+    parser.add_argument("--sse-port", type=int, default=0,
+                        help="Instead of stdin, stream replies as Server-Sent Events on http://127.0.0.1:PORT/chat")
+    args = parser.parse_args()
+
+    from setup import InMemoryRunner
+    from agents.root_agent import create_app, create_pipeline
+    from utils.telemetry import start_metrics_server
+
+    model = None
+    if args.stub:
+        from pipeline.stub_model import StubLlm
+        model = StubLlm()
+    pipeline = create_pipeline(model, args.mode) if args.mode else create_pipeline(model)
+    runner = InMemoryRunner(app=create_app(pipeline))
+    server = PipelineServer(runner, max_concurrency=args.max_concurrency, max_queue=args.max_queue)
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
+    started = time.perf_counter()
+    if args.sse_port:
+        try:
+            asyncio.run(_serve_sse_forever(server, args.sse_port))
+        except KeyboardInterrupt:
+            pass
+    else:
+        asyncio.run(serve_jsonl(server))
+    print(json.dumps({"stats": server.stats(), "elapsed_s": round(time.perf_counter() - started, 3)}),
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+# Streaming: Forward the coach's reply to the client while it is being generated
+# Time to first token is recorded separately from total latency
+
+import os
+import sys
+from typing import AsyncGenerator, Optional, Sequence, Union
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.models.registry import LLMRegistry
+from google.genai import types
+
+from utils import memory_manager
+from utils.memory_manager import APP_NAME, USER_ID
+from utils.telemetry import FIRST_TOKEN, REQUEST, Span, Telemetry, telemetry
+
+# Stages whose text is the reply the user sees (sequential and DAG pipelines)
+REPLY_STAGES = ("WellnessCoachAgent", "WellnessWriterAgent")
+
+# Model responses arrive as partial events, chunk by chunk
+STREAMING_RUN_CONFIG = RunConfig(streaming_mode=StreamingMode.SSE)
+
+
+class BufferedLlm(BaseLlm):
+    """
+    Wraps a model so its calls never stream, for the stages whose text nobody sees.
+
+    Streaming is chosen per run, by the RunConfig passed to `runner.run_async`; in a
+    streamed run every model call would stream, and each partial chunk of the intake and
+    analysis stages costs a full pass through the event pipeline only to be dropped.
+    Those stages' models are wrapped in this so they answer in one response; the reply
+    stages keep streaming.
+
+    Attributes:
+        inner: The wrapped model (e.g. GuardedLlm or StubLlm)
+    """
+
+    inner: BaseLlm
+
+    @classmethod
+    def wrap(cls, inner: Union[BaseLlm, str]) -> "BufferedLlm":
+        if isinstance(inner, str):
+            inner = LLMRegistry.new_llm(inner)
+        return cls(model=inner.model, inner=inner)
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        async for response in self.inner.generate_content_async(llm_request, stream=False):
+            yield response
+
+
+class ReplyStream:
+    """
+    Async iterator over the text of the pipeline's reply, chunk by chunk as the model writes it.
+
+    Only the reply stages are forwarded; earlier stages run as usual. A reply that is not
+    streamed (a cache hit, or a model without streaming) arrives as one chunk. If no reply
+    stage answers, the last final response of the run is sent instead.
+
+    Usage:
+        async for text in ReplyStream(runner, user_id, session_id, message):
+            ...
+
+    Args:
+        runner: Runner for the pipeline; the session must exist
+        user_id: User identifier
+        session_id: Session identifier
+        message: User message
+        span: Request span the timings are measured from (default: a new one, recorded
+            when the stream ends); its start is time zero for `first_token_ms`
+        collector: Telemetry collector for the first-token and request spans
+        reply_stages: Agent names whose text is forwarded
+
+    Attributes:
+        text: Reply text forwarded so far
+        first_token_ms: Milliseconds from the span's start to the first chunk (None until then)
+        total_ms: Milliseconds from the span's start to the end of the run (None until then)
+    """
+
+    def __init__(self, runner, user_id: str, session_id: str, message: str, span: Optional[Span] = None,
+                 collector: Optional[Telemetry] = None, reply_stages: Sequence[str] = REPLY_STAGES):
+        self.runner = runner
+        self.user_id = user_id
+        self.session_id = session_id
+        self.message = message
+        self.telemetry = collector or telemetry
+        self.reply_stages = tuple(reply_stages)
+        self._own_span = span is None
+        self.span = span or Span(REQUEST, runner.app_name)
+        self.text = ""
+        self.first_token_ms: Optional[float] = None
+        self.total_ms: Optional[float] = None
+
+    def __aiter__(self) -> AsyncGenerator[str, None]:
+        return self._generate()
+
+    async def _generate(self) -> AsyncGenerator[str, None]:
+        content = types.Content(role="user", parts=[types.Part(text=self.message)])
+        fallback = ""
+        streamed_by = set()
+        status = "ended_early"  # the consumer stopped reading
+        try:
+            async for event in self.runner.run_async(user_id=self.user_id, session_id=self.session_id,
+                                                     new_message=content, run_config=STREAMING_RUN_CONFIG):
+                self.span.trace_id = self.span.trace_id or getattr(event, "invocation_id", "")
+                text = _event_text(event)
+                if not text:
+                    continue
+                if event.author not in self.reply_stages:
+                    if event.is_final_response():
+                        fallback = text
+                    continue
+                if event.partial:
+                    streamed_by.add(event.author)
+                elif event.author in streamed_by or not event.is_final_response():
+                    # The full text of a reply whose chunks were already forwarded
+                    continue
+                self._note_chunk(text)
+                yield text
+            if not self.text and fallback:
+                self._note_chunk(fallback)
+                yield fallback
+            status = None
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            self.total_ms = self.span.elapsed_ms()
+            if self._own_span:
+                self.telemetry.record(self.span.finish(status))
+
+    def _note_chunk(self, text: str):
+        if self.first_token_ms is None:
+            first = Span(FIRST_TOKEN, self.span.name, self.span.trace_id)
+            first.wall_ms = self.first_token_ms = self.span.elapsed_ms()
+            self.telemetry.record(first)
+        self.text += text
+
+
+async def run_session(runner_instance, user_queries, session_id: str = "default"):
+    """
+    Helper function to run queries in a session and display responses.
+    Follows Kaggle pattern.
+    """
+    print(f"\n### Session: {session_id}")
+    
+    # Create or retrieve session
+    session_service = memory_manager.session_service
+    try:
+        session = await session_service.create_session(
+            app_name=APP_NAME, user_id=USER_ID, session_id=session_id
+        )
+    except:
+        session = await session_service.get_session(
+            app_name=APP_NAME, user_id=USER_ID, session_id=session_id
+        )
+    
+    # Convert single query to list
+    if isinstance(user_queries, str):
+        user_queries = [user_queries]
+    
+    # Process each query
+    for query in user_queries:
+        print(f"\n User > {query}")
+        
+        # Stream the reply as it is written
+        print(" Agent > ", end="", flush=True)
+        async for text in ReplyStream(runner_instance, USER_ID, session.id, query):
+            print(text, end="", flush=True)
+        print()
+
+
+def _event_text(event) -> str:
+    if not event.content or not event.content.parts:
+        return ""
+    return "".join(part.text for part in event.content.parts if part.text and not part.thought)
@@ -0,0 +1,225 @@
+# Stub Model: Offline stand-in for Gemini, for load tests and benchmarks
+# Plugs into Agent(model=...) like any ADK model, but never leaves the process
+
+import asyncio
+import math
+import os
+import random
+import re
+import sys
+import time
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import errors, types
+from pydantic import PrivateAttr
+
+from pipeline.context_cache import static_prefix
+from pipeline.handoff import estimate_content_tokens, estimate_text_tokens
+from utils.telemetry import note_model_retry
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
+# Error bodies shaped like the Gemini API's, so error handling sees realistic exceptions
+ERROR_STATUSES = {429: "RESOURCE_EXHAUSTED", 500: "INTERNAL", 503: "UNAVAILABLE", 504: "DEADLINE_EXCEEDED"}
+
+# Tool calls that walk the pipeline through its real tools (tool name -> arguments)
+PIPELINE_TOOL_SCRIPT: Dict[str, Dict[str, Any]] = {
+    "calculate_cycle_phase": {"last_period_date": "2025-11-18", "cycle_length": 28},
+    "analyze_mood_patterns": {
+        "mood_logs": '[{"date": "2025-11-28", "cycle_phase": "Luteal", "mood": "anxious", '
+                     '"symptoms": ["cramps"]}, {"date": "2025-11-29", "cycle_phase": "Luteal", '
+                     '"mood": "tired", "symptoms": ["fatigue"]}]'
+    },
+    "generate_recommendations": {"cycle_phase": "Luteal", "mood": "anxious", "symptoms": ["cramps"]},
+}
+
+
+class StubLlm(BaseLlm):
+    """
+    Local model with scripted tool calls, sampled latency and injected API errors.
+
+    For each request, if the agent offers tools named in `tool_calls` and the model has
+    not called them yet this turn, the stub calls them (all at once, with the scripted
+    arguments); otherwise it answers with `response_text`. Text answers take one
+    `token_interval_s` per chunk of `stream_chunk_words` words after the first; with
+    stream=True the chunks arrive as partial responses, followed by the full text.
+
+    Attributes:
+        latency_s: Mean seconds per model attempt
+        latency_distribution: "fixed", "uniform" (0 to 2x mean), "exponential" or "lognormal"
+        latency_sigma: Shape of the lognormal distribution (larger = longer tail)
+        response_text: Text returned once no scripted tool call is pending
+        token_interval_s: Seconds between streamed chunks (latency_s is the time to the first one)
+        stream_chunk_words: Words per streamed chunk
+        tool_calls: Tool name -> arguments for the scripted calls
+        error_rate: Probability that an attempt fails with one of `error_codes`
+        error_codes: HTTP status codes of the injected errors
+        quota_per_s: Server-side quota; attempts beyond it fail fast with 429 (0: no quota)
+        retry_options: Retry policy applied to injected errors the way the google-genai
+            client applies it for live Gemini (None: errors surface immediately)
+        retry_time_scale: Multiplier on retry back-off sleeps (e.g. 0.01 for quick runs)
+        seed: Seed for latency and error sampling (None: unseeded)
+    """
+
+    model: str = "stub-model"
+    latency_s: float = 0.05
+    latency_distribution: str = "fixed"
+    latency_sigma: float = 0.5
+    response_text: str = "Thanks for checking in! Here are a few ideas for today."
+    token_interval_s: float = 0.0
+    stream_chunk_words: int = 4
+    tool_calls: Dict[str, Dict[str, Any]] = {}
+    error_rate: float = 0.0
+    error_codes: Tuple[int, ...] = (429, 503)
+    quota_per_s: float = 0.0
+    retry_options: Optional[types.HttpRetryOptions] = None
+    retry_time_scale: float = 1.0
+    seed: Optional[int] = None
+
+    _rng: random.Random = PrivateAttr(default=None)
+    _stats: Dict[str, float] = PrivateAttr(default=None)
+    _quota_tokens: float = PrivateAttr(default=0.0)
+    _quota_updated: float = PrivateAttr(default=0.0)
+
+    def model_post_init(self, __context):
+        super().model_post_init(__context)
+        if self.latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {self.latency_distribution!r}")
+        self._rng = random.Random(self.seed)
+        self._quota_tokens = self.quota_per_s
+        self._quota_updated = time.monotonic()
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Zero the call, attempt, error, retry and failure counters."""
+        self._stats = {"calls": 0, "attempts": 0, "injected_errors": 0, "quota_rejections": 0, "retries": 0,
+                       "failures": 0, "tool_call_responses": 0, "retry_sleep_s": 0}
+
+    def stats(self) -> Dict[str, float]:
+        """Counters since creation or the last reset_stats()."""
+        return dict(self._stats)
+
+    def sample_latency(self) -> float:
+        """Seconds for one attempt, drawn from the configured distribution."""
+        mean = self.latency_s
+        if mean <= 0 or self.latency_distribution == "fixed":
+            return max(0.0, mean)
+        if self.latency_distribution == "uniform":
+            return self._rng.uniform(0, 2 * mean)
+        if self.latency_distribution == "exponential":
+            return self._rng.expovariate(1 / mean)
+        sigma = self.latency_sigma
+        return self._rng.lognormvariate(math.log(mean) - sigma * sigma / 2, sigma)
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        self._stats["calls"] += 1
+        attempt = 0
+        while True:
+            attempt += 1
+            self._stats["attempts"] += 1
+            if not self._take_quota():
+                # Over quota: rejected quickly, before any generation
+                self._stats["quota_rejections"] += 1
+                await asyncio.sleep(self.sample_latency() * 0.1)
+                code = 429
+            else:
+                await asyncio.sleep(self.sample_latency())
+                if not (self.error_rate and self._rng.random() < self.error_rate):
+                    break
+                code = self._rng.choice(self.error_codes)
+                self._stats["injected_errors"] += 1
+            delay = self._retry_delay(code, attempt)
+            if delay is None:
+                self._stats["failures"] += 1
+                errors.APIError.raise_error(
+                    code, {"error": {"code": code, "message": "Injected by StubLlm",
+                                     "status": ERROR_STATUSES.get(code, "UNKNOWN")}}, None
+                )
+            self._stats["retries"] += 1
+            self._stats["retry_sleep_s"] += delay
+            note_model_retry()
+            await asyncio.sleep(delay)
+
+        content = self._scripted_tool_calls(llm_request)
+        if content is None:
+            chunks = self.stream_chunks()
+            for index, chunk in enumerate(chunks):
+                if index and self.token_interval_s:
+                    await asyncio.sleep(self.token_interval_s)
+                if stream:
+                    yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=chunk)]),
+                                      partial=True)
+            content = types.Content(role="model", parts=[types.Part(text=self.response_text)])
+            output_tokens = max(1, len(self.response_text) // 4)
+        else:
+            self._stats["tool_call_responses"] += 1
+            output_tokens = 10 * len(content.parts)
+
+        prompt_tokens = estimate_tokens(llm_request)
+        yield LlmResponse(
+            content=content,
+            partial=False,
+            turn_complete=True,
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=prompt_tokens,
+                candidates_token_count=output_tokens,
+                total_token_count=prompt_tokens + output_tokens,
+            ),
+        )
+
+    def stream_chunks(self) -> List[str]:
+        """`response_text` split into streamed chunks of `stream_chunk_words` words (joined, they give it back)."""
+        words = re.findall(r"\S+\s*", self.response_text)
+        size = max(1, self.stream_chunk_words)
+        return ["".join(words[i:i + size]) for i in range(0, len(words), size)] or [self.response_text]
+
+    def _take_quota(self) -> bool:
+        """Server-side token bucket (one second of quota as burst); False means 429."""
+        if not self.quota_per_s:
+            return True
+        now = time.monotonic()
+        self._quota_tokens = min(self.quota_per_s,
+                                 self._quota_tokens + (now - self._quota_updated) * self.quota_per_s)
+        self._quota_updated = now
+        if self._quota_tokens < 1:
+            return False
+        self._quota_tokens -= 1
+        return True
+
+    def _retry_delay(self, code: int, attempt: int) -> Optional[float]:
+        """Back-off before the next attempt (google-genai's wait_exponential_jitter), or None to give up."""
+        options = self.retry_options
+        if options is None:
+            return None
+        if code not in (options.http_status_codes or (408, 429, 500, 502, 503, 504)):
+            return None
+        if attempt >= (options.attempts or 5):
+            return None
+        delay = (options.initial_delay or 1.0) * (options.exp_base or 2) ** (attempt - 1)
+        delay += self._rng.uniform(0, options.jitter or 1)
+        return min(delay, options.max_delay or 60.0) * self.retry_time_scale
+
+    def _scripted_tool_calls(self, llm_request: LlmRequest) -> Optional[types.Content]:
+        """Function calls for scripted tools the agent offers, unless this turn already made them."""
+        pending = [name for name in self.tool_calls if name in llm_request.tools_dict]
+        if not pending:
+            return None
+        last = llm_request.contents[-1] if llm_request.contents else None
+        if last is not None and any(part.function_response for part in last.parts or []):
+            return None
+        return types.Content(role="model", parts=[
+            types.Part(function_call=types.FunctionCall(name=name, args=dict(self.tool_calls[name])))
+            for name in pending
+        ])
+
+
+def estimate_tokens(llm_request: LlmRequest) -> int:
+    """Rough prompt size in tokens (about 4 characters per token): instruction, tool declarations and contents."""
+    return max(1, estimate_text_tokens(static_prefix(llm_request.config)) + estimate_content_tokens(llm_request.contents))
@@ -4,5 +4,3 @@ from google.adk.runners import InMemoryRunner
 from google.adk.tools import AgentTool, FunctionTool, google_search
 from google.genai import types
 from config import GOOGLE_API_KEY, MODEL_NAME, RETRY_CONFIG
-
-print("✅ ADK components imported successfully.")
\ No newline at end of file
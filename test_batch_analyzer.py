@@ -0,0 +1,93 @@
+import json
+import random
+
+import pytest
+
+from tools.pattern_analyzer import analyze_mood_patterns
+from utils import memory_manager
+from utils.batch_analyzer import analyze_population, analyze_table_user, shard_users
+from utils.mood_table import MoodLogTable
+from utils.sqlite_store import SQLiteDatabase, SQLiteMoodLogStore
+from utils.storage import PatternStore
+
+PHASES = ["Menstrual", "Follicular", "Ovulation", "Luteal"]
+MOODS = ["anxious", "Anxious", "calm", "happy", "sad", "tired", ""]
+
+
+def _population(store, users=40, seed=2):
+    rng = random.Random(seed)
+    for user in range(users):
+        for day in range(rng.randint(0, 60)):
+            store.append({"user_id": f"user_{user}", "date": f"2025-{day // 28 + 1:02d}-{day % 28 + 1:02d}",
+                          "cycle_phase": rng.choice(PHASES), "mood": rng.choice(MOODS),
+                          "symptoms": rng.sample(["cramps", "headache", "fatigue", "acne"], rng.randint(0, 2)),
+                          "notes": "", "logged_at": ""})
+    return store
+
+
+def _reference(store):
+    return {user_id: analyze_mood_patterns(json.dumps(store.query(user_id, limit=store.count(user_id))))
+            for user_id in store.users()}
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_pool_results_match_the_per_user_analyzer(workers):
+    table = _population(MoodLogTable())
+    results = dict(analyze_population(table, workers=workers, shard_logs=100))
+    assert results == _reference(table)
+
+
+def test_table_user_analysis_sees_moods_added_between_calls():
+    table = _population(MoodLogTable(), users=5)
+    assert {user_id: analyze_table_user(table, user_id) for user_id in table.users()} == _reference(table)
+    for day in range(1, 4):
+        table.append({"user_id": "user_1", "date": f"2025-04-{day:02d}", "cycle_phase": "Luteal",
+                      "mood": "Overwhelmed", "symptoms": [], "notes": "", "logged_at": ""})
+    assert analyze_table_user(table, "user_1") == _reference(table)["user_1"]
+
+
+def test_dict_stores_are_coded_per_shard():
+    store = _population(SQLiteMoodLogStore(SQLiteDatabase(":memory:")), users=12)
+    shards = list(shard_users(store, shard_logs=50))
+    assert len(shards) > 1 and all(len(shard.moods) <= len(MOODS) for shard in shards)
+    assert dict(analyze_population(store, workers=0, shard_logs=50)) == _reference(store)
+
+
+def test_table_shards_carry_only_the_codes_they_use():
+    table = MoodLogTable()
+    for user in range(30):   # every user has symptoms and a mood nobody else logs
+        for day in range(1, 11):
+            table.append({"user_id": f"user_{user}", "date": f"2025-03-{day:02d}", "cycle_phase": "Luteal",
+                          "mood": f"mood {user}", "symptoms": [f"symptom {user}", "cramps", f"symptom {user}"]})
+    shards = list(shard_users(table, shard_logs=50))
+    assert len(shards) == 6
+    assert all(len(shard.moods) == 5 and len(shard.symptoms) == 6 for shard in shards)
+    assert dict(analyze_population(table, workers=0, shard_logs=50)) == _reference(table)
+
+
+def test_nightly_report_stores_patterns_in_bulk(monkeypatch):
+    table = _population(MoodLogTable(), users=10)
+    patterns = PatternStore()
+    monkeypatch.setitem(memory_manager.cycle_data_store, "mood_logs", table)
+    monkeypatch.setitem(memory_manager.cycle_data_store, "patterns", patterns)
+
+    report = memory_manager.run_nightly_pattern_report(workers=2)
+
+    expected = _reference(table)
+    assert report["users"] == len(expected)
+    assert report["patterns_stored"] == len(patterns) == sum(len(r["patterns_found"]) for r in expected.values())
+    for user_id, result in expected.items():
+        stored = memory_manager.get_patterns(user_id)
+        assert [p["data"] for p in stored] == result["patterns_found"]
+        assert all(p["identified_at"] and p["description"] == p["data"]["insight"] for p in stored)
+
+    # The next night replaces each user's analyzer patterns; other kinds of pattern stay
+    memory_manager.store_pattern("sleep_note", "Sleeps badly before a period", {}, user_id="user_0")
+    table.append({"user_id": "user_0", "date": "2025-03-30", "cycle_phase": "Luteal", "mood": "sad",
+                  "symptoms": ["acne"], "notes": "", "logged_at": ""})
+    memory_manager.run_nightly_pattern_report(workers=0)
+    expected = _reference(table)
+    for user_id, result in expected.items():
+        stored = memory_manager.get_patterns(user_id)
+        assert [p["data"] for p in stored if p["type"] != "sleep_note"] == result["patterns_found"]
+    assert len(memory_manager.get_patterns("user_0", "sleep_note")) == 1
@@ -0,0 +1,104 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from google.adk.models.llm_request import LlmRequest
+from google.genai import types
+
+from pipeline.context_cache import InstructionCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeCaches:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.created = []
+        self.deleted = []
+
+    async def create(self, model, config):
+        if self.fail:
+            raise RuntimeError("Cached content is too small")
+        self.created.append(config)
+        return SimpleNamespace(name=f"cachedContents/{len(self.created)}")
+
+    async def delete(self, name):
+        self.deleted.append(name)
+
+
+def _client(fail=False):
+    return SimpleNamespace(aio=SimpleNamespace(caches=FakeCaches(fail)))
+
+
+def _request(instruction="You are a warm wellness coach. " * 10):
+    tool = types.Tool(function_declarations=[types.FunctionDeclaration(name="calculate_cycle_phase")])
+    return LlmRequest(model="gemini-2.5-flash-lite",
+                      config=types.GenerateContentConfig(system_instruction=instruction, tools=[tool]))
+
+
+def test_local_mode_measures_the_prefix_it_would_not_resend():
+    clock = FakeClock()
+    cache = InstructionCache(mode="local", ttl_seconds=60, clock=clock)
+
+    async def scenario():
+        for _ in range(3):
+            request = _request()
+            entry = await cache.apply("WellnessCoachAgent", request, _client())
+            assert request.config.system_instruction and request.config.cached_content is None
+        await cache.apply("WellnessCoachAgent", _request("Edited instruction"))
+        clock.now = 61
+        await cache.apply("WellnessCoachAgent", _request("Edited instruction"))
+        return entry
+
+    entry = asyncio.run(scenario())
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["invalidations"], stats["expirations"]) == (2, 3, 1, 1)
+    assert stats["bytes_saved"] == 2 * entry.prefix_bytes and stats["tokens_saved"] == 2 * entry.prefix_tokens
+    assert stats["remote_created"] == 0
+
+
+def test_auto_mode_uses_one_server_side_cache_per_instruction():
+    cache = InstructionCache(mode="auto", min_tokens=0)
+    client = _client()
+
+    async def scenario():
+        requests = [_request() for _ in range(4)]
+        await asyncio.gather(*(cache.apply("AnalysisAgent", request, client) for request in requests))
+        edited = _request("You are the Pattern Detective.")
+        await cache.apply("AnalysisAgent", edited, client)
+        return requests, edited
+
+    requests, edited = asyncio.run(scenario())
+    caches = client.aio.caches
+    assert len(caches.created) == 2 and caches.deleted == ["cachedContents/1"]
+    assert caches.created[0].system_instruction.startswith("You are a warm")
+    assert all(r.config.cached_content == "cachedContents/1" for r in requests)
+    assert all(r.config.system_instruction is None and r.config.tools is None for r in requests)
+    assert edited.config.cached_content == "cachedContents/2"
+
+
+def test_auto_mode_falls_back_to_the_full_prompt():
+    small = InstructionCache(mode="auto", min_tokens=10_000)
+    failing = InstructionCache(mode="auto", min_tokens=0)
+
+    async def scenario():
+        for cache, client in ((small, _client()), (failing, _client(fail=True))):
+            for _ in range(2):
+                request = _request()
+                await cache.apply("IntakeAgent", request, client)
+                assert request.config.cached_content is None and request.config.system_instruction
+
+    asyncio.run(scenario())
+    assert small.stats()["remote_created"] == 0 and small.stats()["hits"] == 1
+    assert failing.stats()["remote_errors"] == 1   # not retried on every request
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        InstructionCache(mode="always")
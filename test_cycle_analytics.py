@@ -0,0 +1,125 @@
+import random
+import statistics
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from tools.cycle_analytics import CycleModel, analyze_cycle_histories
+from utils import memory_manager
+from utils.mood_table import day_iso
+
+
+def _history(rng, cycles):
+    start = date(2024, 1, 1) + timedelta(days=rng.randrange(60))
+    starts = [start]
+    for _ in range(cycles):
+        # Mostly real cycles, sometimes a missed log (a double-length gap)
+        starts.append(starts[-1] + timedelta(days=rng.choice([rng.randint(24, 33)] * 9 + [58, 70])))
+    return [d.isoformat() for d in starts]
+
+
+def test_rolling_statistics_over_the_window():
+    model = CycleModel(declared_length=30, window=3)
+    assert model.cycle_length == 30 and model.predict()["error"]
+
+    for start in ["2025-01-01", "2025-01-29", "2025-02-28", "2025-05-01", "2025-05-27", "2025-06-25"]:
+        model.add_period_start(start)
+    # Gaps 28, 30, 62 (a missed log, skipped), 26, 29: the window keeps the last three cycles
+    assert list(model.lengths) == [30, 26, 29]
+    assert model.mean_length == pytest.approx(statistics.mean([30, 26, 29]))
+    assert model.length_variance == pytest.approx(statistics.variance([30, 26, 29]))
+    assert model.cycle_length == 28
+
+    assert not model.add_period_start("2025-05-27")
+    model.add_period_start("2025-03-30")   # a backfilled period splits the 62-day gap
+    assert list(model.lengths) == [32, 26, 29]
+
+
+def test_prediction_uses_the_learned_length():
+    model = CycleModel(declared_length=28)
+    for start in ["2025-06-01", "2025-07-06", "2025-08-10", "2025-09-14"]:
+        model.add_period_start(start)
+
+    prediction = model.predict(today="2025-11-01")
+    assert prediction["cycle_length"] == 35 and prediction["cycles_observed"] == 3
+    # 48 days after the last start: day 13 of the second 35-day cycle, well before ovulation
+    assert (prediction["day_in_cycle"], prediction["current_phase"]) == (13, "Follicular")
+    assert prediction["next_period_date"] == "2025-11-23"
+    assert prediction["phase_last_days"]["Ovulation"] == 23
+
+
+def test_batch_matches_incremental_models():
+    rng = random.Random(11)
+    user_ids, starts, models = [], [], {}
+    for user in range(300):
+        history = _history(rng, rng.randint(0, 12))
+        rng.shuffle(history)   # logged in any order
+        history += rng.sample(history, min(2, len(history))) + ["not a date"]
+        model = models[f"user_{user:03d}"] = CycleModel(declared_length=29, window=4)
+        for start in history:
+            user_ids.append(f"user_{user:03d}")
+            starts.append(start)
+            if start != "not a date":
+                model.add_period_start(start)
+
+    columns = analyze_cycle_histories(user_ids, starts, declared_lengths=29, today="2025-12-01", window=4)
+
+    assert columns["user_id"].tolist() == sorted(models)
+    for index, user in enumerate(columns["user_id"].tolist()):
+        model = models[user]
+        prediction = model.predict(today="2025-12-01")
+        assert columns["cycles_observed"][index] == model.cycles_observed
+        assert columns["cycle_length_variance"][index] == pytest.approx(model.length_variance)
+        assert columns["cycle_length"][index] == prediction["cycle_length"]
+        assert str(columns["last_period_date"][index]) == prediction["last_period_date"]
+        assert columns["current_phase"][index] == prediction["current_phase"]
+        assert str(columns["next_period_date"][index]) == prediction["next_period_date"]
+    assert np.isnan(columns["cycle_length_mean"][columns["cycles_observed"] == 0]).all()
+
+
+def test_stored_period_starts_rebuild_the_model():
+    user_id = "cycle_analytics_user"
+    memory_manager.clear_all_data(user_id)
+    for start in ["2025-07-01", "2025-07-31", "2025-08-30"]:
+        assert memory_manager.store_cycle_info(start, 28, user_id=user_id)
+    assert not memory_manager.store_cycle_info("2025-13-01", 28, user_id=user_id)
+
+    insights = memory_manager.get_cycle_insights(user_id, today="2025-09-10")
+    assert (insights["cycle_length"], insights["next_period_date"]) == (30, "2025-09-29")
+    assert memory_manager.get_cycle_info(user_id)["period_starts"] == ["2025-07-01", "2025-07-31", "2025-08-30"]
+
+    memory_manager.cycle_models.clear()   # e.g. after a restart with the SQLite backend
+    assert memory_manager.get_cycle_insights(user_id, today="2025-09-10") == insights
+    memory_manager.clear_all_data(user_id)
+
+
+def test_a_corrected_last_period_replaces_the_latest_start():
+    user_id = "cycle_correction_user"
+    memory_manager.clear_all_data(user_id)
+    for start in ["2025-07-01", "2025-07-31", "2025-08-03", "2025-08-30", "2025-08-29", "2025-08-29"]:
+        assert memory_manager.store_cycle_info(start, 28, user_id=user_id)
+    # 08-03 fixed a typo in 07-31, 08-29 one in 08-30: no 3-day or 1-day cycle
+    assert memory_manager.get_cycle_info(user_id)["period_starts"] == ["2025-07-01", "2025-08-03", "2025-08-29"]
+    insights = memory_manager.get_cycle_insights(user_id, today="2025-09-10")
+    assert (insights["cycle_length"], insights["cycles_observed"]) == (30, 2)   # 33 and 26 days
+
+    model = CycleModel()
+    assert model.set_last_period_start("2025-07-01") and model.set_last_period_start("2025-07-31")
+    assert not model.set_last_period_start("2025-07-31")
+    assert model.set_last_period_start("2025-07-30") and model.cycle_length == 29
+    memory_manager.clear_all_data(user_id)
+
+
+def test_an_older_last_period_is_backfilled_without_losing_the_latest_start():
+    model = CycleModel()
+    for start in ["2025-08-01", "2025-08-30"]:
+        assert model.set_last_period_start(start)
+    assert model.set_last_period_start("2025-07-03")   # months before the latest start, not a correction
+    assert [day_iso(day) for day in model.starts] == ["2025-07-03", "2025-08-01", "2025-08-30"]
+    assert (model.cycle_length, model.cycles_observed) == (29, 2)
+    assert not model.set_last_period_start("2025-08-01")
+    assert model.set_last_period_start("2025-08-16")   # 14 days before the latest start: corrects it
+    assert [day_iso(day) for day in model.starts] == ["2025-07-03", "2025-08-01", "2025-08-16"]
+    with pytest.raises(ValueError):
+        model.set_last_period_start("2025-W36-1")   # an ISO week date, not YYYY-MM-DD
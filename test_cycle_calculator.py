@@ -0,0 +1,72 @@
+import random
+from datetime import date, timedelta
+
+import numpy as np
+
+from tools.cycle_calculator import PHASE_LAST_DAYS, calculate_cycle_phase, calculate_cycle_phases, phase_last_days
+
+
+def _reference(last_period: date, cycle_length: int, today: date):
+    # Per-user rules in whole days: ovulation ends 12 days before the next period
+    days_since = (today - last_period).days
+    day_in_cycle = days_since % cycle_length
+    ovulation_end = max(cycle_length, 18) - 12
+    if day_in_cycle <= min(5, ovulation_end - 4):
+        phase = "Menstrual"
+    elif day_in_cycle <= ovulation_end - 3:
+        phase = "Follicular"
+    elif day_in_cycle <= ovulation_end:
+        phase = "Ovulation"
+    else:
+        phase = "Luteal"
+    next_period = today + timedelta(days=cycle_length - day_in_cycle)
+    return phase, day_in_cycle, days_since, next_period.isoformat(), (next_period - today).days
+
+
+def test_batch_matches_per_user_rules():
+    rng = random.Random(5)
+    today = date(2025, 12, 1)
+    last_periods = [today - timedelta(days=rng.randint(-10, 400)) for _ in range(2000)]
+    lengths = [rng.randint(15, 45) for _ in last_periods]
+
+    columns = calculate_cycle_phases([d.isoformat() for d in last_periods], lengths, today=today)
+
+    assert columns["valid"].all()
+    for i, (last_period, length) in enumerate(zip(last_periods, lengths)):
+        assert (
+            columns["current_phase"][i],
+            columns["day_in_cycle"][i],
+            columns["days_since_last_period"][i],
+            str(columns["next_period_date"][i]),
+            columns["days_until_next_period"][i],
+        ) == _reference(last_period, length, today)
+
+
+def test_phases_scale_with_cycle_length_and_next_period_is_ahead():
+    columns = calculate_cycle_phases(["2025-11-01"] * 3 + ["2025-01-14"], [28, 35, 21, 28], today="2025-11-17")
+
+    # Day 16: still ovulation in a 28-day cycle, follicular in a 35-day one, luteal in a 21-day one
+    assert columns["current_phase"].tolist() == ["Ovulation", "Follicular", "Luteal", "Luteal"]
+    assert phase_last_days(28).tolist() == PHASE_LAST_DAYS.tolist()
+    # A last period logged ten months ago still predicts the coming period, not a past one
+    assert str(columns["next_period_date"][3]) == "2025-11-18"
+    assert columns["days_until_next_period"].tolist() == [12, 19, 5, 1]
+
+
+def test_invalid_rows_are_flagged_not_raised():
+    columns = calculate_cycle_phases(["2025-11-18", "18/11/2025", "2025-11", "2025-11-18"],
+                                     [28, 28, 28, 0], today="2025-12-01")
+
+    assert columns["valid"].tolist() == [True, False, False, False]
+    assert np.isnat(columns["next_period_date"][1:3]).all()
+
+
+def test_single_user_wrapper_keeps_its_shape():
+    result = calculate_cycle_phase(date.today().isoformat(), 28)
+    assert result["current_phase"] == "Menstrual"
+    assert result["day_in_cycle"] == 0
+    assert result["days_until_next_period"] == 28
+    assert set(result) == {"current_phase", "phase_description", "day_in_cycle", "days_since_last_period",
+                           "next_period_date", "days_until_next_period", "cycle_length"}
+
+    assert "Invalid date format" in calculate_cycle_phase("2025/11/18", 28)["error"]
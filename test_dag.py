@@ -0,0 +1,45 @@
+from agents.wellness_agent import create_wellness_agent
+from pipeline.dag import RECOMMENDATIONS_STATE_KEY, render_merged_checkin
+from pipeline.fast_path import CRISIS_RESOURCES
+from pipeline.handoff import HANDOFF_STATE_KEY
+from pipeline.response_cache import wellness_response_cache
+from pipeline.stub_model import PIPELINE_TOOL_SCRIPT, StubLlm
+from test_stub_model import run_once
+
+
+def test_dag_pipeline_merges_parallel_stages_into_one_writer_call():
+    wellness_response_cache.clear()
+    model = StubLlm(latency_s=0.02, tool_calls=PIPELINE_TOOL_SCRIPT)
+    session, snapshot = run_once(model, "I feel anxious and have cramps", mode="dag")
+
+    assert session.state[HANDOFF_STATE_KEY]["phase"] == "Luteal"
+    assert session.state[RECOMMENDATIONS_STATE_KEY]["status"] == "success"
+    assert session.state["wellness_recommendations"] == model.response_text
+    # Intake and analysis each call a tool (two model calls); the writer needs one
+    assert model.stats()["calls"] == 5
+    assert snapshot["model:WellnessWriterAgent"]["count"] == 1
+    critical = snapshot["critical_path:CycleWellnessDag"]["max_ms"]
+    assert critical <= snapshot["agent:CycleWellnessDag"]["max_ms"]
+    assert critical >= snapshot["agent:IntakeAgent"]["max_ms"] + snapshot["agent:AnalysisAgent"]["max_ms"]
+
+
+def test_merged_checkin_lists_crisis_resources_first():
+    state = {HANDOFF_STATE_KEY: {"phase": "Luteal", "day_in_cycle": 25, "mood": "sad", "symptoms": [],
+                                 "crisis_flag": True, "pattern_ids": ["trend:predominantly_negative"]},
+             RECOMMENDATIONS_STATE_KEY: {"recommendations": [
+                 {"category": "Mental Health", "focus": "Support", "suggestions": ["Call a friend"]}]}}
+    lines = render_merged_checkin(state).splitlines()
+    assert lines[0].startswith("Crisis resources")
+    assert "Cycle phase: Luteal (day 25)" in lines
+    assert lines[-1] == "Mental Health - Support: Call a friend"
+
+
+def test_merged_checkin_keeps_day_zero_and_the_coach_crisis_resources():
+    state = {HANDOFF_STATE_KEY: {"phase": "Menstrual", "day_in_cycle": 0, "mood": "sad", "symptoms": [],
+                                 "crisis_flag": True, "pattern_ids": []}}
+    lines = render_merged_checkin(state).splitlines()
+    assert "Cycle phase: Menstrual (day 0)" in lines
+
+    # The DAG writer and the sequential coach hand out the same resources
+    coach = create_wellness_agent(StubLlm()).instruction
+    assert all(resource in lines[0] and resource in coach for resource in CRISIS_RESOURCES)
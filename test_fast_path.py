@@ -0,0 +1,39 @@
+import asyncio
+
+from pipeline.fast_path import extract_checkin, run_fast_path
+
+SAMPLE = ("Hi, I'd like to track my cycle and mood. My last period started on 2025-11-18. "
+          "My average cycle length is 28 days.Right now I'm feeling anxious and tired.")
+
+
+def test_extracts_structured_checkin():
+    checkin = extract_checkin(SAMPLE + " I have cramps and a headache, but no bloating.")
+
+    assert checkin == {
+        "last_period_date": "2025-11-18",
+        "cycle_length": 28,
+        "mood": "anxious",
+        "symptoms": ["cramps", "headache"],
+        "crisis": False,
+    }
+    assert extract_checkin("Last period 2025-11-01, I'm on a 30-day cycle, feeling happy")["cycle_length"] == 30
+
+
+def test_incomplete_messages_are_not_structured():
+    assert extract_checkin("Hi, I'd like to track my cycle") is None
+    assert extract_checkin("My last period started on 2025-11-18 and I feel anxious") is None
+    assert extract_checkin("Period on 2025-11-18, cycle length is 28 days") is None
+
+
+def test_fast_path_runs_tools_without_model_calls():
+    result = asyncio.run(run_fast_path(SAMPLE, user_id="fast_path_test_user", runner=None, record=False))
+
+    assert result["llm_calls"] == 0
+    assert result["cycle"]["current_phase"] in result["response"]
+    assert result["recommendations"]["status"] == "success"
+
+
+def test_crisis_messages_take_the_full_pipeline():
+    message = SAMPLE + " Honestly I've been thinking about suicide."
+    assert extract_checkin(message)["crisis"] is True
+    assert asyncio.run(run_fast_path(message, runner=None, record=False)) is None
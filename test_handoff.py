@@ -0,0 +1,90 @@
+from types import SimpleNamespace
+
+from google.genai import types
+
+from pipeline.handoff import (
+    HANDOFF_STATE_KEY, estimate_content_tokens, pattern_id, record_analysis_handoff, record_handoff_tool_result,
+    record_intake_handoff, report_has_crisis, start_turn_handoff, trim_contents,
+)
+from pipeline.response_cache import wellness_response_cache
+from pipeline.stub_model import PIPELINE_TOOL_SCRIPT, StubLlm
+from test_stub_model import run_once
+
+PROSE = "You're in your luteal phase and feeling anxious, which is very common. " * 20
+
+
+def _text(role, text):
+    return types.Content(role=role, parts=[types.Part(text=text)])
+
+
+def test_trim_drops_old_turns_before_cutting_the_current_one():
+    old_turns = [_text("user", "a" * 800), _text("model", "b" * 800)]
+    call = types.Content(role="model", parts=[types.Part(function_call=types.FunctionCall(name="t", args={}))])
+    result = types.Content(role="user", parts=[
+        types.Part(function_response=types.FunctionResponse(name="t", response={"ok": True}))
+    ])
+    contents = old_turns + [_text("user", "c" * 400), call, result]
+
+    trimmed = trim_contents(contents, budget_tokens=150)
+    assert trimmed[-2:] == [call, result]
+    assert trimmed[0].parts[0].text == "c" * 400
+    assert estimate_content_tokens(trimmed) <= 150
+
+    cut = trim_contents(contents, budget_tokens=80)
+    assert cut[0].parts[0].text.startswith("c" * 200) and cut[0].parts[0].text.endswith("[...]")
+    assert contents[2].parts[0].text == "c" * 400   # the original request is not modified
+    assert trim_contents(contents, budget_tokens=0) is contents
+
+
+def test_callbacks_build_the_handoff_record():
+    state = {}
+    tool_context = SimpleNamespace(state=state)
+    record_handoff_tool_result(SimpleNamespace(name="calculate_cycle_phase"), {}, tool_context,
+                               {"current_phase": "Luteal", "day_in_cycle": 22})
+    record_handoff_tool_result(SimpleNamespace(name="analyze_mood_patterns"), {}, tool_context, {"patterns_found": [
+        {"type": "phase_mood_correlation", "phase": "Luteal", "mood": "anxious"},
+        {"type": "symptom_pattern", "symptom": "cramps"},
+    ]})
+    context = SimpleNamespace(state=state, user_content=_text("user", "Feeling Anxious, no headache but cramps"))
+    record_intake_handoff(context)
+    assert state[HANDOFF_STATE_KEY] == {"phase": "Luteal", "day_in_cycle": 22, "mood": "anxious",
+                                        "symptoms": ["cramps"], "crisis_flag": False,
+                                        "pattern_ids": ["phase_mood:Luteal:anxious", "symptom:cramps"]}
+
+    state["analysis_report"] = "Anxiety fits the luteal phase. No signs of severe depression or self-harm."
+    record_analysis_handoff(context)
+    assert state[HANDOFF_STATE_KEY]["crisis_flag"] is False
+
+    state["analysis_report"] = "They mentioned self-harm - FLAG: please reach out for support."
+    record_analysis_handoff(context)
+    assert state[HANDOFF_STATE_KEY]["crisis_flag"] is True
+    assert pattern_id({"type": "overall_trend", "trend": "predominantly_negative"}) == "trend:predominantly_negative"
+
+    # The next turn starts empty: no phase, patterns, symptoms or crisis flag from this one
+    next_turn = SimpleNamespace(state=state, user_content=_text("user", "Feeling calm today"))
+    start_turn_handoff(next_turn)
+    record_intake_handoff(next_turn)
+    assert state[HANDOFF_STATE_KEY] == {"phase": None, "day_in_cycle": None, "mood": "calm", "symptoms": [],
+                                        "crisis_flag": False, "pattern_ids": []}
+
+
+def test_compact_handoff_cuts_prompt_tokens_of_later_stages():
+    tokens = {}
+    for compact in (True, False):
+        wellness_response_cache.clear()
+        model = StubLlm(latency_s=0, tool_calls=PIPELINE_TOOL_SCRIPT, response_text=PROSE)
+        session, snapshot = run_once(model, "I feel anxious and have cramps", compact_handoff=compact)
+        tokens[compact] = {name: s["prompt_tokens"] for name, s in snapshot.items() if name.startswith("model:")}
+        assert session.state[HANDOFF_STATE_KEY]["phase"] == "Luteal"
+        assert session.state[HANDOFF_STATE_KEY]["mood"] == "anxious"
+
+    assert tokens[True]["model:IntakeAgent"] == tokens[False]["model:IntakeAgent"]
+    for stage in ("model:AnalysisAgent", "model:WellnessCoachAgent"):
+        assert tokens[True][stage] < tokens[False][stage] / 2
+
+
+def test_the_reports_crisis_field_decides_over_its_wording():
+    assert report_has_crisis("Mood is low but steady.\nCRISIS: yes")
+    assert not report_has_crisis("I checked for severe depression and self-harm.\n**CRISIS:** no")
+    assert not report_has_crisis("The user does not report suicidal thoughts, and denies any self-harm.")
+    assert report_has_crisis("Not sleeping well, and wrote: I want to end my life")
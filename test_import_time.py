@@ -0,0 +1,48 @@
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Budgets for `import main`, measured with `python -X importtime` (override via environment).
+# Almost all of the total is google-adk/google-genai; our own modules get a much tighter budget.
+TOTAL_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "4000"))
+FIRST_PARTY_BUDGET_MS = float(os.getenv("FIRST_PARTY_IMPORT_BUDGET_MS", "150"))
+FIRST_PARTY = re.compile(r"^(main|config|agents|tools|utils|pipeline)(\.|$)")
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def _import_main():
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c",
+         "import threading\n"
+         "import main\n"
+         "assert threading.active_count() == 1, threading.enumerate()   # log and span threads start on first use\n"
+         "from utils.memory_manager import cycle_data_store\n"
+         "assert not cycle_data_store['cycle_info'] and not len(cycle_data_store['mood_logs'])\n"
+         "assert not len(cycle_data_store['patterns'])\n"],
+        cwd=ROOT, capture_output=True, text=True, timeout=120,
+    )
+
+
+def test_import_main_is_silent_side_effect_free_and_within_budget():
+    result = _import_main()
+    assert result.returncode == 0, result.stderr[-2000:]
+    assert result.stdout == ""
+
+    total_us = 0
+    first_party_us = 0
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, _, module = match.groups()
+        if module == "main":
+            total_us = int(cumulative_us)
+        if FIRST_PARTY.match(module):
+            first_party_us += int(self_us)
+
+    assert 0 < total_us / 1000 <= TOTAL_BUDGET_MS
+    assert first_party_us / 1000 <= FIRST_PARTY_BUDGET_MS
@@ -0,0 +1,97 @@
+import io
+import json
+import random
+
+import pytest
+
+from utils import memory_manager
+from utils.ingest import build_batch, ingest_mood_logs
+from utils.mood_table import MoodLogTable
+from utils.sqlite_store import SQLiteDatabase, SQLiteMoodLogStore
+
+PHASES = ["Menstrual", "Follicular", "Ovulation", "Luteal"]
+
+
+def _rows(count, seed=0):
+    rng = random.Random(seed)
+    return [{"user_id": f"u{rng.randrange(3)}", "date": f"2025-11-{rng.randrange(1, 8):02d}",
+             "cycle_phase": rng.choice(PHASES), "mood": rng.choice(["calm", "anxious", "tired"]),
+             "symptoms": rng.sample(["cramps", "headache", "fatigue"], rng.randrange(3)),
+             "notes": rng.choice(["", "long day"]), "logged_at": f"2025-11-20T08:00:{i % 60:02d}"}
+            for i in range(count)]
+
+
+def test_bulk_extend_matches_one_append_per_row():
+    rows = _rows(300)
+    appended = MoodLogTable()
+    for row in rows:
+        appended.append(row)
+
+    bulk = MoodLogTable()
+    bulk.append(rows[0])
+    for start in range(1, 300, 70):   # later batches land between stored same-day rows
+        batch, errors = build_batch(rows[start:start + 70])
+        assert not errors
+        bulk.extend(batch)
+
+    assert len(bulk) == len(appended) == 300
+    for user_id in ("u0", "u1", "u2"):
+        for phase in (None, "luteal"):
+            assert bulk.query(user_id, limit=500, cycle_phase=phase) == \
+                appended.query(user_id, limit=500, cycle_phase=phase)
+    assert list(bulk) == list(appended)
+
+
+def test_invalid_rows_are_reported_and_skipped():
+    csv_text = (
+        "date,cycle_phase,mood,symptoms,notes\n"
+        "2025-11-20,Follicular,energetic,,\n"
+        "2025-11-31,Luteal,anxious,cramps;fatigue,\n"    # no such day
+        "2025-11-28,luteal ,anxious,cramps; fatigue,stressed\n"
+        "2025-11-29,Winter,sad,,\n"                      # kept as spelled, like add_mood_log()
+        "2025-11-30,,sad,,\n"
+    )
+    table = MoodLogTable()
+    report = ingest_mood_logs(io.StringIO(csv_text), table, fmt="csv", user_id="me")
+
+    assert (report.rows_read, report.rows_accepted, report.rows_rejected) == (5, 3, 2)
+    assert [(row, error.split(",")[0]) for row, error in report.errors] == \
+        [(2, "invalid date"), (5, "missing cycle_phase")]
+    assert table.query("me", limit=1)[0]["cycle_phase"] == "Winter"
+    newest = table.query("me", limit=1, cycle_phase="luteal")[0]
+    assert newest["cycle_phase"] == "Luteal" and newest["symptoms"] == ["cramps", "fatigue"]
+    assert newest["notes"] == "stressed" and newest["logged_at"]
+
+
+def test_jsonl_file_into_sqlite(tmp_path):
+    rows = _rows(50, seed=1)
+    path = tmp_path / "history.jsonl"
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows))
+    db = SQLiteDatabase(":memory:", batch_size=16)
+    store, table = SQLiteMoodLogStore(db), MoodLogTable()
+
+    assert ingest_mood_logs(str(path), store).rows_accepted == 50
+    assert ingest_mood_logs(str(path), table).rows_accepted == 50
+    for user_id in ("u0", "u1", "u2"):
+        assert [(log["date"], sorted(log["symptoms"]), log["logged_at"]) for log in store.query(user_id, 50)] == \
+            [(log["date"], sorted(log["symptoms"]), log["logged_at"]) for log in table.query(user_id, 50)]
+    db.close()
+    with pytest.raises(ValueError):
+        ingest_mood_logs(str(tmp_path / "history.txt"), table)
+
+
+def test_import_refreshes_pattern_aggregates():
+    user_id = "import_test_user"
+    memory_manager.clear_all_data(user_id)
+    memory_manager.add_mood_log("2025-11-01", "Luteal", "anxious", [], user_id=user_id)
+    assert memory_manager.get_mood_patterns(user_id)["total_logs_analyzed"] == 1
+
+    report = memory_manager.import_mood_logs(
+        [{"date": "2025-11-02", "cycle_phase": "Luteal", "mood": "anxious", "symptoms": ["cramps"]}] * 3,
+        user_id=user_id)
+    assert report["rows_accepted"] == 3
+    patterns = memory_manager.get_mood_patterns(user_id)
+    assert patterns["total_logs_analyzed"] == 4
+    assert {"type": "phase_mood_correlation", "phase": "Luteal", "mood": "anxious"}.items() <= \
+        patterns["patterns_found"][0].items()
+    memory_manager.clear_all_data(user_id)
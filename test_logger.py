@@ -0,0 +1,94 @@
+import io
+import logging
+import os
+import threading
+
+import pytest
+
+from utils import logger as logger_module
+from utils.logger import configure_logging, flush_logs, log_agent_start, log_tool_call, logger
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    path = str(tmp_path / "agent.log")
+    yield path
+    configure_logging()
+
+
+class CountingStr:
+    def __init__(self):
+        self.calls = 0
+
+    def __str__(self):
+        self.calls += 1
+        return "counted"
+
+
+def test_queue_mode_writes_from_listener_thread(log_file):
+    stream = io.StringIO()
+    configure_logging("queue", log_file=log_file, stream=stream)
+    writers = set()
+    original_emit = logger_module.BatchedRotatingFileHandler.emit
+
+    def tracking_emit(handler, record):
+        writers.add(threading.current_thread().name)
+        original_emit(handler, record)
+
+    logger_module.BatchedRotatingFileHandler.emit = tracking_emit
+    try:
+        log_agent_start("IntakeAgent", "x" * 500)
+        log_tool_call("cycle_calculator", {"cycle_length": 28})
+        flush_logs()
+    finally:
+        logger_module.BatchedRotatingFileHandler.emit = original_emit
+
+    lines = open(log_file).read().splitlines()
+    assert len(lines) == 2
+    assert lines[0].endswith("AGENT START: IntakeAgent | User Message: " + "x" * 100 + "...")
+    assert "Arguments: {'cycle_length': 28}" in lines[1]
+    assert stream.getvalue().splitlines() == lines
+    assert threading.current_thread().name not in writers
+
+
+def test_arguments_are_captured_at_log_time(log_file):
+    configure_logging("queue", log_file=log_file, stream=None)
+    args = {"cycle_length": 28}
+    log_tool_call("cycle_calculator", args)
+    args["cycle_length"] = 35
+    flush_logs()
+    assert "{'cycle_length': 28}" in open(log_file).read()
+
+
+def test_disabled_level_formats_nothing(log_file):
+    configure_logging("queue", log_file=log_file, stream=None)
+    value = CountingStr()
+    logger.setLevel(logging.WARNING)
+    try:
+        log_agent_start(value, "hello")
+    finally:
+        logger.setLevel(logging.INFO)
+    assert value.calls == 0
+
+
+def test_file_rotates_at_max_bytes(log_file):
+    configure_logging("queue", log_file=log_file, stream=None, max_bytes=2000, backup_count=2)
+    for i in range(100):
+        log_tool_call("cycle_calculator", {"i": i})
+    flush_logs()
+    assert os.path.exists(log_file + ".1") and os.path.exists(log_file + ".2")
+    assert not os.path.exists(log_file + ".3")
+    assert os.path.getsize(log_file) <= 2000
+
+
+def test_sync_mode_writes_immediately(log_file):
+    stream = io.StringIO()
+    configure_logging("sync", log_file=log_file, stream=stream)
+    log_tool_call("cycle_calculator", {})
+    assert "TOOL CALL: cycle_calculator" in stream.getvalue()
+    assert "TOOL CALL: cycle_calculator" in open(log_file).read()
+
+
+def test_unknown_mode_is_rejected(log_file):
+    with pytest.raises(ValueError):
+        configure_logging("bogus", log_file=log_file)
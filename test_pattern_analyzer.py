@@ -0,0 +1,142 @@
+import json
+import random
+
+from tools.pattern_analyzer import MoodPatternAggregate, analyze_mood_logs, analyze_mood_patterns
+from utils import memory_manager
+
+MOODS = ["anxious", "sad", "irritable", "happy", "energetic", "calm", "tired", ""]
+SYMPTOMS = ["cramps", "fatigue", "headache", "bloating", "acne"]
+PHASES = ["Menstrual", "Follicular", "Ovulation", "Luteal", "Unknown"]
+
+
+def _random_logs(n, seed=7):
+    rng = random.Random(seed)
+    return [{
+        "date": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        "cycle_phase": rng.choice(PHASES),
+        # A skewed distribution keeps most-common ties out of the comparison
+        "mood": rng.choices(MOODS, weights=[8, 4, 2, 6, 1, 3, 5, 1])[0],
+        "symptoms": rng.sample(SYMPTOMS, rng.randint(0, 3)),
+    } for _ in range(n)]
+
+
+def _reference_patterns(logs):
+    # The original list-based algorithm, reduced to (kind, key, frequency) tuples
+    phase_moods = {"Menstrual": [], "Follicular": [], "Ovulation": [], "Luteal": []}
+    symptom_frequency = {}
+    for log in logs:
+        if log["cycle_phase"] in phase_moods and log["mood"]:
+            phase_moods[log["cycle_phase"]].append(log["mood"])
+        for symptom in log["symptoms"]:
+            symptom_frequency[symptom] = symptom_frequency.get(symptom, 0) + 1
+    found = []
+    for phase, moods in phase_moods.items():
+        if moods:
+            mood = max(set(moods), key=moods.count)
+            if moods.count(mood) > 1:
+                found.append(("phase_mood_correlation", phase, mood, moods.count(mood)))
+    for symptom, count in sorted(symptom_frequency.items(), key=lambda x: x[1], reverse=True)[:3]:
+        if count > 1:
+            found.append(("symptom_pattern", symptom, count))
+    return found
+
+
+def _as_tuples(result):
+    return [(p["type"], p["phase"], p["mood"], p["frequency"]) if p["type"] == "phase_mood_correlation"
+            else (p["type"], p["symptom"], p["frequency"])
+            for p in result["patterns_found"] if p["type"] != "overall_trend"]
+
+
+def test_single_pass_matches_original_algorithm():
+    logs = _random_logs(500)
+    result = analyze_mood_patterns(json.dumps(logs))
+
+    assert result["total_logs_analyzed"] == 500
+    assert _as_tuples(result) == _reference_patterns(logs)
+
+
+def test_incremental_and_bulk_aggregates_agree():
+    logs = _random_logs(300, seed=11)
+    incremental = MoodPatternAggregate()
+    for log in logs:
+        incremental.add(log)
+    bulk = MoodPatternAggregate()
+    bulk.add_many(logs[:100])
+    bulk.add_many(logs[100:])
+
+    assert incremental.result() == bulk.result() == analyze_mood_patterns(logs)
+
+
+def test_aggregate_without_logs_reports_no_data():
+    assert MoodPatternAggregate().result()["status"] == "no_data"
+
+
+def test_memory_manager_keeps_aggregates_current():
+    user_id = "aggregate_test_user"
+    memory_manager.clear_all_data(user_id)
+    logs = [
+        {"date": "2025-11-10", "cycle_phase": "Luteal", "mood": "anxious", "symptoms": ["cramps", "fatigue"]},
+        {"date": "2025-11-12", "cycle_phase": "Luteal", "mood": "anxious", "symptoms": ["fatigue"]},
+        {"date": "2025-11-15", "cycle_phase": "Luteal", "mood": "irritable", "symptoms": ["headache", "fatigue"]},
+        {"date": "2025-11-20", "cycle_phase": "Menstrual", "mood": "tired", "symptoms": ["cramps"]},
+        {"date": "2025-11-25", "cycle_phase": "Follicular", "mood": "energetic", "symptoms": []},
+    ]
+    for log in logs:
+        memory_manager.add_mood_log(log["date"], log["cycle_phase"], log["mood"],
+                                    log["symptoms"], user_id=user_id)
+
+    expected = analyze_mood_patterns(json.dumps(logs))
+    assert memory_manager.get_mood_patterns(user_id)["patterns_found"] == expected["patterns_found"]
+
+    # A rebuilt aggregate (e.g. after a restart on a durable backend) agrees too
+    memory_manager.pattern_aggregates.pop(user_id)
+    assert memory_manager.get_mood_patterns(user_id)["patterns_found"] == expected["patterns_found"]
+
+    memory_manager.clear_all_data(user_id)
+    assert memory_manager.get_mood_patterns(user_id)["status"] == "no_data"
+
+
+def test_native_entry_points_match_the_json_tool():
+    user_id = "native_analysis_user"
+    memory_manager.clear_all_data(user_id)
+    logs = [{**log, "user_id": user_id, "notes": "", "logged_at": ""} for log in _random_logs(400, seed=3)]
+    memory_manager.import_mood_logs(logs)
+    expected = analyze_mood_patterns(json.dumps(logs))
+
+    assert analyze_mood_logs(iter(logs)) == expected
+    assert memory_manager.analyze_patterns(user_id) == expected
+    luteal = memory_manager.get_mood_logs(user_id, limit=400, cycle_phase="Luteal")
+    assert memory_manager.analyze_patterns(logs=luteal) == analyze_mood_patterns(json.dumps(luteal))
+    memory_manager.clear_all_data(user_id)
+
+
+def test_add_mood_log_stores_entries_as_given():
+    # The list store accepted any phase, any date text and repeated symptoms; so does the table
+    user_id = "as_given_user"
+    memory_manager.clear_all_data(user_id)
+    logs = [
+        {"date": "2025-11-18", "cycle_phase": "Luteal", "mood": "anxious", "symptoms": ["cramps", "fatigue"]},
+        {"date": "2025-11-19", "cycle_phase": "luteal phase", "mood": "anxious", "symptoms": ["fatigue", "cramps"]},
+        {"date": "Nov 20", "cycle_phase": "Unknown", "mood": "tired", "symptoms": ["cramps", "cramps"]},
+        {"date": "2025-11-21", "cycle_phase": "luteal", "mood": "anxious", "symptoms": []},
+    ]
+    for log in logs:
+        assert memory_manager.add_mood_log(log["date"], log["cycle_phase"], log["mood"],
+                                           log["symptoms"], user_id=user_id)
+
+    stored = memory_manager.get_mood_logs(user_id)
+    assert [{key: log[key] for key in logs[0]} for log in stored] == \
+        sorted(logs, key=lambda x: x["date"], reverse=True)
+    assert [log["date"] for log in memory_manager.get_mood_logs(user_id, cycle_phase="LUTEAL")] == \
+        ["2025-11-21", "2025-11-18"]
+
+    running = memory_manager.get_mood_patterns(user_id)
+    memory_manager.pattern_aggregates.pop(user_id)
+    assert memory_manager.get_mood_patterns(user_id) == running == analyze_mood_patterns(json.dumps(logs))
+    assert ("cramps", 4) in [(p.get("symptom"), p.get("frequency")) for p in running["patterns_found"]]
+
+    # fromisoformat() also reads ISO week dates; they are text here, kept as given
+    memory_manager.clear_all_data(user_id)
+    assert memory_manager.add_mood_log("2025-W47-6", "Luteal", "tired", [], user_id=user_id)
+    assert [log["date"] for log in memory_manager.get_mood_logs(user_id)] == ["2025-W47-6"]
+    memory_manager.clear_all_data(user_id)
@@ -0,0 +1,103 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import pytest
+
+from tools.cycle_calculator import PhaseCalendar, calculate_cycle_phase, calculate_cycle_phases, cycle_phase_result
+from utils import clock, memory_manager
+from utils.clock import FixedClock
+
+
+@pytest.fixture
+def fixed_clock():
+    pinned = FixedClock("2025-11-20T09:30:00")
+    previous = clock.set_clock(pinned)
+    yield pinned
+    clock.set_clock(previous)
+
+
+def test_lookups_match_the_batch_calculator():
+    rng = random.Random(3)
+    for _ in range(50):
+        start, length = date(2025, 1, 1) + timedelta(days=rng.randrange(300)), rng.randint(15, 45)
+        calendar = PhaseCalendar(start, length)
+        # Before the start, inside the first cycle and well past it
+        days = [start + timedelta(days=offset) for offset in range(-40, 4 * length)]
+        for day in days:
+            columns = calculate_cycle_phases([start], [length], today=day)
+            assert calendar.phase_on(day) == columns["current_phase"][0]
+            assert calendar.days_until_next_period(day) == columns["days_until_next_period"][0]
+            assert calendar.next_period_date(day) == columns["next_period_date"][0].astype(date)
+            assert calendar.snapshot(day) == cycle_phase_result(columns)
+
+            first, last = calendar.next_ovulation_window(day)
+            assert last >= day and (last - first).days == 2
+            assert {calendar.phase_on(first + timedelta(days=i)) for i in range(3)} == {"Ovulation"}
+            assert calendar.phase_on(first - timedelta(days=1)) != "Ovulation"
+
+
+def test_snapshots_are_fresh_per_call_on_a_shared_calendar():
+    calendar = PhaseCalendar("2025-10-01", 29)
+    days = [date(2025, 10, 1) + timedelta(days=offset) for offset in range(400)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        snapshots = list(pool.map(calendar.snapshot, days * 5))
+    for day, snapshot in zip(days * 5, snapshots):
+        assert snapshot["day_in_cycle"] == calendar.day_in_cycle(day)
+        assert snapshot["current_phase"] == calendar.phase_on(day)
+        assert snapshot["next_period_date"] == calendar.next_period_date(day).isoformat()
+    assert snapshots[0] is not calendar.snapshot(days[0])
+
+
+def test_the_tool_reads_the_injected_clock(fixed_clock):
+    result = calculate_cycle_phase("2025-11-18", 28)
+    assert (result["day_in_cycle"], result["current_phase"], result["next_period_date"]) == (2, "Menstrual", "2025-12-16")
+    assert calculate_cycle_phase("2025-11-18", 28) == result
+
+    fixed_clock.advance(days=13)
+    assert calculate_cycle_phase("2025-11-18", 28)["current_phase"] == "Ovulation"
+    assert "positive" in calculate_cycle_phase("2025-11-18", 0)["error"]
+    assert "Invalid date format" in calculate_cycle_phase("20251118", 28)["error"]
+
+
+def test_calendar_is_regenerated_only_when_the_cycle_changes(fixed_clock):
+    user_id = "phase_calendar_user"
+    memory_manager.clear_all_data(user_id)
+    assert memory_manager.get_today_snapshot(user_id) is None
+
+    memory_manager.store_cycle_info("2025-10-01", 30, user_id=user_id)
+    calendar = memory_manager.get_phase_calendar(user_id)
+    memory_manager.store_cycle_info("2025-10-01", 30, user_id=user_id)
+    assert memory_manager.get_phase_calendar(user_id) is calendar
+
+    memory_manager.store_cycle_info("2025-10-29", 30, user_id=user_id)   # a 28-day cycle is learned
+    calendar = memory_manager.get_phase_calendar(user_id)
+    assert (calendar.last_period_date, calendar.cycle_length) == ("2025-10-29", 28)
+
+    snapshot = memory_manager.get_today_snapshot(user_id)
+    assert (snapshot["day_in_cycle"], snapshot["days_until_next_period"]) == (22, 6)
+    assert (snapshot["next_ovulation_start"], snapshot["next_ovulation_end"]) == ("2025-12-10", "2025-12-12")
+    assert memory_manager.get_today_snapshot(user_id, today="2025-11-12")["current_phase"] == "Ovulation"
+
+    memory_manager.phase_calendars.clear()   # e.g. after a restart with the SQLite backend
+    assert memory_manager.get_today_snapshot(user_id) == snapshot
+    memory_manager.clear_all_data(user_id)
+    assert user_id not in memory_manager.phase_calendars
+
+
+def test_invalid_cycle_info_is_not_stored(fixed_clock):
+    user_id = "phase_calendar_invalid_user"
+    memory_manager.clear_all_data(user_id)
+    assert memory_manager.store_cycle_info("2025-11-01", "28", user_id=user_id)
+    assert memory_manager.get_cycle_insights(user_id)["cycle_length"] == 28
+    snapshot = memory_manager.get_today_snapshot(user_id)
+
+    for last_period, cycle_length in [("2025-11-18", 0), ("2025-11-18", -3), ("2025-11-18", "a month"),
+                                      ("2025-13-01", 28)]:
+        assert not memory_manager.store_cycle_info(last_period, cycle_length, user_id=user_id)
+    assert memory_manager.get_cycle_info(user_id)["last_period_date"] == "2025-11-01"
+    assert memory_manager.get_today_snapshot(user_id) == snapshot
+    memory_manager.cycle_models.clear()
+    memory_manager.phase_calendars.clear()
+    assert memory_manager.get_today_snapshot(user_id) == snapshot
+    memory_manager.clear_all_data(user_id)
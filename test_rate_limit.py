@@ -0,0 +1,169 @@
+import asyncio
+import random
+import time
+from typing import Dict
+
+import pytest
+from google.genai import errors, types
+from pydantic import PrivateAttr
+
+from setup import InMemoryRunner
+from agents.root_agent import create_app, create_root_agent
+from pipeline.rate_limit import (AimdLimiter, DeadlineExceededError, GuardedLlm, ModelGate, RetryPolicy,
+                                 TokenBucket)
+from pipeline.response_cache import wellness_response_cache
+from pipeline.streaming import BufferedLlm
+from pipeline.stub_model import PIPELINE_TOOL_SCRIPT, StubLlm
+from utils.telemetry import Telemetry
+
+
+def run_pipeline(model, requests=1, concurrency=1):
+    wellness_response_cache.clear()
+    collector = Telemetry(spans_file=None)
+    runner = InMemoryRunner(app=create_app(create_root_agent(model), collector=collector))
+
+    async def one(i):
+        session = await runner.session_service.create_session(app_name=runner.app_name, user_id=f"u{i}")
+        content = types.Content(role="user", parts=[types.Part(text="I feel anxious")])
+        async for _ in runner.run_async(user_id=f"u{i}", session_id=session.id, new_message=content):
+            pass
+
+    async def scenario():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def limited(i):
+            async with semaphore:
+                await one(i)
+
+        return await asyncio.gather(*(limited(i) for i in range(requests)), return_exceptions=True)
+
+    return asyncio.run(scenario()), collector.snapshot()
+
+
+def test_token_bucket_spaces_calls_after_the_burst():
+    bucket = TokenBucket(rate_per_s=100, burst=3)
+    waits = [bucket.reserve() for _ in range(6)]
+    assert waits[:3] == [0.0, 0.0, 0.0]
+    assert waits[3:] == pytest.approx([0.01, 0.02, 0.03], abs=0.002)
+    assert bucket.reserve(deadline=time.monotonic() + 0.01) is None
+
+
+def test_aimd_limiter_halves_on_overload_and_grows_back():
+    limiter = AimdLimiter(initial=8, min_limit=1, max_limit=8, cooldown_s=0)
+    limiter.on_overload()
+    assert limiter.limit == 4
+    limiter.on_overload()
+    limiter.on_overload()
+    limiter.on_overload()
+    assert limiter.limit == 1
+    for _ in range(10):
+        limiter.on_success()
+    assert 3 < limiter.limit < 5
+
+
+def test_aimd_limiter_hands_slots_to_waiters_in_order():
+    limiter = AimdLimiter(initial=1, max_limit=1)
+    order = []
+
+    async def worker(i):
+        await limiter.acquire()
+        order.append(i)
+        await asyncio.sleep(0.001)
+        limiter.release()
+
+    async def scenario():
+        await asyncio.gather(*(worker(i) for i in range(5)))
+        with pytest.raises(DeadlineExceededError):
+            await limiter.acquire()
+            await limiter.acquire(deadline=time.monotonic() + 0.01)
+        assert limiter.in_flight == 1
+
+    asyncio.run(scenario())
+    assert order == [0, 1, 2, 3, 4]
+
+
+class FailFirstStubLlm(StubLlm):
+    """Stub whose every model call fails its first `fail_first` attempts with a 429."""
+
+    fail_first: int = 0
+    _failed: Dict[int, list] = PrivateAttr(default_factory=dict)
+
+    async def generate_content_async(self, llm_request, stream=False):
+        # Retries resend the same request object; holding it keeps its id from being reused
+        failed = self._failed.setdefault(id(llm_request), [llm_request, 0])
+        if failed[1] < self.fail_first:
+            failed[1] += 1
+            errors.APIError.raise_error(429, {"error": {"code": 429, "message": "Scripted by FailFirstStubLlm",
+                                                        "status": "RESOURCE_EXHAUSTED"}}, None)
+        async for response in super().generate_content_async(llm_request, stream):
+            yield response
+
+    @property
+    def model_calls(self) -> int:
+        return len(self._failed)
+
+
+def _scripted_gate(max_attempts):
+    return ModelGate(rate_per_s=float("inf"), initial_concurrency=4, max_concurrency=4,
+                     retry_policy=RetryPolicy(max_attempts=max_attempts, base_delay_s=0.001, max_delay_s=0.01,
+                                              rng=random.Random(1)))
+
+
+def test_guarded_model_retries_injected_errors():
+    stub = FailFirstStubLlm(latency_s=0, fail_first=2, tool_calls=PIPELINE_TOOL_SCRIPT)
+    gate = _scripted_gate(max_attempts=3)
+    results, snapshot = run_pipeline(GuardedLlm.wrap(stub, gate), requests=5, concurrency=5)
+
+    assert not [r for r in results if isinstance(r, Exception)]
+    calls = stub.model_calls
+    assert calls and stub.stats()["calls"] == calls   # each call reached the stub once, after its errors
+    assert (gate.attempts, gate.retries, gate.failures) == (3 * calls, 2 * calls, 0)
+    assert sum(s["retries"] for name, s in snapshot.items() if name.startswith("model:")) == gate.retries
+
+
+def test_guarded_model_gives_up_after_max_attempts():
+    stub = FailFirstStubLlm(latency_s=0, fail_first=3, tool_calls=PIPELINE_TOOL_SCRIPT)
+    gate = _scripted_gate(max_attempts=3)
+    results, _ = run_pipeline(GuardedLlm.wrap(stub, gate), requests=4, concurrency=4)
+
+    # Every request stops at its first model call
+    assert all(isinstance(r, errors.ClientError) and r.code == 429 for r in results)
+    assert stub.model_calls == 4 and stub.stats()["calls"] == 0
+    assert (gate.attempts, gate.retries, gate.failures, gate.deadline_exceeded) == (12, 8, 4, 0)
+
+
+def test_retries_stop_at_the_request_deadline():
+    stub = StubLlm(latency_s=0, error_rate=1.0, error_codes=(503,))
+    gate = ModelGate(rate_per_s=float("inf"),
+                     retry_policy=RetryPolicy(max_attempts=100, base_delay_s=0.05, max_delay_s=0.05, deadline_s=0.2))
+    started = time.monotonic()
+    results, _ = run_pipeline(GuardedLlm.wrap(stub, gate))
+
+    assert isinstance(results[0], errors.ServerError)
+    assert time.monotonic() - started < 1.0
+    assert gate.deadline_exceeded == 1 and gate.failures == 1
+    assert gate.concurrency.limit < gate.concurrency.max_limit
+
+
+def test_shared_gate_keeps_all_agents_under_the_quota():
+    stub = StubLlm(latency_s=0.005, quota_per_s=50, tool_calls=PIPELINE_TOOL_SCRIPT)
+    gate = ModelGate(rate_per_s=45, burst=10, initial_concurrency=8, max_concurrency=8)
+    results, _ = run_pipeline(GuardedLlm.wrap(stub, gate), requests=12, concurrency=12)
+
+    assert not [r for r in results if isinstance(r, Exception)]
+    assert stub.stats()["quota_rejections"] == 0
+    assert stub.stats()["calls"] == 12 * 6
+
+
+def test_agents_default_to_the_shared_gated_gemini_model(monkeypatch):
+    from pipeline.rate_limit import model_gate
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+    pipeline = create_root_agent()
+    models = [agent.model.inner if isinstance(agent.model, BufferedLlm) else agent.model
+              for agent in pipeline.sub_agents]
+    assert [isinstance(agent.model, BufferedLlm) for agent in pipeline.sub_agents] == [True, True, False]
+    assert all(isinstance(model, GuardedLlm) and model.gate is model_gate for model in models)
+    assert all(model.inner.retry_options.attempts == 1 for model in models)
+    # The client google-genai builds makes one attempt per call, so its retries never multiply the gate's
+    client_options = models[0].inner.api_client._api_client._http_options.retry_options
+    assert client_options.attempts == 1
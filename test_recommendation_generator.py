@@ -0,0 +1,32 @@
+import itertools
+
+from tools.recommendation_generator import generate_recommendations
+
+
+def test_output_is_deterministic_for_any_symptom_order():
+    results = {
+        repr(generate_recommendations("Luteal", "anxious", list(order)))
+        for order in itertools.permutations(["cramps", "headache", "bloating"])
+    }
+    assert len(results) == 1
+
+    symptom_tips = generate_recommendations("luteal", "Anxious", ["bloating", "headache"])["recommendations"][2]
+    # Tips follow table order (headache before bloating), not the order symptoms were given in
+    assert symptom_tips["suggestions"] == ["Stay hydrated", "Dim lighting", "Peppermint tea", "Cold compress"]
+
+
+def test_results_are_independent_copies():
+    first = generate_recommendations("Menstrual", "tired", ["cramps"])
+    first["recommendations"][0]["suggestions"].append("mutated")
+    first["recommendations"][0]["avoid"].clear()
+
+    second = generate_recommendations("Menstrual", "tired", ["cramps"])
+    assert "mutated" not in second["recommendations"][0]["suggestions"]
+    assert second["recommendations"][0]["avoid"] == ["Intense exercise", "Major decisions", "Overcommitting"]
+
+
+def test_unknown_inputs_still_succeed():
+    result = generate_recommendations("Follicular", "energetic", None)
+    assert result["status"] == "success"
+    assert [rec["category"] for rec in result["recommendations"]] == ["Phase-Based"]
+    assert generate_recommendations("Unknown", "meh", ["itchy"])["recommendations"] == []
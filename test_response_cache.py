@@ -0,0 +1,88 @@
+from types import SimpleNamespace
+
+from google.genai import types
+
+from pipeline.handoff import HANDOFF_STATE_KEY
+from pipeline.response_cache import (
+    ResponseCache, check_wellness_cache, make_cache_key, store_wellness_response, wellness_response_cache,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_key_is_normalized():
+    assert make_cache_key("Luteal", "Anxious ", ["Cramps", "fatigue", "cramps"]) == \
+        make_cache_key(" luteal", "anxious", ["fatigue", "cramps"]) == "luteal||anxious|cramps,fatigue|"
+    assert make_cache_key("Luteal", "anxious", [], 22, ["symptom:cramps", "phase_mood:Luteal:anxious"]) == \
+        "luteal|22|anxious||phase_mood:Luteal:anxious,symptom:cramps"
+
+
+def test_ttl_lru_and_metrics():
+    clock = FakeClock()
+    cache = ResponseCache(max_entries=2, ttl_seconds=10, clock=clock)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert cache.get("a") == "A"      # "a" is now most recently used
+    cache.put("c", "C")               # evicts "b"
+    assert cache.get("b") is None
+
+    clock.now = 11
+    assert cache.get("a") is None     # expired
+    assert cache.stats() == {"size": 1, "hits": 1, "misses": 2, "bypasses": 0,
+                             "evictions": 1, "expirations": 1, "hit_rate": 1 / 3}
+
+
+def _context(text, crisis_flag=False, **handoff):
+    handoff = {"phase": "Luteal", "day_in_cycle": 22, "mood": "anxious", "symptoms": ["cramps"],
+               "crisis_flag": crisis_flag, "pattern_ids": [], **handoff}
+    return SimpleNamespace(state={HANDOFF_STATE_KEY: handoff},
+                           user_content=types.Content(role="user", parts=[types.Part(text=text)]))
+
+
+def test_wellness_callbacks_cache_by_handoff_record():
+    wellness_response_cache.clear()
+    first = _context("I feel anxious, with cramps")
+    assert check_wellness_cache(first) is None
+    first.state["wellness_recommendations"] = "Be gentle with yourself."
+    store_wellness_response(first)
+
+    second = _context("Feeling ANXIOUS today. Cramps again.", symptoms=["Cramps", "cramps"])
+    cached = check_wellness_cache(second)
+    assert cached.parts[0].text == "Be gentle with yourself."
+    assert second.state["wellness_recommendations"] == "Be gentle with yourself."
+    assert wellness_response_cache.stats()["hits"] == 1
+
+
+def test_replies_are_not_shared_across_different_histories_or_cycle_days():
+    wellness_response_cache.clear()
+    first = _context("I feel anxious, with cramps", pattern_ids=["phase_mood:Luteal:anxious"])
+    check_wellness_cache(first)
+    first.state["wellness_recommendations"] = "Anxiety tends to rise for you in your luteal phase."
+    store_wellness_response(first)
+
+    # Another user with the same phase, mood and symptoms but no such pattern, or a different day
+    assert check_wellness_cache(_context("I feel anxious, with cramps")) is None
+    assert check_wellness_cache(_context("I feel anxious, with cramps", day_in_cycle=25,
+                                         pattern_ids=["phase_mood:Luteal:anxious"])) is None
+    assert wellness_response_cache.stats()["hits"] == 0
+
+
+def test_crisis_signals_bypass_the_cache():
+    wellness_response_cache.clear()
+    wellness_response_cache.put(make_cache_key("Luteal", "sad", [], 22), "cached")
+
+    assert check_wellness_cache(_context("I'm sad and want to end my life", mood="sad", symptoms=[])) is None
+    assert check_wellness_cache(_context("I'm sad", crisis_flag=True, mood="sad", symptoms=[])) is None
+    assert wellness_response_cache.stats()["bypasses"] == 2
+    assert wellness_response_cache.stats()["hits"] == 0
+
+    # A routine analysis that mentions "no crisis signals" does not keep the reply out of the cache
+    routine = _context("I'm sad", mood="sad", symptoms=[])
+    routine.state["analysis_report"] = "No crisis signals. Mood is typical for the luteal phase."
+    assert check_wellness_cache(routine).parts[0].text == "cached"
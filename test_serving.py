@@ -0,0 +1,79 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from google.genai import types
+
+from setup import InMemoryRunner
+from agents.root_agent import create_root_agent
+from pipeline.serving import PipelineServer, ServerOverloadedError
+from pipeline.stub_model import StubLlm
+
+
+class FakeSessionService:
+    async def get_session(self, **kwargs):
+        return None
+
+    async def create_session(self, **kwargs):
+        return SimpleNamespace(id=kwargs["session_id"])
+
+
+class FakeRunner:
+    """Echoes the message after a delay and records concurrency and per-session order."""
+
+    app_name = "test"
+
+    def __init__(self, delay=0.01):
+        self.session_service = FakeSessionService()
+        self.delay = delay
+        self.running = 0
+        self.max_running = 0
+        self.seen = {}
+
+    async def run_async(self, user_id, session_id, new_message):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        text = new_message.parts[0].text
+        self.seen.setdefault(session_id, []).append(text)
+        await asyncio.sleep(self.delay)
+        self.running -= 1
+        yield SimpleNamespace(is_final_response=lambda: True,
+                              content=types.Content(role="model", parts=[types.Part(text=f"echo {text}")]))
+
+
+def test_concurrency_is_bounded_and_sessions_stay_ordered():
+    runner = FakeRunner()
+    server = PipelineServer(runner, max_concurrency=4, max_queue=100)
+
+    async def scenario():
+        return await asyncio.gather(*(server.submit("u", f"s{i % 5}", f"{i // 5}") for i in range(40)))
+
+    responses = asyncio.run(scenario())
+
+    assert responses[0] == "echo 0"
+    assert runner.max_running == 4
+    assert all(messages == [str(n) for n in range(8)] for messages in runner.seen.values())
+    assert server.stats() == {"queued": 0, "in_flight": 0, "completed": 40, "failed": 0,
+                              "rejected": 0, "active_sessions": 0}
+
+
+def test_full_queue_rejects_when_not_blocking():
+    server = PipelineServer(FakeRunner(delay=0.05), max_concurrency=1, max_queue=2, block_when_full=False)
+
+    async def scenario():
+        return await asyncio.gather(*(server.submit("u", f"s{i}", "hi") for i in range(3)),
+                                    return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert sum(isinstance(r, ServerOverloadedError) for r in results) == 1
+    assert server.stats()["rejected"] == 1
+
+
+def test_serves_real_pipeline_with_stub_model():
+    runner = InMemoryRunner(agent=create_root_agent(StubLlm(latency_s=0, response_text="stub reply")))
+    server = PipelineServer(runner, max_concurrency=2)
+
+    async def scenario():
+        return await asyncio.gather(*(server.submit(f"user_{i}", "s", "I feel tired") for i in range(3)))
+
+    assert asyncio.run(scenario()) == ["stub reply"] * 3
@@ -0,0 +1,224 @@
+import gc
+import random
+import tracemalloc
+from datetime import date, timedelta
+
+import pytest
+
+from utils import memory_manager
+from utils.mood_table import MoodLogTable, MoodRecord, Phase
+from utils.storage import PatternStore
+from utils.sqlite_store import SQLiteDatabase, SQLiteMapping, SQLiteMoodLogStore, SQLitePatternStore
+
+
+@pytest.fixture(params=["columnar", "sqlite"])
+def stores(request):
+    if request.param == "columnar":
+        yield MoodLogTable(), PatternStore()
+        return
+    db = SQLiteDatabase(":memory:", batch_size=4)
+    yield SQLiteMoodLogStore(db), SQLitePatternStore(db)
+    db.close()
+
+
+def _log(user_id, date, phase, mood="calm"):
+    return {"user_id": user_id, "date": date, "cycle_phase": phase, "mood": mood,
+            "symptoms": [], "notes": "", "logged_at": ""}
+
+
+def _reference_query(logs, user_id, limit=30, cycle_phase=None):
+    # The original list-scan implementation from memory_manager.get_mood_logs
+    logs = [log for log in logs if log["user_id"] == user_id]
+    if cycle_phase:
+        logs = [log for log in logs if log["cycle_phase"].lower() == cycle_phase.lower()]
+    return sorted(logs, key=lambda x: x["date"], reverse=True)[:limit]
+
+
+def test_query_matches_list_scan(stores):
+    store, _ = stores
+    logs = [
+        _log("a", "2025-11-20", "Follicular", "energetic"),
+        _log("b", "2025-11-21", "Luteal"),
+        _log("a", "2025-11-28", "Luteal", "anxious"),
+        _log("a", "2025-11-02", "Menstrual", "tired"),
+        _log("a", "2025-11-28", "Luteal", "irritable"),
+        _log("a", "2025-11-25", "Ovulation", "happy"),
+    ]
+    for log in logs:
+        store.append(log)
+
+    for phase in (None, "Luteal", "luteal", "Ovulation", "Unknown"):
+        for limit in (1, 2, 30):
+            assert store.query("a", limit=limit, cycle_phase=phase) == \
+                _reference_query(logs, "a", limit=limit, cycle_phase=phase)
+    assert store.query("missing") == []
+    assert len(store) == 6
+    assert store.count("a") == 5
+
+
+def test_range_and_date_queries_match_list_scan(stores):
+    store, _ = stores
+    rng = random.Random(7)
+    phases = ["Menstrual", "Follicular", "Ovulation", "Luteal"]
+    logs = [_log(rng.choice("ab"), (date(2025, 1, 1) + timedelta(days=rng.randrange(120))).isoformat(),
+                 rng.choice(phases), mood=str(i)) for i in range(400)]
+    for log in logs:
+        store.append(log)
+
+    def reference(limit, phase, start, end, dates):
+        matches = [log for log in _reference_query(logs, "a", len(logs), phase)
+                   if (start is None or log["date"] >= start) and (end is None or log["date"] <= end)
+                   and (dates is None or log["date"] in dates)]
+        return matches[:limit]
+
+    for start, end in [(None, None), ("2025-02-01", None), (None, "2025-03-10"),
+                       ("2025-02-01", "2025-03-10"), ("2025-03-10", "2025-02-01"), ("2025-06-01", None)]:
+        for dates in (None, ["2025-01-05", "2025-02-02", "2025-03-01", "2025-04-20"]):
+            for phase in (None, "Luteal"):
+                for limit in (3, 400):
+                    assert store.query("a", limit=limit, cycle_phase=phase, start=start, end=end, dates=dates) == \
+                        reference(limit, phase, start, end, dates)
+    assert store.query("a", start=date(2025, 2, 1), end=date(2025, 2, 1)) == \
+        reference(30, None, "2025-02-01", "2025-02-01", None)
+
+
+def test_phase_reads_between_out_of_order_appends(stores):
+    # Each append lands at its date's position; phase reads right after it must see it
+    store, _ = stores
+    rng = random.Random(11)
+    logs = []
+    for i in range(150):
+        logs.append(_log("a", (date(2025, 1, 1) + timedelta(days=rng.randrange(60))).isoformat(),
+                         rng.choice(["Luteal", "luteal", "Ovulation", "Unknown"]), mood=str(i)))
+        store.append(logs[-1])
+        for phase in ("Luteal", "Ovulation", "unknown"):
+            assert store.query("a", limit=5, cycle_phase=phase) == \
+                _reference_query(logs, "a", limit=5, cycle_phase=phase)
+    assert store.query("a", limit=200, cycle_phase="luteal", end="2025-01-30") == \
+        [log for log in _reference_query(logs, "a", 200, "luteal") if log["date"] <= "2025-01-30"]
+
+
+def test_cycle_queries_use_stored_cycle_info():
+    user_id = "cycle_query_user"
+    memory_manager.clear_all_data(user_id)
+    memory_manager.store_cycle_info("2025-03-01", 28, user_id=user_id)
+    for day in range(0, 120, 2):   # a log every other day from 2025-01-04
+        logged = date(2025, 1, 4) + timedelta(days=day)
+        memory_manager.add_mood_log(logged.isoformat(), "Luteal", "calm", [], user_id=user_id)
+
+    # Cycles start 2025-01-04, 02-01, 03-01 and 03-29; today is in the 03-29 cycle
+    last_two = memory_manager.get_cycle_logs(cycles=2, user_id=user_id, today="2025-04-10")
+    assert (last_two[-1]["date"], last_two[0]["date"]) == ("2025-03-01", "2025-04-10")
+    same_day = memory_manager.get_cycle_day_logs(6, cycles=4, user_id=user_id, today="2025-04-10")
+    assert [log["date"] for log in same_day] == ["2025-04-04", "2025-03-07", "2025-02-07", "2025-01-10"]
+    # Day 20 of the current cycle is still ahead
+    later = memory_manager.get_cycle_day_logs(20, cycles=2, user_id=user_id, today="2025-04-10")
+    assert [log["date"] for log in later] == ["2025-03-21"]
+    memory_manager.clear_all_data(user_id)
+    assert memory_manager.get_cycle_logs(user_id=user_id) == []
+
+
+@pytest.mark.parametrize("store", [MoodLogTable(), SQLiteMoodLogStore(SQLiteDatabase(":memory:"))],
+                         ids=["columnar", "sqlite"])
+def test_records_hold_the_same_logs_as_dicts(store):
+    store.append({**_log("a", "2025-11-28", "Luteal", "anxious"), "symptoms": ["cramps", "fatigue"],
+                  "logged_at": "2025-11-28T09:30:00"})
+    store.append(_log("a", "2025-11-20", "Follicular", "energetic"))
+
+    records = store.records("a", limit=5)
+    assert [record.to_dict() for record in records] == store.query("a", limit=5)
+    assert records[0].phase is Phase.LUTEAL and records[0].symptoms == ("cramps", "fatigue")
+    assert records[0] == MoodRecord.from_dict(store.query("a", limit=1)[0])
+    assert [record.date for record in store.records("a", cycle_phase="Follicular")] == ["2025-11-20"]
+
+
+def test_columnar_table_stays_under_64_bytes_per_log():
+    # benchmarks/bench_memory.py measures the same at scale (a list of dicts: ~600 bytes/log)
+    def logs():
+        for day in range(200):
+            for user in range(50):
+                yield {"user_id": f"user_{user}", "date": f"2025-{day // 28 + 1:02d}-{day % 28 + 1:02d}",
+                       "cycle_phase": "Luteal", "mood": ["calm", "tired"][day % 2],
+                       "symptoms": ["cramps", "acne"][:day % 3], "notes": "",
+                       "logged_at": f"2025-11-28T09:{user:02d}:{day % 60:02d}.{day:06d}"}
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    table = MoodLogTable()
+    for log in logs():
+        table.append(log)
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    assert len(table) == 10_000
+    assert held / len(table) < 64
+
+
+def test_free_text_symptoms_stay_under_64_bytes_per_log():
+    # Users type their own symptoms: thousands of distinct names, mostly in distinct combinations
+    rng = random.Random(5)
+    vocabulary = [f"symptom {i}" for i in range(3000)]
+    logs = [{"user_id": f"user_{rng.randrange(100)}", "date": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+             "cycle_phase": "Luteal", "mood": "calm", "notes": "", "logged_at": "",
+             "symptoms": rng.choices(vocabulary, k=rng.randint(0, 4))}
+            for _ in range(20_000)]
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    table = MoodLogTable()
+    for log in logs:
+        table.append(log)
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    assert len(table.symptom_vocabulary) == len(vocabulary)
+    assert held / len(table) < 64
+    user = logs[0]["user_id"]
+    assert sorted(map(tuple, (log["symptoms"] for log in table.query(user, limit=20_000)))) == \
+        sorted(tuple(log["symptoms"]) for log in logs if log["user_id"] == user)
+
+
+def test_clear_user_only_removes_that_user(stores):
+    store, _ = stores
+    store.append(_log("a", "2025-11-20", "Follicular"))
+    store.append(_log("b", "2025-11-21", "Luteal"))
+    store.clear_user("a")
+
+    assert store.query("a") == []
+    assert [log["user_id"] for log in store] == ["b"]
+    assert len(store) == 1
+
+
+def test_pattern_store_filters_by_type(stores):
+    _, store = stores
+    for user_id, pattern_type, description in [("a", "symptom_pattern", "x"),
+                                               ("a", "phase_mood_correlation", "y"),
+                                               ("b", "symptom_pattern", "z")]:
+        store.append({"user_id": user_id, "type": pattern_type, "description": description,
+                      "data": {}, "identified_at": ""})
+
+    assert [p["description"] for p in store.query("a")] == ["x", "y"]
+    assert [p["description"] for p in store.query("a", "symptom_pattern")] == ["x"]
+
+    store.clear_types(["a", "b", "missing"], ["phase_mood_correlation", "overall_trend"])
+    assert [p["description"] for p in store.query("a")] == ["x"]
+    assert store.query("a", "phase_mood_correlation") == []
+    assert [p["description"] for p in store.query("b", "symptom_pattern")] == ["z"]
+
+    store.clear_user("a")
+    assert store.query("a", "symptom_pattern") == []
+    assert len(store) == 1
+
+
+def test_sqlite_data_survives_reopen(tmp_path):
+    path = str(tmp_path / "cycle_data.db")
+    db = SQLiteDatabase(path)
+    SQLiteMoodLogStore(db).append(_log("a", "2025-11-20", "Follicular", "energetic"))
+    SQLiteMapping(db, "cycle_info")["a"] = {"last_period_date": "2025-11-18", "cycle_length": 28}
+    db.close()
+
+    db = SQLiteDatabase(path)
+    assert [log["mood"] for log in SQLiteMoodLogStore(db).query("a")] == ["energetic"]
+    assert SQLiteMapping(db, "cycle_info").get("a")["cycle_length"] == 28
+    assert SQLiteMapping(db, "user_preferences").get("a") is None
+    db.close()
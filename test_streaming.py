@@ -0,0 +1,122 @@
+import asyncio
+import contextlib
+import json
+from urllib.parse import urlencode
+
+import pytest
+from google.adk.runners import Runner
+from google.genai import types
+
+from setup import InMemoryRunner
+from agents.root_agent import create_app, create_pipeline
+from pipeline.response_cache import wellness_response_cache
+from pipeline.serving import PipelineServer, serve_sse
+from pipeline.streaming import STREAMING_RUN_CONFIG, run_session
+from pipeline.stub_model import PIPELINE_TOOL_SCRIPT, StubLlm
+from utils import memory_manager
+from utils.telemetry import Telemetry
+
+REPLY = "You're in your luteal phase, and feeling anxious now is very common. " * 4
+
+
+@pytest.fixture(autouse=True)
+def empty_response_cache():
+    wellness_response_cache.clear()
+    yield
+    wellness_response_cache.clear()
+
+
+def _server(mode="sequential"):
+    model = StubLlm(latency_s=0.01, token_interval_s=0.005, tool_calls=PIPELINE_TOOL_SCRIPT, response_text=REPLY)
+    collector = Telemetry(spans_file=None)
+    runner = InMemoryRunner(app=create_app(create_pipeline(model, mode), collector=collector))
+    return PipelineServer(runner, collector=collector), model, collector
+
+
+@pytest.mark.parametrize("mode", ["sequential", "dag"])
+def test_reply_streams_before_the_run_ends(mode):
+    server, model, collector = _server(mode)
+
+    async def scenario():
+        chunks = []
+        async for text in server.stream("u", "s1", "I feel anxious and have cramps"):
+            chunks.append(text)
+        return chunks
+
+    chunks = asyncio.run(scenario())
+    assert chunks == model.stream_chunks()
+    assert "".join(chunks) == REPLY
+
+    snapshot = collector.snapshot()
+    first_token, request = snapshot[f"first_token:{server.runner.app_name}"], snapshot[f"request:{server.runner.app_name}"]
+    assert first_token["count"] == request["count"] == 1
+    assert first_token["p50_ms"] < request["p50_ms"]
+    assert server.stats()["completed"] == 1
+
+
+def test_only_the_reply_stage_streams():
+    server, _, _ = _server()
+    runner = server.runner
+
+    async def scenario():
+        session = await runner.session_service.create_session(app_name=runner.app_name, user_id="u")
+        content = types.Content(role="user", parts=[types.Part(text="I feel anxious")])
+        return [event.author async for event in runner.run_async(
+            user_id="u", session_id=session.id, new_message=content, run_config=STREAMING_RUN_CONFIG)
+            if event.partial]
+
+    partial_authors = asyncio.run(scenario())
+    assert partial_authors and set(partial_authors) == {"WellnessCoachAgent"}
+
+
+def test_client_that_stops_reading_frees_the_session():
+    server, _, collector = _server()
+
+    async def scenario():
+        async with contextlib.aclosing(server.stream("u", "s1", "I feel anxious")) as chunks:
+            async for _ in chunks:
+                break
+        return await server.submit("u", "s1", "Still anxious today")
+
+    assert asyncio.run(scenario()) == REPLY
+    request = collector.snapshot()[f"request:{server.runner.app_name}"]
+    assert request["count"] == 2 and request["errors"] == 0
+    assert server.stats()["active_sessions"] == 0 and server.stats()["in_flight"] == 0
+
+
+def test_sse_endpoint_sends_token_events_then_done():
+    server, model, _ = _server()
+
+    async def scenario():
+        sse = await serve_sse(server, port=0)
+        port = sse.sockets[0].getsockname()[1]
+        async with sse:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            query = urlencode({"user_id": "u", "session_id": "s1", "message": "I feel anxious"})
+            writer.write(f"GET /chat?{query} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+            await writer.drain()
+            raw = (await reader.read()).decode()
+            writer.close()
+        return raw
+
+    head, _, body = asyncio.run(scenario()).partition("\r\n\r\n")
+    assert "text/event-stream" in head
+    events = [block.split("\n", 1) for block in body.strip().split("\n\n")]
+    events = [(name[len("event: "):], json.loads(data[len("data: "):])) for name, data in events]
+
+    tokens = [data["text"] for name, data in events if name == "token"]
+    assert tokens == model.stream_chunks()
+    name, done = events[-1]
+    assert name == "done" and done["response"] == REPLY
+    assert 0 < done["first_token_ms"] < done["total_ms"]
+
+
+def test_run_session_prints_the_streamed_reply(capsys):
+    model = StubLlm(latency_s=0, tool_calls=PIPELINE_TOOL_SCRIPT, response_text=REPLY)
+    app = create_app(create_pipeline(model), name=memory_manager.APP_NAME, collector=Telemetry(spans_file=None))
+    runner = Runner(app=app, session_service=memory_manager.session_service)
+
+    asyncio.run(run_session(runner, "I feel anxious and have cramps", session_id="run_session_test"))
+    assert capsys.readouterr().out.endswith(f" Agent > {REPLY}\n")
+    asyncio.run(memory_manager.run_session(runner, "Still anxious", session_id="run_session_test"))
+    assert capsys.readouterr().out.endswith(f" Agent > {REPLY}\n")
@@ -0,0 +1,68 @@
+import asyncio
+import statistics
+
+import pytest
+from google.genai import errors, types
+
+from setup import InMemoryRunner
+from agents.root_agent import create_app, create_dag_pipeline, create_root_agent
+from pipeline.handoff import HANDOFF_STATE_KEY
+from pipeline.stub_model import PIPELINE_TOOL_SCRIPT, StubLlm
+from utils.telemetry import Telemetry
+
+
+def run_once(model, text="I feel anxious", compact_handoff=True, mode="sequential"):
+    collector = Telemetry(spans_file=None)
+    pipeline = create_dag_pipeline(model) if mode == "dag" else create_root_agent(model, compact_handoff)
+    runner = InMemoryRunner(app=create_app(pipeline, collector=collector))
+
+    async def scenario():
+        session = await runner.session_service.create_session(app_name=runner.app_name, user_id="u")
+        content = types.Content(role="user", parts=[types.Part(text=text)])
+        async for _ in runner.run_async(user_id="u", session_id=session.id, new_message=content):
+            pass
+        return await runner.session_service.get_session(app_name=runner.app_name, user_id="u", session_id=session.id)
+
+    return asyncio.run(scenario()), collector.snapshot()
+
+
+def test_scripted_tool_calls_run_the_real_tools():
+    model = StubLlm(latency_s=0, tool_calls=PIPELINE_TOOL_SCRIPT)
+    session, snapshot = run_once(model)
+
+    assert session.state[HANDOFF_STATE_KEY]["phase"] == "Luteal"
+    for tool in PIPELINE_TOOL_SCRIPT:
+        assert snapshot[f"tool:{tool}"]["count"] == 1
+    stats = model.stats()
+    assert stats["calls"] == 6 and stats["tool_call_responses"] == 3
+
+
+def test_injected_errors_are_retried_with_back_off():
+    retry = types.HttpRetryOptions(attempts=3, initial_delay=1, exp_base=2, jitter=0.1)
+    model = StubLlm(latency_s=0, error_rate=0.5, retry_options=retry, retry_time_scale=0.001, seed=3)
+    failures = 0
+    for _ in range(10):
+        try:
+            run_once(model)
+        except errors.APIError:
+            failures += 1
+    stats = model.stats()
+    assert stats["injected_errors"] == stats["retries"] + stats["failures"]
+    assert stats["retries"] > 0 and stats["failures"] == failures
+    assert stats["attempts"] == stats["calls"] + stats["retries"]
+
+
+def test_injected_error_without_retries_surfaces_api_error():
+    model = StubLlm(latency_s=0, error_rate=1.0, error_codes=(429,))
+    with pytest.raises(errors.ClientError) as excinfo:
+        run_once(model)
+    assert excinfo.value.code == 429
+
+
+def test_latency_distributions_have_the_requested_mean():
+    for distribution in ("uniform", "exponential", "lognormal"):
+        model = StubLlm(latency_s=0.05, latency_distribution=distribution, seed=1)
+        mean = statistics.fmean(model.sample_latency() for _ in range(20000))
+        assert mean == pytest.approx(0.05, rel=0.05)
+    with pytest.raises(ValueError):
+        StubLlm(latency_distribution="bimodal")
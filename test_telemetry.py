@@ -0,0 +1,107 @@
+import asyncio
+import json
+import random
+from types import SimpleNamespace
+
+from google.adk.agents import ParallelAgent
+from google.genai import types
+
+from setup import InMemoryRunner, SequentialAgent
+from agents.root_agent import create_app, create_root_agent
+from pipeline.stub_model import StubLlm
+from utils.telemetry import LatencyHistogram, Span, Telemetry, TelemetryPlugin, critical_path, note_model_retry
+
+
+def run_pipeline(collector, messages=1):
+    runner = InMemoryRunner(app=create_app(create_root_agent(StubLlm(latency_s=0)), collector=collector))
+
+    async def scenario():
+        session = await runner.session_service.create_session(app_name=runner.app_name, user_id="u")
+        for i in range(messages):
+            content = types.Content(role="user", parts=[types.Part(text=f"I feel tired ({i})")])
+            async for _ in runner.run_async(user_id="u", session_id=session.id, new_message=content):
+                pass
+
+    asyncio.run(scenario())
+
+
+def test_histogram_percentiles_are_within_bucket_resolution():
+    rng = random.Random(7)
+    values = sorted(rng.lognormvariate(3, 1) for _ in range(20000))
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.add(value)
+    for q in (50, 95, 99):
+        exact = values[int(q / 100 * len(values)) - 1]
+        assert abs(histogram.percentile(q) - exact) / exact < 0.1
+    assert histogram.summary()["max_ms"] == values[-1]
+
+
+def test_pipeline_records_stage_and_model_spans_with_tokens(tmp_path):
+    spans_file = tmp_path / "spans.jsonl"
+    collector = Telemetry(spans_file=str(spans_file))
+    run_pipeline(collector, messages=2)
+    collector.flush()
+
+    snapshot = collector.snapshot()
+    for stage in ("IntakeAgent", "AnalysisAgent", "WellnessCoachAgent"):
+        agent, model = snapshot[f"agent:{stage}"], snapshot[f"model:{stage}"]
+        assert agent["count"] == model["count"] == 2
+        assert model["prompt_tokens"] > 0 and model["output_tokens"] > 0
+        assert agent["prompt_tokens"] == model["prompt_tokens"]
+        assert agent["p99_ms"] >= model["p50_ms"]
+    assert snapshot["agent:CycleWellnessPipeline"]["count"] == 2
+
+    spans = [json.loads(line) for line in spans_file.read_text().splitlines()]
+    assert len(spans) == 16
+    assert {span["kind"] for span in spans} == {"agent", "model", "critical_path"}
+    assert all(span["parent"] == span["name"] for span in spans if span["kind"] == "model")
+    assert len({span["trace_id"] for span in spans}) == 2
+    collector.close()
+
+
+def test_tool_spans_and_model_retries_via_plugin_callbacks():
+    collector = Telemetry(spans_file=None)
+    plugin = TelemetryPlugin(collector)
+    callback_context = SimpleNamespace(invocation_id="inv", agent_name="IntakeAgent")
+    tool_context = SimpleNamespace(invocation_id="inv", agent_name="IntakeAgent", function_call_id="call-1")
+    tool = SimpleNamespace(name="calculate_cycle_phase")
+    response = SimpleNamespace(partial=False, error_code=None,
+                               usage_metadata=SimpleNamespace(prompt_token_count=10, candidates_token_count=3))
+
+    async def scenario():
+        await plugin.before_agent_callback(agent=SimpleNamespace(name="IntakeAgent"), callback_context=callback_context)
+        await plugin.before_model_callback(callback_context=callback_context, llm_request=None)
+        note_model_retry()
+        await plugin.after_model_callback(callback_context=callback_context, llm_response=response)
+        await plugin.before_tool_callback(tool=tool, tool_args={}, tool_context=tool_context)
+        await plugin.after_tool_callback(tool=tool, tool_args={}, tool_context=tool_context,
+                                         result={"error": "Invalid date format"})
+        await plugin.after_run_callback(invocation_context=SimpleNamespace(
+            invocation_id="inv", agent=SimpleNamespace(name="IntakeAgent", sub_agents=[])))
+
+    asyncio.run(scenario())
+    snapshot = collector.snapshot()
+    assert snapshot["tool:calculate_cycle_phase"]["errors"] == 1
+    assert snapshot["model:IntakeAgent"]["retries"] == 1
+    assert snapshot["agent:IntakeAgent"]["retries"] == 1
+    assert snapshot["agent:IntakeAgent"]["prompt_tokens"] == 10
+    assert 'cycle_span_duration_ms_count{kind="tool",name="calculate_cycle_phase"} 1' in collector.render_prometheus()
+    assert "agent:IntakeAgent" in collector.report()
+    assert snapshot["critical_path:IntakeAgent"]["count"] == 1
+
+
+def test_span_dict_is_json_ready():
+    span = Span("request", "cycle_wellness", "inv").finish()
+    assert json.loads(json.dumps(span.to_dict()))["status"] == "ok"
+
+
+def test_critical_path_takes_the_slowest_parallel_branch():
+    def agent(name, *sub_agents, parallel=False):
+        return (ParallelAgent if parallel else SequentialAgent)(name=name, sub_agents=list(sub_agents))
+
+    tree = agent("Dag", agent("Intake"), agent("Both", agent("Analysis"), agent("Lookup"), parallel=True),
+                 agent("Writer"))
+    ms, stages = critical_path(tree, {"Intake": 100, "Analysis": 300, "Lookup": 5, "Writer": 50})
+    assert ms == 450 and stages == ["Intake", "Analysis", "Writer"]
+    assert critical_path(tree, {"Intake": 100, "Lookup": 5}) == (105, ["Intake", "Lookup"])
@@ -0,0 +1,273 @@
+# Cycle Analytics: Learns each user's cycle length from logged period starts
+# Rolling cycle-length statistics, per-user phase boundaries and population-wide batch runs
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bisect import bisect_left
+from collections import deque
+from datetime import date, datetime
+from typing import Dict, Optional, Sequence, Union
+
+import numpy as np
+
+from tools.cycle_calculator import (ISO_DATE_PATTERN, PHASE_NAMES, calculate_cycle_phases, parse_dates,
+                                    phase_last_days)
+
+DEFAULT_CYCLE_LENGTH = 28
+
+# Most recent cycles the estimate is based on
+ROLLING_CYCLES = 6
+
+# Gaps between period starts outside this range are missed or duplicate logs, not cycles
+MIN_CYCLE_LENGTH = 15
+MAX_CYCLE_LENGTH = 60
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def _day(value) -> int:
+    """Day number (days since 1970-01-01) of a 'YYYY-MM-DD' string, date or datetime64."""
+    if isinstance(value, str) and ISO_DATE_PATTERN.fullmatch(value):
+        try:
+            return date.fromisoformat(value).toordinal() - _EPOCH_ORDINAL
+        except ValueError:
+            pass
+    elif isinstance(value, date) and not isinstance(value, datetime):
+        return value.toordinal() - _EPOCH_ORDINAL
+    elif isinstance(value, np.datetime64) and not np.isnat(value):
+        return int(value.astype("datetime64[D]").astype(np.int64))
+    raise ValueError(f"Invalid date, expected YYYY-MM-DD: {value!r}")
+
+
+class CycleModel:
+    """
+    One user's cycle history, updated one logged period start at a time.
+
+    Keeps the period starts and running sums over the last `window` cycle lengths, so
+    logging the newest period is O(1): the oldest length leaves the window and the new
+    one enters. A start logged out of order (a backfilled earlier period) rebuilds the
+    window from the stored starts. analyze_cycle_histories() gives the same numbers for
+    many users at once.
+
+    Args:
+        declared_length: Cycle length the user gave, used until a full cycle is logged
+        window: Number of most recent cycles in the statistics
+    """
+
+    __slots__ = ("declared_length", "starts", "lengths", "total", "total_squares")
+
+    def __init__(self, declared_length: int = DEFAULT_CYCLE_LENGTH, window: int = ROLLING_CYCLES):
+        self.declared_length = declared_length
+        self.starts = []                  # period start day numbers, sorted, no duplicates
+        self.lengths = deque(maxlen=window)  # cycle lengths in the window, oldest first
+        self.total = 0
+        self.total_squares = 0
+
+    def add_period_start(self, period_date) -> bool:
+        """
+        Record a period start ('YYYY-MM-DD' or a date); ValueError if it is not a date.
+
+        Returns:
+            False if the start was already recorded
+        """
+        day = _day(period_date)
+        starts = self.starts
+        if starts and day <= starts[-1]:
+            index = bisect_left(starts, day)
+            if starts[index] == day:
+                return False
+            starts.insert(index, day)
+            self._rebuild()
+            return True
+        if starts:
+            self._push(day - starts[-1])
+        starts.append(day)
+        return True
+
+    def set_last_period_start(self, period_date) -> bool:
+        """
+        Record the period start a user gives as their last one; ValueError if it is not a date.
+
+        A date within MIN_CYCLE_LENGTH days of the latest start, before or after it,
+        corrects that start (e.g. a typo fixed a day later), so it does not add a bogus
+        short cycle. Any other date is recorded like add_period_start(): a new cycle, or a
+        backfilled earlier period that leaves the latest start in place.
+
+        Returns:
+            False if that start was already recorded
+        """
+        day = _day(period_date)
+        starts = self.starts
+        if not starts or abs(day - starts[-1]) >= MIN_CYCLE_LENGTH:
+            return self.add_period_start(period_date)
+        if day == starts[-1]:
+            return False
+        starts.pop()
+        index = bisect_left(starts, day)
+        if index == len(starts) or starts[index] != day:
+            starts.insert(index, day)
+        self._rebuild()
+        return True
+
+    def copy(self) -> "CycleModel":
+        """An independent model with the same starts and statistics."""
+        other = CycleModel(self.declared_length, self.lengths.maxlen)
+        other.starts = list(self.starts)
+        other.lengths.extend(self.lengths)
+        other.total, other.total_squares = self.total, self.total_squares
+        return other
+
+    def _push(self, length: int):
+        if not MIN_CYCLE_LENGTH <= length <= MAX_CYCLE_LENGTH:
+            return
+        if len(self.lengths) == self.lengths.maxlen:
+            oldest = self.lengths[0]
+            self.total -= oldest
+            self.total_squares -= oldest * oldest
+        self.lengths.append(length)
+        self.total += length
+        self.total_squares += length * length
+
+    def _rebuild(self):
+        self.lengths.clear()
+        self.total = self.total_squares = 0
+        for previous, start in zip(self.starts, self.starts[1:]):
+            self._push(start - previous)
+
+    @property
+    def cycles_observed(self) -> int:
+        """Cycle lengths in the window."""
+        return len(self.lengths)
+
+    @property
+    def mean_length(self) -> Optional[float]:
+        return self.total / len(self.lengths) if self.lengths else None
+
+    @property
+    def length_variance(self) -> float:
+        """Sample variance of the cycle lengths in the window (0.0 below two cycles)."""
+        count = len(self.lengths)
+        if count < 2:
+            return 0.0
+        # Sums of ints are exact, so this form does not lose precision
+        return (self.total_squares - self.total * self.total / count) / (count - 1)
+
+    @property
+    def cycle_length(self) -> int:
+        """Estimated cycle length: the rolling mean in whole days, or the declared length."""
+        mean = self.mean_length
+        return int(np.rint(mean)) if mean is not None else self.declared_length
+
+    def predict(self, today: Optional[Union[date, str]] = None) -> Dict:
+        """
+        Current phase and next period from the last logged start and the learned length.
+
+        Args:
+            today: Reference date (default: today on utils.clock)
+
+        Returns:
+            Dictionary like calculate_cycle_phase() plus the cycle statistics, or an
+            "error" entry if no period start is logged
+        """
+        if not self.starts:
+            return {"error": "No period start logged yet"}
+        length = self.cycle_length
+        last_period = np.datetime64(self.starts[-1], "D")
+        columns = calculate_cycle_phases([last_period], [length], today=today)
+        return {
+            "current_phase": str(columns["current_phase"][0]),
+            "day_in_cycle": int(columns["day_in_cycle"][0]),
+            "days_since_last_period": int(columns["days_since_last_period"][0]),
+            "next_period_date": str(columns["next_period_date"][0]),
+            "days_until_next_period": int(columns["days_until_next_period"][0]),
+            "cycle_length": length,
+            "cycle_length_std": round(float(np.sqrt(self.length_variance)), 2),
+            "cycles_observed": self.cycles_observed,
+            "last_period_date": str(last_period),
+            "phase_last_days": dict(zip(PHASE_NAMES, phase_last_days(length).tolist())),
+        }
+
+
+def analyze_cycle_histories(user_ids: Sequence, period_starts: Sequence,
+                            declared_lengths: Union[int, Dict[str, int]] = DEFAULT_CYCLE_LENGTH,
+                            today: Optional[Union[date, str, np.datetime64]] = None,
+                            window: int = ROLLING_CYCLES) -> dict:
+    """
+    Learn cycle lengths and current phases for many users at once.
+
+    Takes every logged period start of a population as two flat columns and computes, per
+    user, what CycleModel computes one start at a time: the rolling mean and variance of
+    the last `window` plausible cycle lengths, the estimated length, and the current phase
+    with boundaries scaled to it.
+
+    Args:
+        user_ids: User id of each period start
+        period_starts: Period start dates ('YYYY-MM-DD' strings, dates or datetime64); invalid
+            dates are ignored
+        declared_lengths: Length used for users without a full cycle logged, one for everyone
+            or per user id
+        today: Reference date (default: today on utils.clock)
+        window: Number of most recent cycles in the statistics
+
+    Returns:
+        Dictionary of columns, one entry per distinct user (sorted by user id): user_id,
+        cycles_observed, cycle_length_mean (NaN without cycles), cycle_length_variance,
+        last_period_date, and the calculate_cycle_phases() columns for the estimated length
+        (valid is False for users without a valid start)
+    """
+    users, user_index = np.unique(np.asarray(user_ids, dtype=str), return_inverse=True)
+    user_index = user_index.reshape(-1)
+    user_count = len(users)
+    days = parse_dates(period_starts).reshape(-1)
+    known = ~np.isnat(days)
+    user_index, days = user_index[known], days[known].astype(np.int64)
+
+    # Starts sorted per user, duplicates dropped
+    order = np.lexsort((days, user_index))
+    user_index, days = user_index[order], days[order]
+    distinct = np.ones(len(days), dtype=bool)
+    distinct[1:] = (user_index[1:] != user_index[:-1]) | (days[1:] != days[:-1])
+    user_index, days = user_index[distinct], days[distinct]
+
+    # Cycle lengths: gaps between a user's consecutive starts, implausible ones dropped
+    gaps = np.diff(days)
+    gap_users = user_index[1:]
+    plausible = (gap_users == user_index[:-1]) & (gaps >= MIN_CYCLE_LENGTH) & (gaps <= MAX_CYCLE_LENGTH)
+    gaps, gap_users = gaps[plausible], gap_users[plausible]
+
+    # Keep each user's last `window` lengths
+    per_user = np.bincount(gap_users, minlength=user_count)
+    from_end = np.cumsum(per_user)[gap_users] - np.arange(len(gaps)) - 1
+    recent = from_end < window
+    gaps, gap_users = gaps[recent], gap_users[recent]
+    count = np.bincount(gap_users, minlength=user_count)
+    total = np.bincount(gap_users, weights=gaps, minlength=user_count)
+    squares = np.bincount(gap_users, weights=gaps.astype(np.float64) ** 2, minlength=user_count)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(count > 0, total / count, np.nan)
+        variance = np.where(count > 1, (squares - total * total / count) / (count - 1), 0.0)
+
+    if isinstance(declared_lengths, dict):
+        declared = np.array([declared_lengths.get(user, DEFAULT_CYCLE_LENGTH) for user in users.tolist()],
+                            dtype=np.int64)
+    else:
+        declared = np.full(user_count, declared_lengths, dtype=np.int64)
+    lengths = np.where(count > 0, np.rint(np.nan_to_num(mean)).astype(np.int64), declared)
+
+    last_period = np.full(user_count, np.datetime64("NaT"), dtype="datetime64[D]")
+    has_start = np.bincount(user_index, minlength=user_count) > 0
+    last_index = np.cumsum(np.bincount(user_index, minlength=user_count)) - 1
+    last_period[has_start] = days[last_index[has_start]].astype("datetime64[D]")
+
+    columns = calculate_cycle_phases(last_period, lengths, today=today)
+    columns.update({
+        "user_id": users,
+        "cycles_observed": count,
+        "cycle_length_mean": mean,
+        "cycle_length_variance": variance,
+        "last_period_date": last_period,
+    })
+    return columns
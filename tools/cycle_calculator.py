@@ -4,8 +4,242 @@ import os
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from datetime import datetime, timedelta
+import re
+from datetime import date
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
 from setup import FunctionTool
+from utils import clock
+
+# Phases in cycle order, with the last day_in_cycle of each phase except Luteal
+# For a 28-day cycle: Menstrual: Days 0-5, Follicular: Days 6-13, Ovulation: Days 14-16, Luteal: Days 17+
+PHASE_NAMES = ("Menstrual", "Follicular", "Ovulation", "Luteal")
+PHASE_DESCRIPTIONS = (
+    "Your period is here. Focus on rest and gentle self-care.",
+    "Energy is rising! Good time for new projects and social activities.",
+    "Peak energy and confidence. Great for important conversations and challenges.",
+    "Energy may dip. Prioritize rest, boundaries, and comfort.",
+)
+PHASE_LAST_DAYS = np.array([5, 13, 16])
+_PHASE_NAME_ARRAY = np.array(PHASE_NAMES)
+
+# The luteal phase keeps about the same length in every cycle, so ovulation moves with
+# the cycle length: it ends OVULATION_END_BEFORE days before the next period
+OVULATION_END_BEFORE = 12
+OVULATION_DAYS = 3
+MIN_SCALED_CYCLE_LENGTH = 18  # shorter cycles use these boundaries (every phase keeps a day)
+
+# The only date strings accepted; date.fromisoformat() alone also takes e.g. '2025-W47-1'
+ISO_DATE_PATTERN = re.compile(r"[0-9]{4}-[0-9]{2}-[0-9]{2}")
+
+
+def phase_last_days(cycle_lengths) -> np.ndarray:
+    """
+    Last day_in_cycle of Menstrual, Follicular and Ovulation for each cycle length.
+
+    Boundaries scale with the cycle: a 28-day cycle gives PHASE_LAST_DAYS, a 35-day cycle
+    moves ovulation a week later, and the period is shortened only in very short cycles.
+
+    Args:
+        cycle_lengths: Cycle length in days, a scalar or an array
+
+    Returns:
+        int64 array with a trailing axis of 3 boundaries
+    """
+    lengths = np.maximum(np.asarray(cycle_lengths, dtype=np.int64), MIN_SCALED_CYCLE_LENGTH)
+    ovulation_end = lengths - OVULATION_END_BEFORE
+    follicular_end = ovulation_end - OVULATION_DAYS
+    menstrual_end = np.minimum(PHASE_LAST_DAYS[0], follicular_end - 1)
+    return np.stack([menstrual_end, follicular_end, ovulation_end], axis=-1)
+
+
+def parse_dates(dates) -> np.ndarray:
+    """Parse 'YYYY-MM-DD' strings (or dates) to datetime64[D], with NaT for invalid entries."""
+    values = np.asarray(dates)
+    if values.dtype.kind == "M":
+        return values.astype("datetime64[D]")
+    try:
+        parsed = values.astype("datetime64[D]")
+    except ValueError:
+        # Fall back to per-element parsing only when some entries are invalid
+        parsed = np.array([_parse_date(value) for value in values.ravel()],
+                          dtype="datetime64[D]").reshape(values.shape)
+    if values.dtype.kind == "U":
+        # numpy also accepts 'YYYY' and 'YYYY-MM'; only full dates are valid here
+        parsed[np.char.str_len(values) != 10] = np.datetime64("NaT")
+    return parsed
+
+
+def _parse_date(value) -> np.datetime64:
+    try:
+        return np.datetime64(value, "D")
+    except ValueError:
+        return np.datetime64("NaT")
+
+
+def calculate_cycle_phases(last_period_dates: Sequence, cycle_lengths: Union[int, Sequence[int]] = 28,
+                           today: Optional[Union[date, str, np.datetime64]] = None) -> dict:
+    """
+    Calculate cycle phases for many users at once with NumPy date arithmetic.
+    
+    Args:
+        last_period_dates: Last period dates as 'YYYY-MM-DD' strings, dates or datetime64
+        cycle_lengths: Cycle length in days per user, or one length for everyone
+        today: Reference date (default: today on utils.clock)
+    
+    Returns:
+        Dictionary of columns, one entry per user:
+        - valid: bool, False where the date is invalid or the cycle length is not positive
+        - phase_index: int, index into PHASE_NAMES
+        - current_phase: str phase name
+        - day_in_cycle, days_since_last_period, days_until_next_period, cycle_length: int
+        - next_period_date: datetime64[D], the start of the next cycle (never before today)
+        Phase boundaries scale with each cycle length (see phase_last_days).
+        Columns hold unspecified values in rows where valid is False.
+    """
+    last_period = parse_dates(last_period_dates)
+    lengths = np.broadcast_to(np.asarray(cycle_lengths, dtype=np.int64), last_period.shape)
+    today = np.datetime64(today if today is not None else clock.today(), "D")
+    
+    valid = ~np.isnat(last_period) & (lengths > 0)
+    safe_lengths = np.where(valid, lengths, 1)
+    
+    days_since_period = np.where(valid, (today - last_period).astype(np.int64), 0)
+    day_in_cycle = days_since_period % safe_lengths
+    phase_index = (phase_last_days(safe_lengths) < day_in_cycle[..., None]).sum(axis=-1)
+    
+    # The cycle that contains today ends on the next period, however many cycles ago the last logged one was
+    days_until_period = np.where(valid, safe_lengths - day_in_cycle, 0)
+    next_period = np.where(valid, today + days_until_period.astype("timedelta64[D]"), last_period)
+    
+    return {
+        "valid": valid,
+        "phase_index": phase_index,
+        "current_phase": _PHASE_NAME_ARRAY[phase_index],
+        "day_in_cycle": day_in_cycle,
+        "days_since_last_period": days_since_period,
+        "next_period_date": next_period,
+        "days_until_next_period": days_until_period,
+        "cycle_length": np.array(lengths),
+    }
+
+
+def cycle_phase_result(columns: dict, index: int = 0) -> dict:
+    """One row of calculate_cycle_phases() columns as the calculate_cycle_phase() dict."""
+    phase_index = int(columns["phase_index"][index])
+    return {
+        "current_phase": PHASE_NAMES[phase_index],
+        "phase_description": PHASE_DESCRIPTIONS[phase_index],
+        "day_in_cycle": int(columns["day_in_cycle"][index]),
+        "days_since_last_period": int(columns["days_since_last_period"][index]),
+        "next_period_date": str(columns["next_period_date"][index]),
+        "days_until_next_period": int(columns["days_until_next_period"][index]),
+        "cycle_length": int(columns["cycle_length"][index])
+    }
+
+
+class PhaseCalendar:
+    """
+    Phase of every day of one cycle from a period start, computed once.
+
+    Later cycles repeat it, so lookups index the precomputed days by the day's offset
+    from the period start modulo the cycle length: "phase on date X", "next ovulation
+    window", "days until next period" and snapshot() are O(1) and never read the clock.
+    Days before the start wrap around the cycle too, as in calculate_cycle_phases().
+
+    Args:
+        last_period_date: Period start, 'YYYY-MM-DD' or a date
+        cycle_length: Cycle length in days
+
+    Raises:
+        ValueError: If the date is invalid or the cycle length is not positive
+    """
+
+    __slots__ = ("start", "cycle_length", "last_days", "phases")
+
+    def __init__(self, last_period_date: Union[str, date], cycle_length: int):
+        cycle_length = int(cycle_length)
+        if cycle_length <= 0:
+            raise ValueError("cycle length must be a positive number of days")
+        self.start = _ordinal(last_period_date)
+        self.cycle_length = cycle_length
+        last_days = phase_last_days(cycle_length)
+        self.last_days = tuple(last_days.tolist())
+        # Phase index per day_in_cycle
+        self.phases = (last_days < np.arange(cycle_length)[:, None]).sum(axis=-1).astype(np.uint8).tobytes()
+
+    @property
+    def last_period_date(self) -> str:
+        return date.fromordinal(self.start).isoformat()
+
+    def phase_index(self, day: Union[str, date]) -> int:
+        """Index into PHASE_NAMES of the phase on a day."""
+        return self.phases[self.day_in_cycle(day)]
+
+    def phase_on(self, day: Union[str, date]) -> str:
+        """Phase name on a day ('YYYY-MM-DD' or a date)."""
+        return PHASE_NAMES[self.phase_index(day)]
+
+    def day_in_cycle(self, day: Union[str, date]) -> int:
+        return (_ordinal(day) - self.start) % self.cycle_length
+
+    def days_until_next_period(self, day: Union[str, date]) -> int:
+        """Days from a day to the start of the next cycle (1 on the last day of a cycle)."""
+        return self.cycle_length - self.day_in_cycle(day)
+
+    def next_period_date(self, day: Union[str, date]) -> date:
+        return date.fromordinal(_ordinal(day) + self.days_until_next_period(day))
+
+    def next_ovulation_window(self, day: Union[str, date]) -> Tuple[date, date]:
+        """
+        First and last day of the ovulation window on or after a day.
+
+        Returns the current window while the day is inside it, otherwise the next one.
+        """
+        ordinal = _ordinal(day)
+        day_in_cycle = (ordinal - self.start) % self.cycle_length
+        cycle_start = ordinal - day_in_cycle
+        if day_in_cycle > self.last_days[2]:
+            cycle_start += self.cycle_length
+        return (date.fromordinal(cycle_start + self.last_days[1] + 1),
+                date.fromordinal(cycle_start + self.last_days[2]))
+
+    def snapshot(self, today: Optional[Union[str, date]] = None) -> Dict:
+        """
+        The calculate_cycle_phase() result for this period start and length on a day.
+
+        Read from the precomputed cycle into a new dict on every call; the calendar
+        itself is never modified, so it can be shared between threads.
+
+        Args:
+            today: Reference date (default: today on utils.clock)
+        """
+        ordinal = _ordinal(today if today is not None else clock.today())
+        days_since = ordinal - self.start
+        day_in_cycle = days_since % self.cycle_length
+        phase_index = self.phases[day_in_cycle]
+        days_until = self.cycle_length - day_in_cycle
+        return {
+            "current_phase": PHASE_NAMES[phase_index],
+            "phase_description": PHASE_DESCRIPTIONS[phase_index],
+            "day_in_cycle": day_in_cycle,
+            "days_since_last_period": days_since,
+            "next_period_date": date.fromordinal(ordinal + days_until).isoformat(),
+            "days_until_next_period": days_until,
+            "cycle_length": self.cycle_length,
+        }
+
+
+def _ordinal(value) -> int:
+    """Proleptic ordinal of a 'YYYY-MM-DD' string, date or datetime; ValueError otherwise."""
+    if isinstance(value, date):
+        return value.toordinal()
+    if isinstance(value, str) and ISO_DATE_PATTERN.fullmatch(value):
+        return date.fromisoformat(value).toordinal()
+    raise ValueError(f"Invalid date, expected YYYY-MM-DD: {value!r}")
+
 
 def calculate_cycle_phase(last_period_date: str, cycle_length: int = 28) -> dict:
     """
@@ -19,65 +253,31 @@ def calculate_cycle_phase(last_period_date: str, cycle_length: int = 28) -> dict
         Dictionary with cycle phase, days since period, and next period prediction
     """
     try:
-        # Parse the date
-        last_period = datetime.strptime(last_period_date, "%Y-%m-%d")
-        today = datetime.now()
-        
-        # Calculate days since last period
-        days_since_period = (today - last_period).days
-        
-        # Calculate day in current cycle (handle cases where period is overdue)
-        day_in_cycle = days_since_period % cycle_length
-        
-        # Determine cycle phase based on day in cycle
-        # Menstrual: Days 1-5
-        # Follicular: Days 6-13
-        # Ovulation: Days 14-16
-        # Luteal: Days 17-28
+        columns = calculate_cycle_phases([last_period_date], [cycle_length])
         
-        if day_in_cycle <= 5:
-            phase = "Menstrual"
-            phase_description = "Your period is here. Focus on rest and gentle self-care."
-        elif day_in_cycle <= 13:
-            phase = "Follicular"
-            phase_description = "Energy is rising! Good time for new projects and social activities."
-        elif day_in_cycle <= 16:
-            phase = "Ovulation"
-            phase_description = "Peak energy and confidence. Great for important conversations and challenges."
-        else:
-            phase = "Luteal"
-            phase_description = "Energy may dip. Prioritize rest, boundaries, and comfort."
+        if not columns["valid"][0]:
+            if np.isnat(columns["next_period_date"][0]):
+                return {
+                    "error": f"Invalid date format. Please use YYYY-MM-DD format. Got: {last_period_date}"
+                }
+            return {
+                "error": "Error calculating cycle phase: cycle length must be a positive number of days"
+            }
         
-        # Calculate next period date
-        next_period = last_period + timedelta(days=cycle_length)
-        days_until_period = (next_period - today).days
+        return cycle_phase_result(columns)
         
-        return {
-            "current_phase": phase,
-            "phase_description": phase_description,
-            "day_in_cycle": day_in_cycle,
-            "days_since_last_period": days_since_period,
-            "next_period_date": next_period.strftime("%Y-%m-%d"),
-            "days_until_next_period": days_until_period,
-            "cycle_length": cycle_length
-        }
-        
-    except ValueError as e:
-        return {
-            "error": f"Invalid date format. Please use YYYY-MM-DD format. Error: {str(e)}"
-        }
     except Exception as e:
         return {
             "error": f"Error calculating cycle phase: {str(e)}"
         }
 
-# Test the function
-print("✅ Cycle calculator function created")
-print(f"Test: {calculate_cycle_phase('2025-11-23', 28)}")  # Using Nov 25, 2025 as test date
-
 # Create the FunctionTool
 cycle_calculator_tool = FunctionTool(
     func=calculate_cycle_phase
 )
 
-print("✅ cycle_calculator_tool wrapped as FunctionTool")
\ No newline at end of file
+
+# ====== TESTING ======
+
+if __name__ == "__main__":
+    print(f"Test: {calculate_cycle_phase('2025-11-23', 28)}")  # Using Nov 25, 2025 as test date
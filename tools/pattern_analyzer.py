@@ -4,75 +4,121 @@ import os
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import heapq
+import json
+from collections import Counter
 from setup import FunctionTool
 
-def analyze_mood_patterns(mood_logs: str) -> dict:
+CYCLE_PHASES = ["Menstrual", "Follicular", "Ovulation", "Luteal"]
+NEGATIVE_MOODS = frozenset(["anxious", "sad", "irritable", "depressed", "angry", "overwhelmed"])
+POSITIVE_MOODS = frozenset(["happy", "energetic", "calm", "content", "peaceful"])
+
+# Types of the entries in patterns_found
+PATTERN_TYPES = ("phase_mood_correlation", "symptom_pattern", "overall_trend")
+
+
+def _by_count_then_name(item):
+    name, count = item
+    return -count, name
+
+
+class MoodPatternAggregate:
     """
-    Analyzes mood and symptom patterns from historical data.
-    
-    Args:
-        mood_logs: JSON string containing mood log entries. Each entry should have:
-                   - date: str (YYYY-MM-DD)
-                   - cycle_phase: str (Menstrual, Follicular, Ovulation, Luteal)
-                   - mood: str (happy, anxious, sad, irritable, energetic, tired, etc.)
-                   - symptoms: list (physical symptoms)
-                   - notes: str (optional user notes)
+    Running per-user aggregates for incremental pattern analysis.
     
-    Returns:
-        Dictionary with pattern analysis, correlations, and insights
+    Keeps per-phase mood counters, symptom frequencies and positive/negative
+    tallies. Each `add()` is O(1) in the length of the history, and `result()`
+    builds the same output as analyze_mood_patterns() without rescanning logs.
+    Ties in frequency are broken by name, so the result does not depend on
+    the order the logs were added in.
     """
-    try:
-        import json
+
+    def __init__(self):
+        self.total_logs = 0
+        self.phase_moods = {phase: Counter() for phase in CYCLE_PHASES}
+        self.symptom_frequency = Counter()
+        self.mood_count = 0
+        self.negative_count = 0
+        self.positive_count = 0
+
+    def add(self, log: dict):
+        """Fold one mood log entry into the running aggregates."""
+        phase = log.get("cycle_phase", "Unknown")
+        mood = log.get("mood", "").lower()
         
-        # Parse the JSON string to list
-        if isinstance(mood_logs, str):
-            mood_logs = json.loads(mood_logs)
-        elif not isinstance(mood_logs, list):
-            mood_logs = []
-        if not mood_logs or len(mood_logs) == 0:
-            return {
-                "status": "no_data",
-                "message": "No mood data available yet. Keep logging to see patterns!",
-                "patterns_found": []
-            }
+        self.total_logs += 1
+        if mood:
+            if phase in self.phase_moods:
+                self.phase_moods[phase][mood] += 1
+            self.mood_count += 1
+            if mood in NEGATIVE_MOODS:
+                self.negative_count += 1
+            elif mood in POSITIVE_MOODS:
+                self.positive_count += 1
         
-        # Initialize pattern tracking
-        phase_mood_map = {
-            "Menstrual": [],
-            "Follicular": [],
-            "Ovulation": [],
-            "Luteal": []
-        }
+        for symptom in log.get("symptoms", []):
+            self.symptom_frequency[symptom] += 1
+
+    def add_many(self, logs) -> None:
+        """
+        Fold many mood log entries in with one pass over the logs.
         
+        Moods and symptoms are gathered into plain lists in the loop and counted
+        by Counter.update() afterwards, which keeps the per-log work minimal.
+        """
+        phase_moods = {phase: [] for phase in self.phase_moods}
         all_moods = []
-        symptom_frequency = {}
-        
-        # Process each mood log
-        for log in mood_logs:
-            phase = log.get("cycle_phase", "Unknown")
+        symptoms = []
+        total = 0
+        for log in logs:
+            total += 1
             mood = log.get("mood", "").lower()
-            symptoms = log.get("symptoms", [])
-            
-            # Track moods by phase
-            if phase in phase_mood_map and mood:
-                phase_mood_map[phase].append(mood)
-            
-            # Track all moods
             if mood:
                 all_moods.append(mood)
-            
-            # Track symptom frequency
-            for symptom in symptoms:
-                symptom_frequency[symptom] = symptom_frequency.get(symptom, 0) + 1
+                moods = phase_moods.get(log.get("cycle_phase"))
+                if moods is not None:
+                    moods.append(mood)
+            symptoms.extend(log.get("symptoms", ()))
+        
+        self.total_logs += total
+        for phase, moods in phase_moods.items():
+            self.phase_moods[phase].update(moods)
+        self.symptom_frequency.update(symptoms)
+        self.mood_count += len(all_moods)
+        for mood, count in Counter(all_moods).items():
+            if mood in NEGATIVE_MOODS:
+                self.negative_count += count
+            elif mood in POSITIVE_MOODS:
+                self.positive_count += count
+
+    def add_counts(self, total_logs: int, phase_mood_counts: dict, symptom_counts: dict) -> None:
+        """
+        Fold in logs that were already counted, e.g. by a batch worker.
         
-        # Analyze patterns
+        Args:
+            total_logs: Number of logs counted
+            phase_mood_counts: {(phase, lowercased mood): count}, moods of logs without one left out
+            symptom_counts: {symptom: count}
+        """
+        self.total_logs += total_logs
+        for (phase, mood), count in phase_mood_counts.items():
+            if phase in self.phase_moods:
+                self.phase_moods[phase][mood] += count
+            self.mood_count += count
+            if mood in NEGATIVE_MOODS:
+                self.negative_count += count
+            elif mood in POSITIVE_MOODS:
+                self.positive_count += count
+        self.symptom_frequency.update(symptom_counts)
+
+    def patterns(self) -> list:
+        """Build the patterns_found list from the current aggregates."""
         patterns = []
         
         # Pattern 1: Most common mood by phase
-        for phase, moods in phase_mood_map.items():
+        for phase, moods in self.phase_moods.items():
             if moods:
-                most_common = max(set(moods), key=moods.count)
-                frequency = moods.count(most_common)
+                most_common, frequency = min(moods.items(), key=_by_count_then_name)
                 if frequency > 1:  # Only report if pattern appears more than once
                     patterns.append({
                         "type": "phase_mood_correlation",
@@ -83,44 +129,91 @@ def analyze_mood_patterns(mood_logs: str) -> dict:
                     })
         
         # Pattern 2: Most common symptoms
-        if symptom_frequency:
-            top_symptoms = sorted(symptom_frequency.items(), key=lambda x: x[1], reverse=True)[:3]
-            for symptom, count in top_symptoms:
-                if count > 1:
-                    patterns.append({
-                        "type": "symptom_pattern",
-                        "symptom": symptom,
-                        "frequency": count,
-                        "insight": f"{symptom.capitalize()} appears frequently in your logs ({count} times)."
-                    })
+        for symptom, count in heapq.nsmallest(3, self.symptom_frequency.items(), key=_by_count_then_name):
+            if count > 1:
+                patterns.append({
+                    "type": "symptom_pattern",
+                    "symptom": symptom,
+                    "frequency": count,
+                    "insight": f"{symptom.capitalize()} appears frequently in your logs ({count} times)."
+                })
         
         # Pattern 3: Overall mood trend
-        if all_moods:
-            negative_moods = ["anxious", "sad", "irritable", "depressed", "angry", "overwhelmed"]
-            positive_moods = ["happy", "energetic", "calm", "content", "peaceful"]
-            
-            negative_count = sum(1 for mood in all_moods if mood in negative_moods)
-            positive_count = sum(1 for mood in all_moods if mood in positive_moods)
-            
-            if negative_count > positive_count * 1.5:  # Significantly more negative
+        if self.mood_count:
+            if self.negative_count > self.positive_count * 1.5:  # Significantly more negative
                 patterns.append({
                     "type": "overall_trend",
                     "trend": "predominantly_negative",
                     "insight": "Your logs show more challenging moods. Consider discussing with a healthcare provider."
                 })
-            elif positive_count > negative_count * 1.5:  # Significantly more positive
+            elif self.positive_count > self.negative_count * 1.5:  # Significantly more positive
                 patterns.append({
                     "type": "overall_trend",
                     "trend": "predominantly_positive",
                     "insight": "Your mood logs show many positive moments! Keep up the self-care."
                 })
         
+        return patterns
+
+    def result(self) -> dict:
+        """Return the analysis in the same shape as analyze_mood_patterns()."""
+        if not self.total_logs:
+            return {
+                "status": "no_data",
+                "message": "No mood data available yet. Keep logging to see patterns!",
+                "patterns_found": []
+            }
+        patterns = self.patterns()
         return {
             "status": "success",
-            "total_logs_analyzed": len(mood_logs),
+            "total_logs_analyzed": self.total_logs,
             "patterns_found": patterns,
-            "summary": f"Analyzed {len(mood_logs)} mood logs and found {len(patterns)} patterns."
+            "summary": f"Analyzed {self.total_logs} mood logs and found {len(patterns)} patterns."
         }
+
+
+def analyze_mood_logs(mood_logs) -> dict:
+    """
+    Analyze mood and symptom patterns of mood log dicts, in process.
+    
+    The native form of analyze_mood_patterns() for code that already holds the logs,
+    such as the memory layer: no JSON string is built or parsed.
+    
+    Args:
+        mood_logs: Iterable of mood log dicts (any iterator; read once)
+    
+    Returns:
+        Dictionary with pattern analysis, correlations, and insights
+    """
+    aggregate = MoodPatternAggregate()
+    aggregate.add_many(mood_logs)
+    return aggregate.result()
+
+
+def analyze_mood_patterns(mood_logs: str) -> dict:
+    """
+    Analyzes mood and symptom patterns from historical data.
+    
+    Args:
+        mood_logs: JSON string containing mood log entries. Each entry should have:
+                   - date: str (YYYY-MM-DD)
+                   - cycle_phase: str (Menstrual, Follicular, Ovulation, Luteal)
+                   - mood: str (happy, anxious, sad, irritable, energetic, tired, etc.)
+                   - symptoms: list (physical symptoms)
+                   - notes: str (optional user notes)
+    
+    Returns:
+        Dictionary with pattern analysis, correlations, and insights
+    """
+    try:
+        # Parse the JSON string to list
+        if isinstance(mood_logs, str):
+            mood_logs = json.loads(mood_logs)
+        elif not isinstance(mood_logs, list):
+            mood_logs = []
+        
+        # Single pass over the logs into counting structures
+        return analyze_mood_logs(mood_logs)
         
     except Exception as e:
         return {
@@ -129,28 +222,26 @@ def analyze_mood_patterns(mood_logs: str) -> dict:
             "patterns_found": []
         }
 
-# Test the function directly 
-print("✅ Pattern analyzer function created")
-
-# Sample test data 
-import json
-test_logs = json.dumps([
-    {"date": "2025-11-10", "cycle_phase": "Luteal", "mood": "anxious", "symptoms": ["cramps", "fatigue"]},
-    {"date": "2025-11-15", "cycle_phase": "Luteal", "mood": "irritable", "symptoms": ["headache", "fatigue"]},
-    {"date": "2025-11-20", "cycle_phase": "Menstrual", "mood": "tired", "symptoms": ["cramps"]},
-    {"date": "2025-11-25", "cycle_phase": "Follicular", "mood": "energetic", "symptoms": []},
-])
-
-print(f" Test with {len(test_logs)} logs:")
-result = analyze_mood_patterns(test_logs)
-print(f"   Status: {result['status']}")
-print(f"   Patterns found: {len(result['patterns_found'])}")
-if result['patterns_found']:
-    print(f"   Sample insight: {result['patterns_found'][0]['insight']}")
-
 # Create the FunctionTool
 pattern_analyzer_tool = FunctionTool(
     func=analyze_mood_patterns
 )
 
-print("✅ pattern_analyzer_tool wrapped as FunctionTool")
\ No newline at end of file
+
+# ====== TESTING ======
+
+if __name__ == "__main__":
+    # Sample test data 
+    test_logs = [
+        {"date": "2025-11-10", "cycle_phase": "Luteal", "mood": "anxious", "symptoms": ["cramps", "fatigue"]},
+        {"date": "2025-11-15", "cycle_phase": "Luteal", "mood": "irritable", "symptoms": ["headache", "fatigue"]},
+        {"date": "2025-11-20", "cycle_phase": "Menstrual", "mood": "tired", "symptoms": ["cramps"]},
+        {"date": "2025-11-25", "cycle_phase": "Follicular", "mood": "energetic", "symptoms": []},
+    ]
+
+    print(f" Test with {len(test_logs)} logs:")
+    result = analyze_mood_patterns(json.dumps(test_logs))
+    print(f"   Status: {result['status']}")
+    print(f"   Patterns found: {len(result['patterns_found'])}")
+    if result['patterns_found']:
+        print(f"   Sample insight: {result['patterns_found'][0]['insight']}")
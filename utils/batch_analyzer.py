@@ -0,0 +1,207 @@
+# Batch Analyzer: Population-wide mood pattern analysis on a process pool
+# Users are sharded across worker processes as coded columns instead of JSON strings
+
+import math
+import os
+import sys
+from array import array
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from tools.cycle_calculator import PHASE_NAMES
+from tools.pattern_analyzer import MoodPatternAggregate
+from utils.mood_table import UNKNOWN_PHASE, MoodLogTable, Vocabulary
+
+# Upper bound on the logs in one shard; smaller shards are used so every worker gets several
+DEFAULT_SHARD_LOGS = 200_000
+MIN_SHARD_LOGS = 2_000
+SHARDS_PER_WORKER = 4
+
+# (user_id, Phase codes as uint8 bytes, mood codes as uint16 bytes, symptom codes as uint16 bytes)
+CodedLogs = Tuple[str, bytes, bytes, bytes]
+
+
+class Shard:
+    """
+    Mood logs of a group of users, coded against vocabularies shipped with them.
+
+    A few bytes per log pickle to a worker, where the dicts or a JSON string would
+    cost hundreds.
+    """
+
+    __slots__ = ("moods", "symptoms", "users")
+
+    def __init__(self, moods: Sequence[str], symptoms: Sequence[str], users: List[CodedLogs]):
+        self.moods = moods        # mood code -> mood
+        self.symptoms = symptoms  # symptom code -> symptom
+        self.users = users
+
+
+def analyze_shard(shard: Shard) -> List[Tuple[str, Dict]]:
+    """
+    Analyze every user in a shard (runs in a worker process).
+
+    Returns:
+        (user_id, result) pairs, with results shaped like analyze_mood_patterns()
+    """
+    moods = [mood.lower() for mood in shard.moods]
+    return [(user_id, aggregate_coded_logs(phases, mood_codes, symptom_codes, moods, shard.symptoms).result())
+            for user_id, phases, mood_codes, symptom_codes in shard.users]
+
+
+def analyze_table_user(table: MoodLogTable, user_id: str) -> Dict:
+    """One user's analysis straight from a table's columns, without building a dict per log."""
+    phases, mood_codes, symptom_codes = table.coded_logs(user_id)
+    return aggregate_coded_logs(phases, mood_codes, symptom_codes, table.lowercase_moods(),
+                                table.symptom_vocabulary.values).result()
+
+
+def aggregate_coded_logs(phases: bytes, mood_codes: bytes, symptom_codes: bytes, moods: Sequence[str],
+                         symptom_names: Sequence[str]) -> MoodPatternAggregate:
+    """
+    Count coded logs into a MoodPatternAggregate.
+
+    Args:
+        phases: Phase codes, uint8 (UNKNOWN_PHASE for other phases)
+        mood_codes: Mood codes, uint16
+        symptom_codes: Every log's symptom codes back to back, uint16
+        moods: Lowercased mood per code
+        symptom_names: Symptom per code
+    """
+    mood_count = max(len(moods), 1)
+    phases = np.frombuffer(phases, dtype=np.uint8)
+    pairs = phases.astype(np.int64) * mood_count + np.frombuffer(mood_codes, dtype=np.uint16)
+    counts = np.bincount(pairs)
+    phase_moods = Counter()
+    for pair, count in zip(np.flatnonzero(counts).tolist(), counts[counts > 0].tolist()):
+        phase, mood = divmod(pair, mood_count)
+        if moods[mood]:
+            phase_moods[PHASE_NAMES[phase] if phase < len(PHASE_NAMES) else None, moods[mood]] += count
+
+    counts = np.bincount(np.frombuffer(symptom_codes, dtype=np.uint16))
+    present = np.flatnonzero(counts)
+    symptoms = Counter(dict(zip([symptom_names[code] for code in present.tolist()], counts[present].tolist())))
+
+    aggregate = MoodPatternAggregate()
+    aggregate.add_counts(len(phases), phase_moods, symptoms)
+    return aggregate
+
+
+def shard_users(store, users: Optional[Sequence[str]] = None,
+                shard_logs: int = DEFAULT_SHARD_LOGS) -> Iterator[Shard]:
+    """
+    Group users into shards of about `shard_logs` logs each.
+
+    A MoodLogTable hands over its columns, re-coded per shard so a shard carries only
+    the moods and symptoms its users logged; other stores are read through query() and
+    coded here.
+
+    Args:
+        store: Mood log store
+        users: User ids to include (default: every user in the store)
+        shard_logs: Logs per shard (a user is never split)
+    """
+    users = store.users() if users is None else users
+    if isinstance(store, MoodLogTable):
+        moods, symptoms = store.mood_vocabulary.values, store.symptom_vocabulary.values
+        coded, size = [], 0
+        for user_id in users:
+            phases, mood_codes, symptom_codes = store.coded_logs(user_id)
+            coded.append((user_id, phases, mood_codes, symptom_codes))
+            size += len(phases)
+            if size >= shard_logs:
+                yield _recoded_shard(coded, moods, symptoms)
+                coded, size = [], 0
+        if coded:
+            yield _recoded_shard(coded, moods, symptoms)
+        return
+
+    mood_vocabulary, symptom_vocabulary = Vocabulary(1 << 16), Vocabulary(1 << 16)
+    coded, size = [], 0
+    for user_id in users:
+        logs = store.query(user_id, limit=store.count(user_id))
+        phases = bytes(_PHASE_CODES.get(log.get("cycle_phase"), UNKNOWN_PHASE) for log in logs)
+        mood_codes = np.fromiter((mood_vocabulary.code(log.get("mood", "")) for log in logs),
+                                 dtype=np.uint16, count=len(logs)).tobytes()
+        symptom_codes = array("H", [symptom_vocabulary.code(symptom)
+                                    for log in logs for symptom in log.get("symptoms", ())])
+        coded.append((user_id, phases, mood_codes, symptom_codes.tobytes()))
+        size += len(logs)
+        if size >= shard_logs:
+            yield Shard(list(mood_vocabulary.values), list(symptom_vocabulary.values), coded)
+            mood_vocabulary, symptom_vocabulary = Vocabulary(1 << 16), Vocabulary(1 << 16)
+            coded, size = [], 0
+    if coded:
+        yield Shard(list(mood_vocabulary.values), list(symptom_vocabulary.values), coded)
+
+
+def _recoded_shard(users: List[CodedLogs], moods: Sequence[str], symptoms: Sequence[str]) -> Shard:
+    """A shard of table codes, re-coded against just the moods and symptoms it uses."""
+    shard_moods, mood_codes = _recode([mood_codes for _, _, mood_codes, _ in users], moods)
+    shard_symptoms, symptom_codes = _recode([symptom_codes for _, _, _, symptom_codes in users], symptoms)
+    return Shard(shard_moods, shard_symptoms,
+                 [(user_id, phases, user_moods, user_symptoms)
+                  for (user_id, phases, _, _), user_moods, user_symptoms in zip(users, mood_codes, symptom_codes)])
+
+
+def _recode(columns: List[bytes], values: Sequence[str]) -> Tuple[List[str], List[bytes]]:
+    """The values that uint16 code columns use, and the columns coded against only those."""
+    codes = [np.frombuffer(column, dtype=np.uint16) for column in columns]
+    used, local = np.unique(np.concatenate(codes), return_inverse=True)
+    splits = np.cumsum([len(column) for column in codes])[:-1]
+    return ([values[code] for code in used.tolist()],
+            [part.tobytes() for part in np.split(local.reshape(-1).astype(np.uint16), splits)])
+
+
+# Phase names are counted as spelled, like analyze_mood_patterns() does
+_PHASE_CODES = {name: code for code, name in enumerate(PHASE_NAMES)}
+
+
+def analyze_population(store, users: Optional[Sequence[str]] = None, workers: Optional[int] = None,
+                       shard_logs: int = DEFAULT_SHARD_LOGS) -> Iterator[Tuple[str, Dict]]:
+    """
+    Analyze the mood patterns of many users on a process pool.
+
+    Shards are built lazily and at most two per worker are in flight, so memory stays
+    bounded and results stream back while later shards are still being read.
+
+    Usage:
+        for user_id, result in analyze_population(store):
+            ...
+
+    Args:
+        store: Mood log store (MoodLogTable or SQLiteMoodLogStore)
+        users: User ids to analyze (default: every user in the store)
+        workers: Worker processes (default: one per CPU; 0 runs in this process)
+        shard_logs: Upper bound on logs per shard
+
+    Yields:
+        (user_id, result) pairs as shards finish, in no particular order; results are
+        shaped like analyze_mood_patterns()
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    # Several shards per worker, so one large shard does not leave the others idle at the end
+    per_worker = math.ceil(len(store) / (max(workers, 1) * SHARDS_PER_WORKER))
+    shard_logs = max(MIN_SHARD_LOGS, min(shard_logs, per_worker))
+    shards = shard_users(store, users, shard_logs)
+    if workers == 0:
+        for shard in shards:
+            yield from analyze_shard(shard)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for shard in shards:
+            pending.add(pool.submit(analyze_shard, shard))
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        for future in as_completed(pending):
+            yield from future.result()
@@ -0,0 +1,82 @@
+# Clock: Injectable source of the current date and time
+# Phase lookups and timestamps read "today" here, so tests and replays can pin it
+
+from datetime import date, datetime, timedelta
+from typing import Union
+
+
+class SystemClock:
+    """The machine's local date and time."""
+
+    __slots__ = ()
+
+    def today(self) -> date:
+        return date.today()
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+
+class FixedClock:
+    """
+    A clock that stays where it is set, for deterministic and cacheable results.
+
+    Usage:
+        previous = set_clock(FixedClock("2025-11-20"))
+        ...
+        set_clock(previous)
+
+    Args:
+        moment: 'YYYY-MM-DD' or ISO timestamp string, date or datetime (a date is taken at midnight)
+    """
+
+    __slots__ = ("moment",)
+
+    def __init__(self, moment: Union[str, date, datetime]):
+        self.set(moment)
+
+    def set(self, moment: Union[str, date, datetime]):
+        if isinstance(moment, str):
+            moment = datetime.fromisoformat(moment)
+        elif not isinstance(moment, datetime):
+            moment = datetime.combine(moment, datetime.min.time())
+        self.moment = moment
+
+    def advance(self, days: int = 0, **kwargs):
+        """Move the clock forward (keyword arguments as for timedelta)."""
+        self.moment += timedelta(days=days, **kwargs)
+
+    def today(self) -> date:
+        return self.moment.date()
+
+    def now(self) -> datetime:
+        return self.moment
+
+
+_clock = SystemClock()
+
+
+def get_clock():
+    return _clock
+
+
+def set_clock(clock):
+    """
+    Replace the process-wide clock (anything with today() and now()).
+
+    Returns:
+        The previous clock, so callers can restore it
+    """
+    global _clock
+    previous, _clock = _clock, clock
+    return previous
+
+
+def today() -> date:
+    """Today's date on the current clock."""
+    return _clock.today()
+
+
+def now() -> datetime:
+    """The current time on the current clock."""
+    return _clock.now()
@@ -0,0 +1,293 @@
+# Ingest: Bulk import of mood logs from iterables, CSV and JSON lines
+# Rows are validated a column at a time and handed to the store as one columnar batch
+
+import csv
+import io
+import json
+import os
+import sys
+import time
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from tools.cycle_calculator import parse_dates
+from utils import clock
+from utils.mood_table import NO_TIMESTAMP, Phase, timestamp_micros
+
+MOOD_LOG_FIELDS = ("user_id", "date", "cycle_phase", "mood", "symptoms", "notes", "logged_at")
+INGEST_FORMATS = ("csv", "jsonl")
+
+# Symptoms in a CSV cell: "cramps;headache"
+SYMPTOM_SEPARATOR = ";"
+
+# Rows validated and stored together
+DEFAULT_BATCH_ROWS = 50_000
+
+# Rejected rows listed in a report (the rest are only counted)
+MAX_REPORTED_ERRORS = 20
+
+
+class MoodLogBatch:
+    """
+    Validated mood logs as columns, ready for a store's extend().
+
+    Attributes:
+        user_ids: User id per row
+        days: Day numbers (days since 1970-01-01), int32
+        phases: Phase name per row (PHASE_NAMES spelling when recognised, else as given)
+        moods: Mood per row
+        symptoms: Symptom names per row (tuples)
+        notes: Notes per row
+        logged_at: Microseconds since 1970-01-01, int64 (NO_TIMESTAMP: none)
+    """
+
+    __slots__ = ("user_ids", "days", "phases", "moods", "symptoms", "notes", "logged_at")
+
+    def __init__(self, user_ids: List[str], days: np.ndarray, phases: List[str], moods: List[str],
+                 symptoms: List[Tuple[str, ...]], notes: List[str], logged_at: np.ndarray):
+        self.user_ids = user_ids
+        self.days = days
+        self.phases = phases
+        self.moods = moods
+        self.symptoms = symptoms
+        self.notes = notes
+        self.logged_at = logged_at
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+
+class IngestReport:
+    """Counts, rejected rows and speed of one import."""
+
+    __slots__ = ("rows_read", "rows_accepted", "errors", "users", "elapsed_s")
+
+    def __init__(self):
+        self.rows_read = 0
+        self.rows_accepted = 0
+        self.errors: List[Tuple[int, str]] = []   # (row number, reason), first MAX_REPORTED_ERRORS
+        self.users: Set[str] = set()
+        self.elapsed_s = 0.0
+
+    @property
+    def rows_rejected(self) -> int:
+        return self.rows_read - self.rows_accepted
+
+    @property
+    def rows_per_s(self) -> float:
+        return self.rows_read / self.elapsed_s if self.elapsed_s else 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            "rows_read": self.rows_read,
+            "rows_accepted": self.rows_accepted,
+            "rows_rejected": self.rows_rejected,
+            "errors": [{"row": row, "error": error} for row, error in self.errors],
+            "users": len(self.users),
+            "elapsed_s": round(self.elapsed_s, 3),
+            "rows_per_s": round(self.rows_per_s, 1),
+        }
+
+
+def read_csv(source) -> Iterator[Dict]:
+    """Rows of a CSV file with a header (path or open text file); symptoms are ';'-separated."""
+    with _open(source) as f:
+        yield from csv.DictReader(f)
+
+
+def read_jsonl(source) -> Iterator[Dict]:
+    """Rows of a JSON-lines file (path or open text file); blank lines are skipped."""
+    with _open(source) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _open(source):
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, newline="", encoding="utf-8")
+    return _Borrowed(source)
+
+
+class _Borrowed:
+    """Context manager that hands back a caller's file without closing it."""
+
+    def __init__(self, f):
+        self.f = f
+
+    def __enter__(self):
+        return self.f
+
+    def __exit__(self, *exc):
+        return False
+
+
+def _symptom_tuple(value, cache: Dict) -> Tuple[str, ...]:
+    if not value:
+        return ()
+    if isinstance(value, str):
+        symptoms = cache.get(value)
+        if symptoms is None:
+            symptoms = cache[value] = tuple(s.strip() for s in value.split(SYMPTOM_SEPARATOR) if s.strip())
+        return symptoms
+    return tuple(value)
+
+
+def build_batch(rows: Sequence[Dict], user_id: Optional[str] = None, logged_at: Optional[int] = None,
+                first_row: int = 1) -> Tuple[MoodLogBatch, List[Tuple[int, str]]]:
+    """
+    Validate rows a column at a time and keep the valid ones as a batch.
+
+    Dates are parsed with NumPy in one call per batch; phases are looked up once per
+    distinct spelling (a recognised one is stored as spelled in PHASE_NAMES, any other
+    as given); symptom lists are parsed once per distinct CSV cell.
+
+    Args:
+        rows: Dicts with the MOOD_LOG_FIELDS keys (user_id, symptoms, notes, logged_at optional)
+        user_id: Owner of rows without a user_id
+        logged_at: Timestamp (microseconds) for rows without a logged_at (default: now)
+        first_row: Row number of rows[0], for error messages
+
+    Returns:
+        Tuple of (batch of the valid rows, [(row number, reason)] for the rejected ones)
+    """
+    count = len(rows)
+    if logged_at is None:
+        logged_at = timestamp_micros(clock.now())
+    ok = np.ones(count, dtype=bool)
+    reasons = np.full(count, "", dtype=object)
+
+    def reject(mask: np.ndarray, reason: str):
+        new = mask & ok
+        reasons[new] = reason
+        ok[new] = False
+
+    user_ids = [row.get("user_id") or user_id for row in rows]
+    reject(np.fromiter((not isinstance(u, str) for u in user_ids), dtype=bool, count=count), "missing user_id")
+
+    dates = [row.get("date") for row in rows]
+    days = parse_dates(np.array([d if isinstance(d, str) else "" for d in dates]))
+    reject(np.isnat(days), "invalid date, expected YYYY-MM-DD")
+    days = np.where(np.isnat(days), np.datetime64(0, "D"), days).astype(np.int32)
+
+    phase_names = np.array([p if isinstance(p, str) else "" for p in (row.get("cycle_phase") for row in rows)])
+    spellings, spelling_index = np.unique(phase_names, return_inverse=True)
+    lookup = np.array([_phase_name(spelling) for spelling in spellings.tolist()], dtype=object)
+    phases = lookup[spelling_index.reshape(-1)]
+    reject(phase_names == "", "missing cycle_phase")
+
+    moods = [row.get("mood") or "" for row in rows]
+    reject(np.fromiter((not isinstance(m, str) for m in moods), dtype=bool, count=count), "mood must be text")
+
+    cache: Dict[str, Tuple[str, ...]] = {}
+    symptoms = []
+    bad = np.zeros(count, dtype=bool)
+    for index, row in enumerate(rows):
+        try:
+            symptoms.append(_symptom_tuple(row.get("symptoms"), cache))
+        except TypeError:
+            symptoms.append(())
+            bad[index] = True
+    reject(bad, "symptoms must be a list or ';'-separated text")
+
+    stamps = np.full(count, logged_at, dtype=np.int64)
+    given = [(index, row["logged_at"]) for index, row in enumerate(rows) if row.get("logged_at")]
+    if given:
+        positions = np.array([index for index, _ in given])
+        stamps[positions] = _parse_timestamps([value for _, value in given])
+        bad = np.zeros(count, dtype=bool)
+        bad[positions] = stamps[positions] == NO_TIMESTAMP
+        reject(bad, "invalid logged_at timestamp")
+
+    keep = np.flatnonzero(ok)
+    keep_list = keep.tolist()
+    batch = MoodLogBatch(
+        user_ids=[user_ids[i] for i in keep_list],
+        days=days[keep],
+        phases=phases[keep].tolist(),
+        moods=[moods[i] for i in keep_list],
+        symptoms=[symptoms[i] for i in keep_list],
+        notes=[rows[i].get("notes") or "" for i in keep_list],
+        logged_at=stamps[keep],
+    )
+    errors = [(first_row + int(i), reasons[i]) for i in np.flatnonzero(~ok)]
+    return batch, errors
+
+
+def _phase_name(spelling: str) -> str:
+    try:
+        return Phase.parse(spelling).label
+    except ValueError:
+        return spelling
+
+
+def _parse_timestamps(values: List) -> np.ndarray:
+    """Microsecond timestamps for ISO strings, NO_TIMESTAMP where invalid (vectorized when all are plain)."""
+    if all(isinstance(v, str) for v in values):
+        try:
+            return np.array(values).astype("datetime64[us]").astype(np.int64)
+        except ValueError:
+            pass  # a UTC offset or an invalid entry: parse one by one
+    parsed = np.empty(len(values), dtype=np.int64)
+    for index, value in enumerate(values):
+        try:
+            parsed[index] = timestamp_micros(value)
+        except (TypeError, ValueError):
+            parsed[index] = NO_TIMESTAMP
+    return parsed
+
+
+def _rows(source, fmt: Optional[str]) -> Iterable[Dict]:
+    if fmt is None and isinstance(source, (str, os.PathLike)):
+        extension = os.path.splitext(os.fspath(source))[1].lower()
+        fmt = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}.get(extension)
+        if fmt is None:
+            raise ValueError(f"Cannot tell the format of {source!r}; pass fmt='csv' or 'jsonl'")
+    if fmt == "csv":
+        return read_csv(source)
+    if fmt == "jsonl":
+        return read_jsonl(source)
+    if fmt is not None:
+        raise ValueError(f"Unknown ingest format: {fmt!r} (expected one of {INGEST_FORMATS})")
+    if isinstance(source, (io.IOBase, str, bytes)):
+        raise ValueError("Pass fmt='csv' or 'jsonl' for an open file")
+    return source
+
+
+def ingest_mood_logs(source: Union[str, os.PathLike, Iterable[Dict]], store, fmt: Optional[str] = None,
+                     user_id: Optional[str] = None, batch_rows: int = DEFAULT_BATCH_ROWS) -> IngestReport:
+    """
+    Validate and store many mood logs, a batch at a time.
+
+    Invalid rows are skipped and reported; the rest are stored with one extend() per batch.
+    Every row of an import without its own logged_at gets the same timestamp.
+
+    Args:
+        source: Path to a .csv or .jsonl file, an open text file (with fmt), or an iterable of dicts
+        store: Mood log store with extend() (MoodLogTable or SQLiteMoodLogStore)
+        fmt: "csv" or "jsonl" (default: from the file extension; iterables need none)
+        user_id: Owner of rows without a user_id (e.g. one user's export from another app)
+        batch_rows: Rows validated and stored at a time
+
+    Returns:
+        IngestReport with counts, the first rejected rows and rows per second
+    """
+    report = IngestReport()
+    started = time.perf_counter()
+    logged_at = timestamp_micros(clock.now())
+    rows = iter(_rows(source, fmt))
+    while True:
+        chunk = list(islice(rows, batch_rows))
+        if not chunk:
+            break
+        batch, errors = build_batch(chunk, user_id=user_id, logged_at=logged_at, first_row=report.rows_read + 1)
+        report.rows_read += len(chunk)
+        report.rows_accepted += store.extend(batch)
+        report.users.update(batch.user_ids)
+        report.errors.extend(errors[:MAX_REPORTED_ERRORS - len(report.errors)])
+    report.elapsed_s = time.perf_counter() - started
+    return report
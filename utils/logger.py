@@ -1,10 +1,19 @@
 # Logger: Observability system for Cycle Wellness Agent
 # Logs agent actions, tool calls, transitions, and key events
 
+import atexit
 import logging
+import os
+import queue
 import sys
-from datetime import datetime
-from typing import Optional
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import LOG_BACKUP_COUNT, LOG_FILE, LOG_FLUSH_EVERY, LOG_MAX_BYTES, LOG_MODE
 
 # Configure logging format
 LOG_FORMAT = "%(asctime)s | %(levelname)-8s | %(name)-20s | %(message)s"
@@ -14,141 +23,295 @@ DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 logger = logging.getLogger("CycleWellnessAgent")
 logger.setLevel(logging.INFO)
 
-# Create console handler
-console_handler = logging.StreamHandler(sys.stdout)
-console_handler.setLevel(logging.INFO)
-console_handler.setFormatter(logging.Formatter(LOG_FORMAT, DATE_FORMAT))
+# Prevent duplicate logs
+logger.propagate = False
+
+_listener: Optional["BatchingQueueListener"] = None
 
-# Create file handler (logs to file)
-file_handler = logging.FileHandler("cycle_wellness_agent.log")
-file_handler.setLevel(logging.INFO)
-file_handler.setFormatter(logging.Formatter(LOG_FORMAT, DATE_FORMAT))
 
-# Add handlers to logger
-logger.addHandler(console_handler)
-logger.addHandler(file_handler)
+class _BatchedFlushMixin:
+    """
+    Flushes the stream every `flush_every` records instead of after each one.
+
+    StreamHandler.emit() calls flush() after every record; here that only counts the
+    record, and force_flush() does the real flush (the queue listener calls it whenever
+    the queue runs dry, so nothing waits long in the buffer).
+    """
+
+    flush_every = 1
+    _pending = 0
+
+    def flush(self):
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.force_flush()
+
+    def force_flush(self):
+        self._pending = 0
+        super().flush()
+
+    def close(self):
+        self.force_flush()
+        super().close()
+
+
+class BatchedStreamHandler(_BatchedFlushMixin, logging.StreamHandler):
+    """Console handler with batched flushes."""
+
+    def __init__(self, stream=None, flush_every: int = LOG_FLUSH_EVERY):
+        super().__init__(stream)
+        self.flush_every = flush_every
 
-# Prevent duplicate logs
-logger.propagate = False
 
-print("Logger initialized")
+class BatchedRotatingFileHandler(_BatchedFlushMixin, RotatingFileHandler):
+    """Size-rotated log file with batched flushes; rotation runs on whichever thread emits."""
+
+    def __init__(self, filename: str, max_bytes: int = LOG_MAX_BYTES, backup_count: int = LOG_BACKUP_COUNT,
+                 flush_every: int = LOG_FLUSH_EVERY):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, delay=True)
+        self.flush_every = flush_every
+
+
+class BatchingQueueListener(QueueListener):
+    """
+    Drains the queue on a background thread and flushes the handlers whenever it is empty.
+
+    The thread starts with the first queued record (see ensure_started()), so
+    configuring logging at import time starts no thread and opens no file.
+    """
+
+    def __init__(self, queue_, *handlers, respect_handler_level: bool = False):
+        super().__init__(queue_, *handlers, respect_handler_level=respect_handler_level)
+        self._start_lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def ensure_started(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self.start()
+
+    def stop(self):
+        """Write out everything queued and stop the thread; the next record starts it again."""
+        with self._start_lock:
+            if self._thread is not None:
+                super().stop()
+
+    def dequeue(self, block: bool):
+        try:
+            return self.queue.get_nowait()
+        except queue.Empty:
+            for handler in self.handlers:
+                handler.force_flush()
+            return self.queue.get(block)
+
+
+class DeferredFormatQueueHandler(QueueHandler):
+    """
+    Queues records with only the %-merge done on the caller's thread.
+
+    The stock QueueHandler runs the full formatter (timestamps, padding) before
+    enqueueing; that work is left to the listener thread here. Arguments are still
+    merged eagerly so later mutation of a logged dict cannot change the message.
+
+    Args:
+        queue_: Queue the listener drains
+        listener: Listener started on the first record, if not running yet
+    """
+
+    def __init__(self, queue_, listener: Optional[BatchingQueueListener] = None):
+        super().__init__(queue_)
+        self.listener = listener
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        if self.listener is not None and not self.listener.running:
+            self.listener.ensure_started()
+        super().enqueue(record)
+
+
+def _build_handlers(log_file: Optional[str], stream, flush_every: int, max_bytes: int,
+                    backup_count: int) -> List[logging.Handler]:
+    formatter = logging.Formatter(LOG_FORMAT, DATE_FORMAT)
+    handlers: List[logging.Handler] = []
+    if stream is not None:
+        handlers.append(BatchedStreamHandler(stream, flush_every=flush_every))
+    if log_file:
+        handlers.append(BatchedRotatingFileHandler(log_file, max_bytes, backup_count, flush_every=flush_every))
+    for handler in handlers:
+        handler.setLevel(logging.INFO)
+        handler.setFormatter(formatter)
+    return handlers
+
+
+def configure_logging(mode: str = LOG_MODE, log_file: Optional[str] = LOG_FILE, stream=sys.stdout,
+                      flush_every: int = LOG_FLUSH_EVERY, max_bytes: int = LOG_MAX_BYTES,
+                      backup_count: int = LOG_BACKUP_COUNT):
+    """
+    (Re)configure where the logger writes, replacing any previous setup.
+
+    Args:
+        mode: "queue" to write from a background listener thread (started by the
+            first record), or "sync" to write
+            (and flush every record) from the calling thread
+        log_file: Rotating log file path, or None for no file
+        stream: Console stream, or None for no console output
+        flush_every: In queue mode, flush the outputs at least every this many records
+        max_bytes: Rotate the log file once it reaches this size (0 never rotates)
+        backup_count: Number of rotated log files to keep
+    """
+    global _listener
+    shutdown_logging()
+
+    if mode == "sync":
+        for handler in _build_handlers(log_file, stream, 1, max_bytes, backup_count):
+            logger.addHandler(handler)
+    elif mode == "queue":
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        handlers = _build_handlers(log_file, stream, flush_every, max_bytes, backup_count)
+        _listener = BatchingQueueListener(log_queue, *handlers, respect_handler_level=True)
+        logger.addHandler(DeferredFormatQueueHandler(log_queue, _listener))   # Starts the listener when first used
+    else:
+        raise ValueError(f"Unknown log mode: {mode!r} (expected 'queue' or 'sync')")
+
+
+def shutdown_logging():
+    """Write out everything queued, stop the listener thread and close all handlers."""
+    global _listener
+    handlers = list(logger.handlers)
+    if _listener is not None:
+        _listener.stop()
+        handlers.extend(_listener.handlers)
+        _listener = None
+    for handler in handlers:
+        logger.removeHandler(handler)
+        try:
+            handler.close()
+        except (OSError, ValueError):
+            # The stream was already closed elsewhere (e.g. stdout at interpreter exit)
+            pass
+
+
+def flush_logs():
+    """Block until every record logged so far has been written and flushed."""
+    if _listener is not None:
+        _listener.stop()   # The next record starts it again
+        for handler in _listener.handlers:
+            handler.force_flush()
+    for handler in logger.handlers:
+        handler.flush()
+
+
+configure_logging()
+atexit.register(shutdown_logging)
 
 # ==================== AGENT LOGGING ====================
+# Messages use %-style arguments, so nothing is formatted when INFO is disabled
 
 def log_agent_start(agent_name: str, user_message: str):
     """Log when an agent starts processing."""
-    logger.info(f"   AGENT START: {agent_name}")
-    logger.info(f"   User Message: {user_message[:100]}...")  # First 100 chars
+    logger.info("   AGENT START: %s | User Message: %.100s...", agent_name, user_message)  # First 100 chars
 
 
 def log_agent_complete(agent_name: str, output_key: str):
     """Log when an agent completes processing."""
-    logger.info(f" AGENT COMPLETE: {agent_name}")
-    logger.info(f"   Output stored in: {output_key}")
+    logger.info(" AGENT COMPLETE: %s | Output stored in: %s", agent_name, output_key)
 
 
 def log_agent_error(agent_name: str, error: str):
     """Log when an agent encounters an error."""
-    logger.error(f" AGENT ERROR: {agent_name}")
-    logger.error(f"   Error: {error}")
+    logger.error(" AGENT ERROR: %s | Error: %s", agent_name, error)
 
 
 # ==================== TOOL LOGGING ====================
 
 def log_tool_call(tool_name: str, args: dict):
     """Log when a tool is called."""
-    logger.info(f" TOOL CALL: {tool_name}")
-    logger.info(f"   Arguments: {args}")
+    logger.info(" TOOL CALL: %s | Arguments: %s", tool_name, args)
 
 
 def log_tool_result(tool_name: str, success: bool, result_summary: str):
     """Log tool execution result."""
-    status = " SUCCESS" if success else " FAILED"
-    logger.info(f"{status}: {tool_name}")
-    logger.info(f"   Result: {result_summary[:100]}...")  # First 100 chars
+    logger.info("%s: %s | Result: %.100s...", " SUCCESS" if success else " FAILED", tool_name,
+                result_summary)  # First 100 chars
 
 
 # ==================== MEMORY LOGGING ====================
 
 def log_memory_store(data_type: str, summary: str):
     """Log when data is stored in memory."""
-    logger.info(f" MEMORY STORE: {data_type}")
-    logger.info(f"   Data: {summary}")
+    logger.info(" MEMORY STORE: %s | Data: %s", data_type, summary)
 
 
 def log_memory_retrieve(data_type: str, count: int):
     """Log when data is retrieved from memory."""
-    logger.info(f" MEMORY RETRIEVE: {data_type}")
-    logger.info(f"   Retrieved {count} records")
+    logger.info(" MEMORY RETRIEVE: %s | Retrieved %d records", data_type, count)
 
 
 # ==================== SESSION LOGGING ====================
 
 def log_session_start(session_id: str, user_id: str):
     """Log when a new session starts."""
-    logger.info(f" SESSION START")
-    logger.info(f"   Session ID: {session_id}")
-    logger.info(f"   User ID: {user_id}")
+    logger.info(" SESSION START | Session ID: %s | User ID: %s", session_id, user_id)
 
 
 def log_session_end(session_id: str, duration: Optional[float] = None):
     """Log when a session ends."""
-    logger.info(f" SESSION END")
-    logger.info(f"   Session ID: {session_id}")
     if duration:
-        logger.info(f"   Duration: {duration:.2f}s")
+        logger.info(" SESSION END | Session ID: %s | Duration: %.2fs", session_id, duration)
+    else:
+        logger.info(" SESSION END | Session ID: %s", session_id)
 
 
 # ==================== KEY EVENTS LOGGING ====================
 
 def log_cycle_data_logged(date: str, phase: str):
     """Log when cycle data is recorded."""
-    logger.info(f" CYCLE DATA LOGGED")
-    logger.info(f"   Date: {date}, Phase: {phase}")
+    logger.info(" CYCLE DATA LOGGED | Date: %s, Phase: %s", date, phase)
 
 
 def log_mood_logged(date: str, mood: str, symptoms: list):
     """Log when mood is recorded."""
-    logger.info(f"   MOOD LOGGED")
-    logger.info(f"   Date: {date}, Mood: {mood}, Symptoms: {symptoms}")
+    logger.info("   MOOD LOGGED | Date: %s, Mood: %s, Symptoms: %s", date, mood, symptoms)
 
 
 def log_pattern_identified(pattern_type: str, description: str):
     """Log when a pattern is identified."""
-    logger.info(f"   PATTERN IDENTIFIED")
-    logger.info(f"   Type: {pattern_type}")
-    logger.info(f"   Description: {description}")
+    logger.info("   PATTERN IDENTIFIED | Type: %s | Description: %s", pattern_type, description)
 
 
 def log_crisis_detected(indicators: list):
     """Log when crisis signals are detected."""
-    logger.warning(f"   CRISIS SIGNALS DETECTED")
-    logger.warning(f"   Indicators: {indicators}")
-    logger.warning(f"   Action: Providing crisis resources")
+    logger.warning("   CRISIS SIGNALS DETECTED | Indicators: %s | Action: Providing crisis resources",
+                   indicators)
 
 
 def log_recommendation_generated(phase: str, mood: str, count: int):
     """Log when recommendations are generated."""
-    logger.info(f"   RECOMMENDATIONS GENERATED")
-    logger.info(f"   Phase: {phase}, Mood: {mood}")
-    logger.info(f"   Count: {count} recommendations")
+    logger.info("   RECOMMENDATIONS GENERATED | Phase: %s, Mood: %s | Count: %d recommendations",
+                phase, mood, count)
 
 
 # ==================== PIPELINE LOGGING ====================
 
 def log_pipeline_start():
     """Log when the full pipeline starts."""
-    logger.info("=" * 60)
-    logger.info("  CYCLE WELLNESS PIPELINE STARTING")
-    logger.info("=" * 60)
+    logger.info("%s\n  CYCLE WELLNESS PIPELINE STARTING\n%s", "=" * 60, "=" * 60)
 
 
 def log_pipeline_complete(success: bool):
     """Log when the full pipeline completes."""
-    status = "  SUCCESS" if success else "  FAILED"
-    logger.info("=" * 60)
-    logger.info(f"  PIPELINE COMPLETE: {status}")
-    logger.info("=" * 60)
+    logger.info("%s\n  PIPELINE COMPLETE: %s\n%s", "=" * 60, "  SUCCESS" if success else "  FAILED", "=" * 60)
 
 
 # ==================== TESTING ====================
@@ -173,6 +336,7 @@ if __name__ == "__main__":
     
     # Test recommendation logging
     log_recommendation_generated("Follicular", "energetic", 5)
+    flush_logs()
     
     print("\n Logger test complete!")
     print(" Check 'cycle_wellness_agent.log' file for full logs")
\ No newline at end of file
@@ -1,43 +1,107 @@
 # Memory Management: Cycle Wellness Agent Memory System
+import atexit
 import os
 import sys
+import time
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from google.adk.sessions import InMemorySessionService
 from google.adk.memory import InMemoryMemoryService
-from google.genai import types
 
 # Try to import load_memory, but don't fail if it's not available
 try:
     from google.adk.memory import load_memory
-    print("✅ load_memory tool imported")
 except ImportError:
-    load_memory = None
-    print(" load_memory not available in this ADK version (optional)")
-from datetime import datetime
-from typing import List, Dict, Optional
+    load_memory = None  # Not available in this ADK version (optional)
+from datetime import date, timedelta
+from typing import Iterable, List, Dict, Optional
+
+from config import STORAGE_BACKEND, STORAGE_DIR
+from utils import clock
+from utils.batch_analyzer import analyze_population
+from utils.ingest import ingest_mood_logs
+from utils.mood_table import MoodLogTable, day_iso
+from utils.storage import PatternStore
+from utils.sqlite_store import SQLiteDatabase, SQLiteMapping, SQLiteMoodLogStore, SQLitePatternStore
+from tools.cycle_analytics import DEFAULT_CYCLE_LENGTH, CycleModel
+from tools.cycle_calculator import PhaseCalendar
+from tools.pattern_analyzer import PATTERN_TYPES, MoodPatternAggregate, analyze_mood_logs
 
 # Define constants
 APP_NAME = "CycleWellnessApp"
 USER_ID = "cycle_user"
 
-# Create Session Service (handles conversations)
-session_service = InMemorySessionService()
-print("✅ InMemorySessionService created")
 
-# Create Memory Service (stores long-term memories)
-memory_service = InMemoryMemoryService()
-print("✅ InMemoryMemoryService created")
+def create_services(backend: str = STORAGE_BACKEND, storage_dir: str = STORAGE_DIR):
+    """
+    Create the session and memory services for a storage backend.
+    
+    Args:
+        backend: "memory" (lost on restart, useful for tests) or "sqlite" (durable)
+        storage_dir: Directory holding the SQLite files
+    
+    Returns:
+        Tuple of (session_service, memory_service)
+    """
+    if backend == "sqlite":
+        from google.adk.memory import SqliteMemoryService
+        from google.adk.sessions.sqlite_session_service import SqliteSessionService
+        os.makedirs(storage_dir, exist_ok=True)
+        return (SqliteSessionService(os.path.join(storage_dir, "sessions.db")),
+                SqliteMemoryService(os.path.join(storage_dir, "memory.db")))
+    if backend != "memory":
+        raise ValueError(f"Unknown storage backend: {backend}")
+    return InMemorySessionService(), InMemoryMemoryService()
+
+
+def create_cycle_data_store(backend: str = STORAGE_BACKEND, storage_dir: str = STORAGE_DIR) -> Dict:
+    """
+    Create the structured cycle data store for a storage backend.
+    
+    Args:
+        backend: "memory" (lost on restart, useful for tests) or "sqlite" (durable)
+        storage_dir: Directory holding the SQLite files
+    
+    Returns:
+        Dictionary with cycle_info, mood_logs, patterns and user_preferences stores
+    """
+    if backend == "sqlite":
+        os.makedirs(storage_dir, exist_ok=True)
+        db = SQLiteDatabase(os.path.join(storage_dir, "cycle_data.db"))
+        atexit.register(db.close)  # Flush batched writes on shutdown
+        return {
+            "cycle_info": SQLiteMapping(db, "cycle_info"),
+            "mood_logs": SQLiteMoodLogStore(db),
+            "patterns": SQLitePatternStore(db),
+            "user_preferences": SQLiteMapping(db, "user_preferences"),
+        }
+    if backend != "memory":
+        raise ValueError(f"Unknown storage backend: {backend}")
+    return {
+        "cycle_info": {},      # Current cycle information
+        "mood_logs": MoodLogTable(),  # Mood logs, columnar and date-sorted per user
+        "patterns": PatternStore(),   # Identified patterns, partitioned per user
+        "user_preferences": {} # User preferences
+    }
+
+
+# Create Session Service (handles conversations) and Memory Service (stores long-term memories)
+session_service, memory_service = create_services()
 
-# In-memory storage for structured cycle data
-cycle_data_store = {
-    "cycle_info": {},      # Current cycle information
-    "mood_logs": [],       # List of all mood logs
-    "patterns": [],        # Identified patterns
-    "user_preferences": {} # User preferences
-}
+# Storage for structured cycle data
+cycle_data_store = create_cycle_data_store()
 
-print("✅ Cycle data store initialized")
+# Running pattern aggregates per user, updated as mood logs are added
+pattern_aggregates: Dict[str, MoodPatternAggregate] = {}
+
+# Cycle models per user, updated as period starts are stored
+cycle_models: Dict[str, CycleModel] = {}
+
+# Precomputed phase calendars per user, regenerated when store_cycle_info() changes the cycle
+phase_calendars: Dict[str, PhaseCalendar] = {}
+
+# Patterns written per store call during the nightly report
+PATTERN_WRITE_BATCH = 5_000
 
 
 # ====== SESSION MANAGEMENT ======
@@ -45,37 +109,10 @@ print("✅ Cycle data store initialized")
 async def run_session(runner_instance, user_queries, session_id: str = "default"):
     """
     Helper function to run queries in a session and display responses.
-    Follows Kaggle pattern.
+    Kept for existing callers; see pipeline.streaming.run_session().
     """
-    print(f"\n### Session: {session_id}")
-    
-    # Create or retrieve session
-    try:
-        session = await session_service.create_session(
-            app_name=APP_NAME, user_id=USER_ID, session_id=session_id
-        )
-    except:
-        session = await session_service.get_session(
-            app_name=APP_NAME, user_id=USER_ID, session_id=session_id
-        )
-    
-    # Convert single query to list
-    if isinstance(user_queries, str):
-        user_queries = [user_queries]
-    
-    # Process each query
-    for query in user_queries:
-        print(f"\n User > {query}")
-        query_content = types.Content(role="user", parts=[types.Part(text=query)])
-        
-        # Stream agent response
-        async for event in runner_instance.run_async(
-            user_id=USER_ID, session_id=session.id, new_message=query_content
-        ):
-            if event.is_final_response() and event.content and event.content.parts:
-                text = event.content.parts[0].text
-                if text and text != "None":
-                    print(f" Agent > {text}")
+    from pipeline.streaming import run_session as run_streamed_session  # pipeline imports utils, not the reverse
+    await run_streamed_session(runner_instance, user_queries, session_id)
 
 
 async def save_session_to_memory(session_id: str):
@@ -98,17 +135,35 @@ def store_cycle_info(last_period_date: str, cycle_length: int, user_id: str = US
     """
     Store current cycle information.
     
+    A last period date a plausible cycle after the latest one is also kept as a new
+    period start, from which the user's real cycle length is learned (see
+    get_cycle_insights()); a date within that many days of the latest start corrects
+    it instead, and an older one is backfilled (see CycleModel.set_last_period_start()).
+    The user's phase calendar is regenerated here, and only if the last start or the
+    learned length changed. Nothing is stored unless the date, the length and the
+    calendar are all valid.
+    
     Args:
         last_period_date: Date in format 'YYYY-MM-DD'
-        cycle_length: Average cycle length in days
+        cycle_length: Average cycle length in days (a positive whole number)
         user_id: User identifier
     """
     try:
+        cycle_length = int(cycle_length)
+        if cycle_length <= 0:
+            raise ValueError("cycle length must be a positive number of days")
+        model = _get_cycle_model(user_id).copy()   # Updated aside, kept only if everything is valid
+        model.set_last_period_start(last_period_date)  # Validates the date; O(1) for a new cycle
+        model.declared_length = cycle_length
+        calendar = _phase_calendar_for(user_id, model)
         cycle_data_store["cycle_info"][user_id] = {
             "last_period_date": last_period_date,
             "cycle_length": cycle_length,
-            "updated_at": datetime.now().isoformat()
+            "period_starts": [day_iso(day) for day in model.starts],
+            "updated_at": clock.now().isoformat()
         }
+        cycle_models[user_id] = model
+        phase_calendars[user_id] = calendar
         print(f"✅ Cycle info stored: Last period {last_period_date}, Length {cycle_length} days")
         return True
     except Exception as e:
@@ -121,6 +176,99 @@ def get_cycle_info(user_id: str = USER_ID) -> Optional[Dict]:
     return cycle_data_store["cycle_info"].get(user_id)
 
 
+def get_cycle_insights(user_id: str = USER_ID, today: Optional[str] = None) -> Dict:
+    """
+    Current phase and next period from the user's logged period starts.
+    
+    The cycle length is the rolling mean of the user's recent cycles (the declared
+    length until a full cycle is logged), and phase boundaries scale to it.
+    
+    Args:
+        user_id: User identifier
+        today: Reference date 'YYYY-MM-DD' (default: today)
+    
+    Returns:
+        Dictionary like calculate_cycle_phase() plus cycle_length_std, cycles_observed,
+        last_period_date and phase_last_days
+    """
+    return _get_cycle_model(user_id).predict(today)
+
+
+def _get_cycle_model(user_id: str) -> CycleModel:
+    """Return a user's cycle model, rebuilding it once from stored cycle info if needed."""
+    model = cycle_models.get(user_id)
+    if model is None:
+        info = get_cycle_info(user_id) or {}
+        model = cycle_models[user_id] = CycleModel(int(info.get("cycle_length", DEFAULT_CYCLE_LENGTH)))
+        starts = info.get("period_starts") or ([info["last_period_date"]] if info else [])
+        for start in starts:
+            model.add_period_start(start)
+    return model
+
+
+def _phase_calendar_for(user_id: str, model: CycleModel) -> Optional[PhaseCalendar]:
+    """The user's phase calendar if it matches the model's last start and length, else a new one."""
+    if not model.starts:
+        return None
+    last_period, cycle_length = day_iso(model.starts[-1]), model.cycle_length
+    calendar = phase_calendars.get(user_id)
+    if calendar is None or (calendar.last_period_date, calendar.cycle_length) != (last_period, cycle_length):
+        calendar = PhaseCalendar(last_period, cycle_length)
+    return calendar
+
+
+def _refresh_phase_calendar(user_id: str, model: CycleModel) -> Optional[PhaseCalendar]:
+    """Rebuild a user's phase calendar if the model's last start or length moved."""
+    calendar = _phase_calendar_for(user_id, model)
+    if calendar is None:
+        phase_calendars.pop(user_id, None)
+    else:
+        phase_calendars[user_id] = calendar
+    return calendar
+
+
+def get_phase_calendar(user_id: str = USER_ID) -> Optional[PhaseCalendar]:
+    """
+    The user's precomputed phase calendar (learned length, last logged start).
+    
+    Answers phase_on(date), next_ovulation_window(date) and days_until_next_period(date)
+    in O(1) without reading the clock.
+    
+    Returns:
+        PhaseCalendar, or None without cycle info
+    """
+    calendar = phase_calendars.get(user_id)
+    if calendar is None:
+        calendar = _refresh_phase_calendar(user_id, _get_cycle_model(user_id))
+    return calendar
+
+
+def get_today_snapshot(user_id: str = USER_ID, today: Optional[str] = None) -> Optional[Dict]:
+    """
+    The user's cycle on one day, from the phase calendar.
+    
+    Results depend only on the stored cycle and the day, so pinning the clock
+    (utils.clock.set_clock) makes them deterministic and safe to cache.
+    
+    Args:
+        user_id: User identifier
+        today: Reference date 'YYYY-MM-DD' (default: today on utils.clock)
+    
+    Returns:
+        Dictionary like calculate_cycle_phase() plus next_ovulation_start and
+        next_ovulation_end, or None without cycle info
+    """
+    calendar = get_phase_calendar(user_id)
+    if calendar is None:
+        return None
+    day = date.fromisoformat(today) if today else clock.today()
+    snapshot = calendar.snapshot(day)
+    ovulation_start, ovulation_end = calendar.next_ovulation_window(day)
+    snapshot["next_ovulation_start"] = ovulation_start.isoformat()
+    snapshot["next_ovulation_end"] = ovulation_end.isoformat()
+    return snapshot
+
+
 def add_mood_log(date: str, cycle_phase: str, mood: str, symptoms: List[str], 
                  notes: str = "", user_id: str = USER_ID) -> bool:
     """
@@ -142,9 +290,11 @@ def add_mood_log(date: str, cycle_phase: str, mood: str, symptoms: List[str],
             "mood": mood,
             "symptoms": symptoms,
             "notes": notes,
-            "logged_at": datetime.now().isoformat()
+            "logged_at": clock.now().isoformat()
         }
+        aggregate = _get_pattern_aggregate(user_id)  # Built before the append so it isn't counted twice
         cycle_data_store["mood_logs"].append(mood_entry)
+        aggregate.add(mood_entry)
         print(f"✅ Mood log added: {date} - {mood} ({cycle_phase} phase)")
         return True
     except Exception as e:
@@ -152,8 +302,72 @@ def add_mood_log(date: str, cycle_phase: str, mood: str, symptoms: List[str],
         return False
 
 
+def import_mood_logs(source, fmt: Optional[str] = None, user_id: str = USER_ID) -> Dict:
+    """
+    Bulk-import mood logs, e.g. a history exported from another tracker app or a backfill.
+    
+    Rows are validated and stored in batches, without a per-row timestamp call or
+    print; invalid rows are skipped and reported.
+    
+    Args:
+        source: Path to a .csv or .jsonl file, an open text file (with fmt), or an
+            iterable of mood log dicts. CSV symptoms are ';'-separated.
+        fmt: "csv" or "jsonl" (default: from the file extension)
+        user_id: Owner of rows without a user_id column
+    
+    Returns:
+        Report with rows read/accepted/rejected, the first errors and rows per second
+    """
+    report = ingest_mood_logs(source, cycle_data_store["mood_logs"], fmt=fmt, user_id=user_id)
+    for imported_user in report.users:
+        pattern_aggregates.pop(imported_user, None)  # Rebuilt from the store on next use
+    print(f"✅ Imported {report.rows_accepted} mood logs ({report.rows_rejected} rejected, "
+          f"{report.rows_per_s:,.0f} rows/s)")
+    return report.to_dict()
+
+
+def _get_pattern_aggregate(user_id: str) -> MoodPatternAggregate:
+    """Return a user's running aggregate, rebuilding it once from stored logs if needed."""
+    aggregate = pattern_aggregates.get(user_id)
+    if aggregate is None:
+        aggregate = pattern_aggregates[user_id] = MoodPatternAggregate()
+        store = cycle_data_store["mood_logs"]
+        aggregate.add_many(store.query(user_id, limit=store.count(user_id)))
+    return aggregate
+
+
+def get_mood_patterns(user_id: str = USER_ID) -> Dict:
+    """
+    Analyze a user's mood history from the running aggregates.
+    
+    Returns the same result as analyze_mood_patterns() over all of the user's
+    logs, without rescanning the history.
+    """
+    return _get_pattern_aggregate(user_id).result()
+
+
+def analyze_patterns(user_id: str = USER_ID, logs: Optional[Iterable[Dict]] = None) -> Dict:
+    """
+    Analyze mood patterns in process, without the JSON string the agent tool takes.
+    
+    A user's whole history is read from the running aggregate (see get_mood_patterns()),
+    so only a list of logs is counted here.
+    
+    Args:
+        user_id: User whose stored history is analyzed (when logs is not given)
+        logs: Mood log dicts to analyze instead, e.g. get_cycle_logs(3)
+    
+    Returns:
+        The same result as analyze_mood_patterns() over the logs
+    """
+    if logs is not None:
+        return analyze_mood_logs(logs)
+    return get_mood_patterns(user_id)
+
+
 def get_mood_logs(user_id: str = USER_ID, limit: int = 30, 
-                  cycle_phase: Optional[str] = None) -> List[Dict]:
+                  cycle_phase: Optional[str] = None, start_date: Optional[str] = None,
+                  end_date: Optional[str] = None, as_records: bool = False) -> List:
     """
     Retrieve mood logs with optional filtering.
     
@@ -161,23 +375,86 @@ def get_mood_logs(user_id: str = USER_ID, limit: int = 30,
         user_id: User identifier
         limit: Maximum number of logs to return
         cycle_phase: Optional filter by cycle phase
+        start_date: Optional first date 'YYYY-MM-DD', inclusive
+        end_date: Optional last date 'YYYY-MM-DD', inclusive
+        as_records: Return compact MoodRecord rows instead of dicts (for code that
+            reads many logs; call to_dict() on a record for the dict shape)
     
     Returns:
         List of mood log entries
     """
-    logs = [log for log in cycle_data_store["mood_logs"] if log["user_id"] == user_id]
+    # Partitions are kept date-sorted, so this only touches the returned logs
+    store = cycle_data_store["mood_logs"]
+    read = store.records if as_records else store.query
+    logs = read(user_id, limit=limit, cycle_phase=cycle_phase, start=start_date, end=end_date)
     
-    # Filter by phase if specified
-    if cycle_phase:
-        logs = [log for log in logs if log["cycle_phase"].lower() == cycle_phase.lower()]
+    print(f"✅ Retrieved {len(logs)} mood logs" + (f" for {cycle_phase} phase" if cycle_phase else ""))
+    return logs
+
+
+def get_cycle_logs(cycles: int = 3, cycle_phase: Optional[str] = None, user_id: str = USER_ID,
+                   today: Optional[str] = None) -> List[Dict]:
+    """
+    Retrieve the mood logs of the last few cycles, e.g. "the last 3 cycles".
     
-    # Sort by date (most recent first) and limit
-    logs = sorted(logs, key=lambda x: x["date"], reverse=True)[:limit]
+    Cycles are counted back from the stored last period date and cycle length.
     
-    print(f"✅ Retrieved {len(logs)} mood logs" + (f" for {cycle_phase} phase" if cycle_phase else ""))
+    Args:
+        cycles: Number of cycles, the current one included
+        cycle_phase: Optional filter by cycle phase
+        user_id: User identifier
+        today: Reference date 'YYYY-MM-DD' (default: today)
+    
+    Returns:
+        List of mood log entries, most recent first ([] without cycle info)
+    """
+    window = _current_cycle(user_id, today)
+    if window is None or cycles <= 0:
+        return []
+    cycle_start, cycle_length, today = window
+    store = cycle_data_store["mood_logs"]
+    logs = store.query(user_id, limit=store.count(user_id), cycle_phase=cycle_phase,
+                       start=cycle_start - timedelta(days=(cycles - 1) * cycle_length), end=today)
+    print(f"✅ Retrieved {len(logs)} mood logs from the last {cycles} cycles")
     return logs
 
 
+def get_cycle_day_logs(day_in_cycle: int, cycles: int = 6, user_id: str = USER_ID,
+                       today: Optional[str] = None) -> List[Dict]:
+    """
+    Retrieve the mood logs of the same cycle day across past cycles.
+    
+    Args:
+        day_in_cycle: Day in the cycle, counted like calculate_cycle_phase() (0 = first day of the period)
+        cycles: Number of cycles to look back over, the current one included
+        user_id: User identifier
+        today: Reference date 'YYYY-MM-DD' (default: today)
+    
+    Returns:
+        List of mood log entries, most recent first ([] without cycle info)
+    """
+    window = _current_cycle(user_id, today)
+    if window is None:
+        return []
+    cycle_start, cycle_length, today = window
+    if not 0 <= day_in_cycle < cycle_length:
+        return []
+    dates = [cycle_start + timedelta(days=day_in_cycle - back * cycle_length) for back in range(cycles)]
+    store = cycle_data_store["mood_logs"]
+    logs = store.query(user_id, limit=store.count(user_id), dates=[day for day in dates if day <= today])
+    print(f"✅ Retrieved {len(logs)} mood logs for cycle day {day_in_cycle}")
+    return logs
+
+
+def _current_cycle(user_id: str, today: Optional[str]):
+    """(start of the cycle containing today, learned cycle length, today), or None without cycle info."""
+    calendar = get_phase_calendar(user_id)
+    if calendar is None:
+        return None
+    today = date.fromisoformat(today) if today else clock.today()
+    return today - timedelta(days=calendar.day_in_cycle(today)), calendar.cycle_length, today
+
+
 def store_pattern(pattern_type: str, description: str, data: Dict, 
                   user_id: str = USER_ID) -> bool:
     """
@@ -195,7 +472,7 @@ def store_pattern(pattern_type: str, description: str, data: Dict,
             "type": pattern_type,
             "description": description,
             "data": data,
-            "identified_at": datetime.now().isoformat()
+            "identified_at": clock.now().isoformat()
         }
         cycle_data_store["patterns"].append(pattern_entry)
         print(f"✅ Pattern stored: {pattern_type}")
@@ -205,6 +482,62 @@ def store_pattern(pattern_type: str, description: str, data: Dict,
         return False
 
 
+def store_patterns(patterns: Iterable[Dict]) -> int:
+    """
+    Store many identified patterns at once (the bulk form of store_pattern()).
+    
+    Args:
+        patterns: Dicts with user_id, type, description and data
+    
+    Returns:
+        Number of patterns stored
+    """
+    identified_at = clock.now().isoformat()
+    stored = cycle_data_store["patterns"].extend(
+        {**pattern, "identified_at": pattern.get("identified_at") or identified_at} for pattern in patterns)
+    print(f"✅ Stored {stored} patterns")
+    return stored
+
+
+def run_nightly_pattern_report(workers: Optional[int] = None) -> Dict:
+    """
+    Analyze every user's mood history on a process pool and store the patterns found.
+    
+    Users are sharded across worker processes (see utils/batch_analyzer.py); results
+    are stored in bulk as shards finish. Each run replaces an analyzed user's stored
+    patterns of the analyzer's types (PATTERN_TYPES), so they are never duplicated.
+    
+    Args:
+        workers: Worker processes (default: one per CPU; 0 runs in this process)
+    
+    Returns:
+        Dictionary with users analyzed, patterns stored and elapsed seconds
+    """
+    started = time.perf_counter()
+    users = stored = 0
+    pending: List[Dict] = []
+    pending_users: List[str] = []
+    for user_id, result in analyze_population(cycle_data_store["mood_logs"], workers=workers):
+        users += 1
+        pending_users.append(user_id)
+        pending.extend({"user_id": user_id, "type": pattern["type"], "description": pattern["insight"],
+                        "data": pattern} for pattern in result["patterns_found"])
+        if len(pending) >= PATTERN_WRITE_BATCH or len(pending_users) >= PATTERN_WRITE_BATCH:
+            stored += _replace_patterns(pending_users, pending)
+            pending, pending_users = [], []
+    if pending_users:
+        stored += _replace_patterns(pending_users, pending)
+    elapsed = time.perf_counter() - started
+    print(f"✅ Nightly pattern report: {users} users, {stored} patterns in {elapsed:.1f}s")
+    return {"users": users, "patterns_stored": stored, "elapsed_s": round(elapsed, 3)}
+
+
+def _replace_patterns(user_ids: List[str], patterns: List[Dict]) -> int:
+    """Swap the users' stored analyzer patterns for a new set."""
+    cycle_data_store["patterns"].clear_types(user_ids, PATTERN_TYPES)
+    return store_patterns(patterns) if patterns else 0
+
+
 def get_patterns(user_id: str = USER_ID, pattern_type: Optional[str] = None) -> List[Dict]:
     """
     Retrieve stored patterns with optional type filtering.
@@ -216,10 +549,7 @@ def get_patterns(user_id: str = USER_ID, pattern_type: Optional[str] = None) ->
     Returns:
         List of pattern entries
     """
-    patterns = [p for p in cycle_data_store["patterns"] if p["user_id"] == user_id]
-    
-    if pattern_type:
-        patterns = [p for p in patterns if p["type"] == pattern_type]
+    patterns = cycle_data_store["patterns"].query(user_id, pattern_type=pattern_type)
     
     print(f"✅ Retrieved {len(patterns)} patterns")
     return patterns
@@ -230,67 +560,75 @@ def clear_all_data(user_id: str = USER_ID):
     if user_id in cycle_data_store["cycle_info"]:
         del cycle_data_store["cycle_info"][user_id]
     
-    cycle_data_store["mood_logs"] = [log for log in cycle_data_store["mood_logs"] 
-                                      if log["user_id"] != user_id]
-    cycle_data_store["patterns"] = [p for p in cycle_data_store["patterns"] 
-                                     if p["user_id"] != user_id]
+    cycle_data_store["mood_logs"].clear_user(user_id)
+    cycle_data_store["patterns"].clear_user(user_id)
+    pattern_aggregates.pop(user_id, None)
+    cycle_models.pop(user_id, None)
+    phase_calendars.pop(user_id, None)
     
     print(f"✅ All data cleared for user {user_id}")
 
 
 # ====== TESTING ======
 
-print("\n" + "="*50)
-print("TESTING MEMORY SYSTEM")
-print("="*50)
-
-# Test 1: Store cycle info
-print("\n Test 1: Storing cycle information...")
-store_cycle_info("2025-11-18", 28)
-
-# Test 2: Retrieve cycle info
-print("\n Test 2: Retrieving cycle information...")
-cycle_info = get_cycle_info()
-print(f"   Retrieved: {cycle_info}")
-
-# Test 3: Add mood logs
-print("\n Test 3: Adding mood logs...")
-add_mood_log("2025-11-20", "Follicular", "energetic", [], "Feeling great!")
-add_mood_log("2025-11-25", "Ovulation", "happy", ["mild cramps"], "Productive day")
-add_mood_log("2025-11-28", "Luteal", "anxious", ["fatigue", "headache"], "Feeling stressed")
-
-# Test 4: Retrieve all mood logs
-print("\n Test 4: Retrieving all mood logs...")
-all_logs = get_mood_logs(limit=10)
-print(f"   Total logs: {len(all_logs)}")
-
-# Test 5: Retrieve mood logs by phase
-print("\n Test 5: Retrieving Luteal phase logs only...")
-luteal_logs = get_mood_logs(cycle_phase="Luteal")
-print(f"   Luteal logs: {len(luteal_logs)}")
-
-# Test 6: Store pattern
-print("\n Test 6: Storing identified pattern...")
-store_pattern(
-    pattern_type="phase_mood_correlation",
-    description="Anxiety tends to spike during luteal phase",
-    data={"phase": "Luteal", "mood": "anxious", "frequency": 3}
-)
-
-# Test 7: Retrieve patterns
-print("\n Test 7: Retrieving patterns...")
-patterns = get_patterns()
-print(f"   Patterns found: {len(patterns)}")
-
-print("\n" + "="*50)
-print("✅ MEMORY SYSTEM READY FOR USE")
-print("="*50)
-print("\nAvailable functions:")
-print("  • store_cycle_info() - Store cycle data")
-print("  • get_cycle_info() - Retrieve cycle data")
-print("  • add_mood_log() - Add mood/symptom entry")
-print("  • get_mood_logs() - Retrieve mood history")
-print("  • store_pattern() - Store identified patterns")
-print("  • get_patterns() - Retrieve patterns")
-print("  • save_session_to_memory() - Save conversations (Kaggle pattern)")
-print("="*50)
\ No newline at end of file
+if __name__ == "__main__":
+    print("\n" + "="*50)
+    print("TESTING MEMORY SYSTEM")
+    print("="*50)
+
+    # Test 1: Store cycle info
+    print("\n Test 1: Storing cycle information...")
+    store_cycle_info("2025-11-18", 28)
+
+    # Test 2: Retrieve cycle info
+    print("\n Test 2: Retrieving cycle information...")
+    cycle_info = get_cycle_info()
+    print(f"   Retrieved: {cycle_info}")
+
+    # Test 3: Add mood logs
+    print("\n Test 3: Adding mood logs...")
+    add_mood_log("2025-11-20", "Follicular", "energetic", [], "Feeling great!")
+    add_mood_log("2025-11-25", "Ovulation", "happy", ["mild cramps"], "Productive day")
+    add_mood_log("2025-11-28", "Luteal", "anxious", ["fatigue", "headache"], "Feeling stressed")
+
+    # Test 4: Retrieve all mood logs
+    print("\n Test 4: Retrieving all mood logs...")
+    all_logs = get_mood_logs(limit=10)
+    print(f"   Total logs: {len(all_logs)}")
+
+    # Test 5: Retrieve mood logs by phase
+    print("\n Test 5: Retrieving Luteal phase logs only...")
+    luteal_logs = get_mood_logs(cycle_phase="Luteal")
+    print(f"   Luteal logs: {len(luteal_logs)}")
+
+    # Test 6: Store pattern
+    print("\n Test 6: Storing identified pattern...")
+    store_pattern(
+        pattern_type="phase_mood_correlation",
+        description="Anxiety tends to spike during luteal phase",
+        data={"phase": "Luteal", "mood": "anxious", "frequency": 3}
+    )
+
+    # Test 7: Retrieve patterns
+    print("\n Test 7: Retrieving patterns...")
+    patterns = get_patterns()
+    print(f"   Patterns found: {len(patterns)}")
+
+    print("\n" + "="*50)
+    print("✅ MEMORY SYSTEM READY FOR USE")
+    print("="*50)
+    print("\nAvailable functions:")
+    print("  • store_cycle_info() - Store cycle data")
+    print("  • get_cycle_info() - Retrieve cycle data")
+    print("  • get_cycle_insights() - Phase and next period from the learned cycle length")
+    print("  • get_phase_calendar() / get_today_snapshot() - Precomputed phase per day")
+    print("  • add_mood_log() - Add mood/symptom entry")
+    print("  • import_mood_logs() - Bulk-import mood history (CSV, JSONL or dicts)")
+    print("  • get_mood_logs() - Retrieve mood history")
+    print("  • analyze_patterns() - Analyze a user's or a list's mood patterns in process")
+    print("  • get_cycle_logs() / get_cycle_day_logs() - Mood history by cycle")
+    print("  • store_pattern() - Store identified patterns")
+    print("  • run_nightly_pattern_report() - Analyze every user on a process pool")
+    print("  • get_patterns() - Retrieve patterns")
+    print("  • save_session_to_memory() - Save conversations (Kaggle pattern)")
+    print("="*50)
@@ -0,0 +1,555 @@
+# Mood Table: Columnar per-user storage for mood logs
+# Dates are day numbers; phases, moods and symptoms are codes into per-table vocabularies
+
+import os
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta, timezone
+from enum import IntEnum
+from functools import lru_cache
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from tools.cycle_calculator import ISO_DATE_PATTERN, PHASE_NAMES
+
+# Day numbers count days since 1970-01-01, like numpy's datetime64[D]
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_EPOCH_DATETIME = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+# logged_at of a row stored without one (numpy's NaT as int64)
+NO_TIMESTAMP = np.iinfo(np.int64).min
+
+# Day number of the first date kept verbatim (text that is not 'YYYY-MM-DD'). Far past any
+# real date, so those rows sort after dated ones, as their strings did in the list store.
+UNDATED_DAY = (1 << 31) - (1 << 16)
+
+# Phase code of a log whose phase is not one of PHASE_NAMES, in coded_logs()
+UNKNOWN_PHASE = 255
+
+
+class Phase(IntEnum):
+    """
+    Cycle phase codes, in cycle order (the index into PHASE_NAMES).
+
+    A MoodLogTable codes these names exactly as spelled in PHASE_NAMES; every other
+    spelling ("luteal", "Unknown") gets a code of its own after them.
+    """
+
+    MENSTRUAL = 0
+    FOLLICULAR = 1
+    OVULATION = 2
+    LUTEAL = 3
+
+    @property
+    def label(self) -> str:
+        return PHASE_NAMES[self]
+
+    @classmethod
+    def parse(cls, name: str) -> "Phase":
+        """Phase for a name, ignoring case and surrounding spaces; ValueError if unknown."""
+        phase = _PHASES_BY_NAME.get(name.strip().lower()) if isinstance(name, str) else None
+        if phase is None:
+            raise ValueError(f"Unknown cycle phase: {name!r}")
+        return phase
+
+
+_PHASES_BY_NAME = {name.lower(): Phase(index) for index, name in enumerate(PHASE_NAMES)}
+
+
+def day_number(value) -> int:
+    """Day number of a 'YYYY-MM-DD' string or a date; ValueError if it is not one."""
+    if isinstance(value, str):
+        if not ISO_DATE_PATTERN.fullmatch(value):
+            raise ValueError(f"Invalid date, expected YYYY-MM-DD: {value!r}")
+        value = date.fromisoformat(value)
+    elif isinstance(value, datetime) or not isinstance(value, date):
+        raise ValueError(f"Invalid date, expected YYYY-MM-DD: {value!r}")
+    return value.toordinal() - EPOCH_ORDINAL
+
+
+@lru_cache(maxsize=1 << 16)
+def day_iso(day: int) -> str:
+    """'YYYY-MM-DD' for a day number (cached: a table holds few distinct days)."""
+    return date.fromordinal(day + EPOCH_ORDINAL).isoformat()
+
+
+def timestamp_micros(value) -> int:
+    """
+    Microseconds since 1970-01-01 for an ISO timestamp or datetime ("" or None: NO_TIMESTAMP).
+
+    Timestamps with a UTC offset are stored as UTC wall time.
+    """
+    if not value:
+        return NO_TIMESTAMP
+    moment = value if isinstance(value, datetime) else datetime.fromisoformat(value)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return (moment - _EPOCH_DATETIME) // _MICROSECOND
+
+
+def timestamp_iso(micros: int) -> str:
+    """ISO timestamp for microseconds since 1970-01-01 ("" for NO_TIMESTAMP)."""
+    if micros == NO_TIMESTAMP:
+        return ""
+    return (_EPOCH_DATETIME + timedelta(microseconds=micros)).isoformat()
+
+
+class Vocabulary:
+    """
+    Interned strings: each distinct value gets the next small integer code.
+
+    Args:
+        max_size: Number of codes available (the capacity of the code column)
+        values: Values to code first, in order (codes 0, 1, ...)
+    """
+
+    __slots__ = ("codes", "values", "max_size")
+
+    def __init__(self, max_size: int, values: Iterable[str] = ()):
+        self.codes: Dict[str, int] = {}
+        self.values: List[str] = []
+        self.max_size = max_size
+        for value in values:
+            self.code(value)
+
+    def code(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            if len(self.values) >= self.max_size:
+                raise ValueError(f"More than {self.max_size} distinct values")
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class MoodRecord:
+    """
+    One mood log as a compact row.
+
+    The date, phase and mood are the table's shared strings, so a record adds little
+    more than its own slots and symptom tuple. to_dict() gives the dict shape the tools
+    return.
+    """
+
+    __slots__ = ("user_id", "date", "cycle_phase", "mood", "symptoms", "notes", "logged_at")
+
+    def __init__(self, user_id: str, date: str, cycle_phase: str, mood: str, symptoms: Tuple[str, ...] = (),
+                 notes: str = "", logged_at: int = NO_TIMESTAMP):
+        self.user_id = user_id
+        self.date = date
+        self.cycle_phase = cycle_phase
+        self.mood = mood
+        self.symptoms = symptoms
+        self.notes = notes
+        self.logged_at = logged_at
+
+    @classmethod
+    def from_dict(cls, entry: Dict) -> "MoodRecord":
+        """Record for a mood log dict, with its fields as given; ValueError for a bad timestamp."""
+        return cls(entry["user_id"], entry["date"], entry["cycle_phase"], entry.get("mood", ""),
+                   tuple(entry.get("symptoms") or ()), entry.get("notes") or "",
+                   timestamp_micros(entry.get("logged_at")))
+
+    @property
+    def phase(self) -> Optional[Phase]:
+        """The Phase named by cycle_phase (any case), or None for another name."""
+        return _PHASES_BY_NAME.get(self.cycle_phase.strip().lower()) if isinstance(self.cycle_phase, str) else None
+
+    def to_dict(self) -> Dict:
+        return {
+            "user_id": self.user_id,
+            "date": self.date,
+            "cycle_phase": self.cycle_phase,
+            "mood": self.mood,
+            "symptoms": list(self.symptoms),
+            "notes": self.notes,
+            "logged_at": timestamp_iso(self.logged_at),
+        }
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, MoodRecord):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self) -> str:
+        return f"MoodRecord({self.user_id!r}, {self.date}, {self.cycle_phase}, {self.mood!r})"
+
+
+class _MoodColumns:
+    """One user's mood logs as parallel columns, sorted by day."""
+
+    __slots__ = ("days", "phases", "moods", "symptom_codes", "symptom_ends", "notes", "logged_at", "by_phase")
+
+    def __init__(self):
+        self.days = array("i")          # day number (UNDATED_DAY and up: a date kept verbatim)
+        self.phases = array("H")        # code in the table's phase vocabulary
+        self.moods = array("H")         # code in the table's mood vocabulary
+        self.symptom_codes = array("H") # every row's symptom list, back to back, as symptom vocabulary codes
+        self.symptom_ends = array("I")  # end of each row's list in symptom_codes
+        self.notes: List[str] = []
+        self.logged_at = array("q")     # microseconds since 1970-01-01
+        self.by_phase: Dict[int, array] = {}   # phase code -> sorted positions of its rows
+
+    def insert(self, index: int, day: int, phase: int, mood: int, symptoms: array, notes: str, logged_at: int):
+        self.days.insert(index, day)
+        self.phases.insert(index, phase)
+        self.moods.insert(index, mood)
+        start = self.symptom_ends[index - 1] if index else 0
+        self.symptom_codes[start:start] = symptoms
+        self.symptom_ends.insert(index, start + len(symptoms))
+        if symptoms and index + 1 < len(self.symptom_ends):
+            ends = np.frombuffer(self.symptom_ends, dtype=np.uint32)
+            ends[index + 1:] += len(symptoms)
+            del ends  # release the buffer so the column can grow again
+        self.notes.insert(index, notes)
+        self.logged_at.insert(index, logged_at)
+        if index + 1 < len(self.days):   # rows after it move up one place
+            for positions in self.by_phase.values():
+                first = bisect_left(positions, index)
+                if first < len(positions):
+                    shifted = np.frombuffer(positions, dtype=np.int32)
+                    shifted[first:] += 1
+                    del shifted
+        positions = self.by_phase.setdefault(phase, array("i"))
+        positions.insert(bisect_left(positions, index), index)
+
+    def symptoms(self, index: int) -> array:
+        """Symptom codes of one row, in the order they were logged."""
+        return self.symptom_codes[self.symptom_ends[index - 1] if index else 0:self.symptom_ends[index]]
+
+    def index_phases(self, start: int = 0):
+        """Add the rows from `start` on, stored in bulk, to the phase index."""
+        phases = np.frombuffer(self.phases, dtype=np.uint16)[start:]
+        order = np.argsort(phases, kind="stable")
+        codes, firsts = np.unique(phases[order], return_index=True)
+        bounds = firsts.tolist() + [len(order)]
+        for code, first, last in zip(codes.tolist(), bounds[:-1], bounds[1:]):
+            self.by_phase.setdefault(code, array("i")).frombytes(
+                (order[first:last] + start).astype(np.int32).tobytes())
+        del phases  # release the buffer so the columns can grow again
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+
+def _column(typecode: str, values: np.ndarray) -> array:
+    column = array(typecode)
+    column.frombytes(np.ascontiguousarray(values, dtype=np.dtype(typecode)).tobytes())
+    return column
+
+
+def _gather(codes: np.ndarray, starts: np.ndarray, lengths: np.ndarray, rows: np.ndarray):
+    """The code lists of some rows back to back, in the order of `rows`, and their lengths."""
+    lengths = lengths[rows]
+    ends = np.cumsum(lengths)
+    index = np.repeat(starts[rows] - (ends - lengths), lengths) + np.arange(ends[-1] if len(ends) else 0)
+    return codes[index], lengths
+
+
+class MoodLogTable:
+    """
+    Columnar mood log storage, partitioned by user: the in-memory mood log backend.
+
+    Each user's logs are parallel typed arrays sorted by day: the day number, interned
+    phase and mood codes, the row's symptom codes (two bytes each, in one array per
+    user), notes and a microsecond timestamp, so a row costs a few dozen bytes instead
+    of a dict of strings, however many distinct symptoms users type. query() rebuilds
+    the dict shape; records() returns MoodRecord rows.
+
+    Logs come back as they were added, like the list store this replaced: a phase
+    outside PHASE_NAMES or in another case keeps its spelling under a code of its own,
+    a date that is not 'YYYY-MM-DD' is kept as given (and sorts after every dated log,
+    in the order first seen), and symptom lists keep their order and duplicates.
+
+    Bulk loads go through extend() with a columnar batch (see utils/ingest.py), which
+    sorts and interns a whole batch at once.
+    """
+
+    def __init__(self):
+        self._partitions: Dict[str, _MoodColumns] = {}
+        self.phase_vocabulary = Vocabulary(max_size=1 << 16, values=PHASE_NAMES)
+        self.mood_vocabulary = Vocabulary(max_size=1 << 16)
+        self.symptom_vocabulary = Vocabulary(max_size=1 << 16)
+        self.date_vocabulary = Vocabulary(max_size=1 << 16)
+        # Lowercased phase spelling -> its codes, for case-insensitive phase queries
+        self._phase_codes: Dict[str, Tuple[int, ...]] = {name.lower(): (code,) for code, name in enumerate(PHASE_NAMES)}
+        self._lowercase_moods: List[str] = []
+        self._size = 0
+
+    # ---- writes ----
+
+    def append(self, entry: Dict):
+        """Add a mood log entry (must contain user_id, date and cycle_phase)."""
+        day = self._day(entry["date"])
+        phase = self.phase_code(entry["cycle_phase"])
+        mood = self.mood_vocabulary.code(entry.get("mood", ""))
+        symptoms = self.symptom_codes(entry.get("symptoms") or ())
+        logged_at = timestamp_micros(entry.get("logged_at"))
+        columns = self._partition(entry["user_id"])
+        # Before any same-day rows: read newest first, same-day rows keep insertion order
+        columns.insert(bisect_left(columns.days, day), day, phase, mood, symptoms,
+                       entry.get("notes") or "", logged_at)
+        self._size += 1
+
+    def extend(self, batch) -> int:
+        """
+        Add a validated columnar batch (utils.ingest.MoodLogBatch).
+
+        Rows end up exactly where one append() per row, in batch order, would put them.
+
+        Returns:
+            Number of rows added
+        """
+        count = len(batch)
+        if not count:
+            return 0
+        moods = self._codes(self.mood_vocabulary.code, batch.moods)
+        phases = self._codes(self.phase_code, batch.phases)
+        lists: Dict[Tuple[str, ...], array] = {}   # ingest shares one tuple per distinct CSV cell
+        symptoms = [lists[names] if names in lists else lists.setdefault(names, self.symptom_codes(names))
+                    for names in batch.symptoms]
+        symptom_lengths = np.fromiter(map(len, symptoms), dtype=np.int64, count=count)
+        symptom_codes = np.frombuffer(array("H", chain.from_iterable(symptoms)), dtype=np.uint16)
+        symptom_starts = np.cumsum(symptom_lengths) - symptom_lengths
+        notes = np.asarray(batch.notes, dtype=object)
+
+        users, first_seen, user_index = np.unique(np.asarray(batch.user_ids, dtype=str),
+                                                  return_index=True, return_inverse=True)
+        user_index = user_index.reshape(-1)
+        for user in users[np.argsort(first_seen)].tolist():
+            self._partition(user)  # new users are listed in the order they first appear
+        # Per user: rows by day, later rows first within a day (what repeated bisect_left gives)
+        order = np.lexsort((-np.arange(count), batch.days, user_index))
+        bounds = np.searchsorted(user_index[order], np.arange(len(users) + 1))
+        for user, start, stop in zip(users.tolist(), bounds[:-1].tolist(), bounds[1:].tolist()):
+            rows = order[start:stop]
+            self._merge(self._partition(user), batch.days[rows], phases[rows], moods[rows],
+                        _gather(symptom_codes, symptom_starts, symptom_lengths, rows), notes[rows],
+                        batch.logged_at[rows])
+        self._size += count
+        return count
+
+    @staticmethod
+    def _codes(code, values: Sequence[str]) -> np.ndarray:
+        """uint16 codes for a column of strings, looking each distinct value up once."""
+        uniques, inverse = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+        lookup = np.fromiter((code(str(value)) for value in uniques), dtype=np.uint16, count=len(uniques))
+        return lookup[inverse.reshape(-1)]
+
+    def _merge(self, columns: _MoodColumns, days, phases, moods, symptoms, notes, logged_at):
+        """Merge rows (sorted as in extend()) into a partition; symptoms are (codes, length per row)."""
+        symptom_codes, symptom_lengths = symptoms
+        if not len(columns) or days[0] > columns.days[-1]:
+            base = columns.symptom_ends[-1] if len(columns) else 0
+            columns.days.frombytes(np.ascontiguousarray(days, dtype=np.int32).tobytes())
+            columns.phases.frombytes(np.ascontiguousarray(phases, dtype=np.uint16).tobytes())
+            columns.moods.frombytes(np.ascontiguousarray(moods, dtype=np.uint16).tobytes())
+            columns.symptom_codes.frombytes(np.ascontiguousarray(symptom_codes, dtype=np.uint16).tobytes())
+            columns.symptom_ends.frombytes((base + np.cumsum(symptom_lengths)).astype(np.uint32).tobytes())
+            columns.notes.extend(notes.tolist())
+            columns.logged_at.frombytes(np.ascontiguousarray(logged_at, dtype=np.int64).tobytes())
+            columns.index_phases(len(columns) - len(days))
+            return
+        old = len(columns)
+        all_days = np.concatenate([np.frombuffer(columns.days, dtype=np.int32), days.astype(np.int32)])
+        # New rows go before stored rows of the same day; lexsort keeps each group's order
+        order = np.lexsort((np.r_[np.ones(old, dtype=np.int8), np.zeros(len(days), dtype=np.int8)], all_days))
+        merged_phases = np.concatenate([np.frombuffer(columns.phases, dtype=np.uint16), phases])[order]
+        merged_moods = np.concatenate([np.frombuffer(columns.moods, dtype=np.uint16), moods])[order]
+        merged_logged = np.concatenate([np.frombuffer(columns.logged_at, dtype=np.int64), logged_at])[order]
+        merged_days = all_days[order]
+        stored_codes = np.frombuffer(columns.symptom_codes, dtype=np.uint16)
+        stored_ends = np.frombuffer(columns.symptom_ends, dtype=np.uint32).astype(np.int64)
+        stored_lengths = np.diff(stored_ends, prepend=0)
+        merged_symptoms, merged_lengths = _gather(
+            np.concatenate([stored_codes, symptom_codes]),
+            np.concatenate([stored_ends - stored_lengths,
+                            len(stored_codes) + np.cumsum(symptom_lengths) - symptom_lengths]),
+            np.concatenate([stored_lengths, symptom_lengths]), order)
+        all_notes = columns.notes + notes.tolist()
+        positions = order.tolist()
+        del all_days, stored_codes  # release the views on the old arrays before replacing them
+        columns.days = _column("i", merged_days)
+        columns.phases = _column("H", merged_phases)
+        columns.moods = _column("H", merged_moods)
+        columns.logged_at = _column("q", merged_logged)
+        columns.symptom_codes = _column("H", merged_symptoms)
+        columns.symptom_ends = _column("I", np.cumsum(merged_lengths))
+        columns.notes = [all_notes[i] for i in positions]
+        columns.by_phase = {}
+        columns.index_phases()
+
+    def phase_code(self, name: str) -> int:
+        """Code of a phase spelling in the phase vocabulary (0-3: PHASE_NAMES as spelled there)."""
+        known = len(self.phase_vocabulary)
+        code = self.phase_vocabulary.code(name)
+        if code == known:
+            key = name.lower()
+            self._phase_codes[key] = self._phase_codes.get(key, ()) + (code,)
+        return code
+
+    def symptom_codes(self, symptoms: Iterable[str]) -> array:
+        """Codes of a symptom list in the symptom vocabulary (order and duplicates kept)."""
+        return array("H", [self.symptom_vocabulary.code(symptom) for symptom in symptoms])
+
+    def lowercase_moods(self) -> List[str]:
+        """Lowercased mood per mood code, lowering only moods added since the last call."""
+        lowered, moods = self._lowercase_moods, self.mood_vocabulary.values
+        if len(lowered) < len(moods):
+            lowered.extend(mood.lower() for mood in moods[len(lowered):])
+        return lowered
+
+    def _symptoms(self, columns: _MoodColumns, index: int) -> Tuple[str, ...]:
+        names = self.symptom_vocabulary.values
+        return tuple([names[code] for code in columns.symptoms(index)])
+
+    def _day(self, value) -> int:
+        """Day number of a date; text that is not 'YYYY-MM-DD' is kept verbatim past UNDATED_DAY."""
+        try:
+            return day_number(value)
+        except ValueError:
+            return UNDATED_DAY + self.date_vocabulary.code(value)
+
+    def _date(self, day: int):
+        return day_iso(day) if day < UNDATED_DAY else self.date_vocabulary.values[day - UNDATED_DAY]
+
+    def _partition(self, user_id: str) -> _MoodColumns:
+        columns = self._partitions.get(user_id)
+        if columns is None:
+            columns = self._partitions[user_id] = _MoodColumns()
+        return columns
+
+    # ---- reads ----
+
+    def query(self, user_id: str, limit: int = 30, cycle_phase: Optional[str] = None,
+              start=None, end=None, dates: Optional[Sequence] = None) -> List[Dict]:
+        """
+        Return a user's mood logs, most recent first.
+
+        Rows are found by bisecting the user's day column (and a per-phase position
+        index, kept up to date by every write), so a read costs O(log n + k) for k
+        rows returned.
+
+        Args:
+            user_id: User identifier
+            limit: Maximum number of logs to return
+            cycle_phase: Optional filter by cycle phase (case-insensitive)
+            start: Optional first date, inclusive ('YYYY-MM-DD' or a date)
+            end: Optional last date, inclusive ('YYYY-MM-DD' or a date)
+            dates: Optional dates to return logs for (e.g. the same cycle day of past cycles)
+
+        Returns:
+            List of mood log entries
+        """
+        columns = self._partitions.get(user_id)
+        if columns is None:
+            return []
+        positions = self._select(columns, limit, cycle_phase, start, end, dates)
+        return [self._row(user_id, columns, index) for index in positions]
+
+    def records(self, user_id: str, limit: int = 30, cycle_phase: Optional[str] = None,
+                start=None, end=None, dates: Optional[Sequence] = None) -> List[MoodRecord]:
+        """Like query(), as MoodRecord rows instead of dicts."""
+        columns = self._partitions.get(user_id)
+        if columns is None:
+            return []
+        positions = self._select(columns, limit, cycle_phase, start, end, dates)
+        return [self._record(user_id, columns, index) for index in positions]
+
+    def _select(self, columns: _MoodColumns, limit: int, cycle_phase: Optional[str], start, end,
+                dates: Optional[Sequence]) -> Iterable[int]:
+        """Positions of the newest `limit` matching rows, newest first."""
+        if limit <= 0:
+            return ()
+        codes = None
+        if cycle_phase:
+            codes = self._phase_codes.get(cycle_phase.lower())
+            if codes is None:
+                return ()
+        days = columns.days
+        low = 0 if start is None else bisect_left(days, day_number(start))
+        high = len(days) if end is None else bisect_right(days, day_number(end))
+        if dates is not None:
+            positions = []
+            for day in sorted({day_number(value) for value in dates}, reverse=True):
+                first = bisect_left(days, day, low, high)
+                last = bisect_right(days, day, first, high) if first < high else first
+                positions.extend(index for index in range(last - 1, first - 1, -1)
+                                 if codes is None or columns.phases[index] in codes)
+                if len(positions) >= limit:
+                    break
+            return positions[:limit]
+        if codes is None:
+            return range(high - 1, max(high - limit, low) - 1, -1)
+        newest = []
+        for code in codes:
+            matches = columns.by_phase.get(code, ())
+            first, last = bisect_left(matches, low), bisect_left(matches, high)
+            newest.extend(matches[max(first, last - limit):last])
+        return sorted(newest, reverse=True)[:limit]
+
+    def _record(self, user_id: str, columns: _MoodColumns, index: int) -> MoodRecord:
+        return MoodRecord(user_id, self._date(columns.days[index]),
+                          self.phase_vocabulary.values[columns.phases[index]],
+                          self.mood_vocabulary.values[columns.moods[index]],
+                          self._symptoms(columns, index), columns.notes[index], columns.logged_at[index])
+
+    def _row(self, user_id: str, columns: _MoodColumns, index: int) -> Dict:
+        return {
+            "user_id": user_id,
+            "date": self._date(columns.days[index]),
+            "cycle_phase": self.phase_vocabulary.values[columns.phases[index]],
+            "mood": self.mood_vocabulary.values[columns.moods[index]],
+            "symptoms": list(self._symptoms(columns, index)),
+            "notes": columns.notes[index],
+            "logged_at": timestamp_iso(columns.logged_at[index]),
+        }
+
+    def coded_logs(self, user_id: str) -> Tuple[bytes, bytes, bytes]:
+        """
+        A user's logs as codes, oldest first, for batch jobs that count rather than read.
+
+        Returns:
+            Tuple of (Phase codes as uint8 bytes, UNKNOWN_PHASE for any other spelling;
+            mood_vocabulary codes as uint16 bytes; every log's symptom_vocabulary codes
+            back to back as uint16 bytes)
+        """
+        columns = self._partitions.get(user_id)
+        if columns is None:
+            return b"", b"", b""
+        phases = np.frombuffer(columns.phases, dtype=np.uint16)
+        coded = np.where(phases < len(Phase), phases, UNKNOWN_PHASE).astype(np.uint8).tobytes()
+        del phases
+        return coded, columns.moods.tobytes(), columns.symptom_codes.tobytes()
+
+    def count(self, user_id: str) -> int:
+        """Number of mood logs stored for a user."""
+        columns = self._partitions.get(user_id)
+        return len(columns) if columns else 0
+
+    def clear_user(self, user_id: str):
+        """Remove every mood log belonging to a user."""
+        columns = self._partitions.pop(user_id, None)
+        if columns is not None:
+            self._size -= len(columns)
+
+    def users(self) -> List[str]:
+        """User ids that have at least one mood log."""
+        return list(self._partitions)
+
+    def __iter__(self) -> Iterator[Dict]:
+        for user_id, columns in self._partitions.items():
+            for index in range(len(columns)):
+                yield self._row(user_id, columns, index)
+
+    def __len__(self) -> int:
+        return self._size
@@ -0,0 +1,357 @@
+# SQLite Store: Durable single-node persistence backend for cycle_data_store
+# Same interface as the in-memory stores (utils/mood_table.py, utils/storage.py), backed by SQLite in WAL mode
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+from collections.abc import MutableMapping
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.mood_table import MoodRecord, day_iso, day_number, timestamp_iso
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS mood_logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    cycle_phase TEXT NOT NULL,
+    phase_key TEXT NOT NULL,
+    mood TEXT NOT NULL,
+    symptoms TEXT NOT NULL,
+    notes TEXT NOT NULL,
+    logged_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_mood_logs_user_date
+    ON mood_logs (user_id, date);
+CREATE INDEX IF NOT EXISTS idx_mood_logs_user_phase
+    ON mood_logs (user_id, phase_key, date);
+
+CREATE TABLE IF NOT EXISTS patterns (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    type TEXT NOT NULL,
+    description TEXT NOT NULL,
+    data TEXT NOT NULL,
+    identified_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_patterns_user_type
+    ON patterns (user_id, type);
+
+CREATE TABLE IF NOT EXISTS key_value (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+"""
+
+# Statements are module constants so sqlite3's per-connection statement
+# cache keeps one prepared statement for each of them.
+INSERT_MOOD_LOG = (
+    "INSERT INTO mood_logs (user_id, date, cycle_phase, phase_key, mood, symptoms, notes, logged_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+SELECT_MOOD_LOGS = (
+    "SELECT user_id, date, cycle_phase, mood, symptoms, notes, logged_at FROM mood_logs "
+    "WHERE user_id = ? ORDER BY date DESC, id ASC LIMIT ?"
+)
+SELECT_MOOD_LOGS_BY_PHASE = (
+    "SELECT user_id, date, cycle_phase, mood, symptoms, notes, logged_at FROM mood_logs "
+    "WHERE user_id = ? AND phase_key = ? ORDER BY date DESC, id ASC LIMIT ?"
+)
+# Date-bounded reads, keyed by (phase filter, date list); unbounded sides use these dates
+SELECT_MOOD_LOGS_BETWEEN = {
+    (by_phase, by_dates): (
+        "SELECT user_id, date, cycle_phase, mood, symptoms, notes, logged_at FROM mood_logs "
+        "WHERE user_id = ? AND date BETWEEN ? AND ?"
+        + (" AND phase_key = ?" if by_phase else "")
+        + (" AND date IN (SELECT value FROM json_each(?))" if by_dates else "")
+        + " ORDER BY date DESC, id ASC LIMIT ?"
+    )
+    for by_phase in (False, True) for by_dates in (False, True)
+}
+FIRST_DATE, LAST_DATE = "0001-01-01", "9999-12-31"
+INSERT_PATTERN = (
+    "INSERT INTO patterns (user_id, type, description, data, identified_at) VALUES (?, ?, ?, ?, ?)"
+)
+SELECT_PATTERNS = (
+    "SELECT user_id, type, description, data, identified_at FROM patterns "
+    "WHERE user_id = ? ORDER BY id"
+)
+SELECT_PATTERNS_BY_TYPE = (
+    "SELECT user_id, type, description, data, identified_at FROM patterns "
+    "WHERE user_id = ? AND type = ? ORDER BY id"
+)
+DELETE_PATTERNS_OF_TYPES = (
+    "DELETE FROM patterns WHERE user_id IN (SELECT value FROM json_each(?)) "
+    "AND type IN (SELECT value FROM json_each(?))"
+)
+
+
+class SQLiteDatabase:
+    """
+    Shared SQLite connection in WAL mode with batched writes.
+
+    Writes are buffered per statement and flushed with executemany() in a
+    single transaction once `batch_size` rows are pending, or before any read
+    so readers always see their own writes.
+
+    Args:
+        path: Database file path (":memory:" for a throwaway database)
+        batch_size: Number of pending rows that triggers a flush
+    """
+
+    def __init__(self, path: str, batch_size: int = 256):
+        self.path = path
+        self.batch_size = batch_size
+        self._lock = threading.RLock()
+        self._pending: Dict[str, List[tuple]] = {}
+        self._pending_rows = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, cached_statements=64)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def write(self, sql: str, params: tuple):
+        """Queue a write, flushing when the batch is full."""
+        with self._lock:
+            self._pending.setdefault(sql, []).append(params)
+            self._pending_rows += 1
+            if self._pending_rows >= self.batch_size:
+                self.flush()
+
+    def write_many(self, sql: str, rows: List[tuple]):
+        """Queue many writes of one statement, flushing when the batch is full."""
+        with self._lock:
+            self._pending.setdefault(sql, []).extend(rows)
+            self._pending_rows += len(rows)
+            if self._pending_rows >= self.batch_size:
+                self.flush()
+
+    def execute(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        """Flush pending writes, then run a statement immediately."""
+        with self._lock:
+            self.flush()
+            with self._conn:
+                return self._conn.execute(sql, params)
+
+    def query(self, sql: str, params: tuple = ()) -> List[tuple]:
+        """Flush pending writes, then return all rows for a query."""
+        with self._lock:
+            self.flush()
+            return self._conn.execute(sql, params).fetchall()
+
+    def flush(self):
+        """Write every pending row in one transaction."""
+        with self._lock:
+            if not self._pending_rows:
+                return
+            with self._conn:
+                for sql, rows in self._pending.items():
+                    self._conn.executemany(sql, rows)
+            self._pending.clear()
+            self._pending_rows = 0
+
+    def close(self):
+        """Flush pending writes and close the connection."""
+        with self._lock:
+            self.flush()
+            self._conn.close()
+
+
+class SQLiteMoodLogStore:
+    """Persistent mood log store with the same interface as MoodLogTable."""
+
+    def __init__(self, db: SQLiteDatabase):
+        self._db = db
+
+    def append(self, entry: Dict):
+        """Add a mood log entry (must contain user_id, date and cycle_phase)."""
+        self._db.write(INSERT_MOOD_LOG, (
+            entry["user_id"], entry["date"], entry["cycle_phase"], entry["cycle_phase"].lower(),
+            entry.get("mood", ""), json.dumps(entry.get("symptoms", [])),
+            entry.get("notes", ""), entry.get("logged_at", ""),
+        ))
+
+    def extend(self, batch) -> int:
+        """Add a validated columnar batch (utils.ingest.MoodLogBatch) with one executemany()."""
+        self._db.write_many(INSERT_MOOD_LOG, [
+            (user_id, day_iso(day), phase, phase.lower(), mood,
+             json.dumps(list(symptoms)), notes, timestamp_iso(logged_at))
+            for user_id, day, phase, mood, symptoms, notes, logged_at in zip(
+                batch.user_ids, batch.days.tolist(), batch.phases, batch.moods, batch.symptoms,
+                batch.notes, batch.logged_at.tolist())
+        ])
+        return len(batch)
+
+    def query(self, user_id: str, limit: int = 30, cycle_phase: Optional[str] = None,
+              start=None, end=None, dates: Optional[Sequence] = None) -> List[Dict]:
+        """Return a user's mood logs, most recent first (see MoodLogTable.query for the filters)."""
+        if limit <= 0:
+            return []
+        if start is not None or end is not None or dates is not None:
+            params = [user_id, _iso_date(start, FIRST_DATE), _iso_date(end, LAST_DATE)]
+            if cycle_phase:
+                params.append(cycle_phase.lower())
+            if dates is not None:
+                params.append(json.dumps(sorted({day_iso(day_number(value)) for value in dates})))
+            sql = SELECT_MOOD_LOGS_BETWEEN[bool(cycle_phase), dates is not None]
+            rows = self._db.query(sql, (*params, limit))
+        elif cycle_phase:
+            rows = self._db.query(SELECT_MOOD_LOGS_BY_PHASE, (user_id, cycle_phase.lower(), limit))
+        else:
+            rows = self._db.query(SELECT_MOOD_LOGS, (user_id, limit))
+        return [_mood_log_from_row(row) for row in rows]
+
+    def records(self, user_id: str, limit: int = 30, cycle_phase: Optional[str] = None,
+                start=None, end=None, dates: Optional[Sequence] = None) -> List[MoodRecord]:
+        """Like query(), as MoodRecord rows instead of dicts."""
+        return [MoodRecord.from_dict(log) for log in self.query(user_id, limit, cycle_phase, start, end, dates)]
+
+    def count(self, user_id: str) -> int:
+        """Number of mood logs stored for a user."""
+        return self._db.query("SELECT COUNT(*) FROM mood_logs WHERE user_id = ?", (user_id,))[0][0]
+
+    def clear_user(self, user_id: str):
+        """Remove every mood log belonging to a user."""
+        self._db.execute("DELETE FROM mood_logs WHERE user_id = ?", (user_id,))
+
+    def users(self) -> List[str]:
+        """User ids that have at least one mood log."""
+        return [row[0] for row in self._db.query("SELECT DISTINCT user_id FROM mood_logs")]
+
+    def __iter__(self) -> Iterator[Dict]:
+        rows = self._db.query(
+            "SELECT user_id, date, cycle_phase, mood, symptoms, notes, logged_at FROM mood_logs "
+            "ORDER BY user_id, date, id"
+        )
+        return (_mood_log_from_row(row) for row in rows)
+
+    def __len__(self) -> int:
+        return self._db.query("SELECT COUNT(*) FROM mood_logs")[0][0]
+
+
+class SQLitePatternStore:
+    """Persistent pattern store with the same interface as PatternStore."""
+
+    def __init__(self, db: SQLiteDatabase):
+        self._db = db
+
+    def append(self, entry: Dict):
+        """Add a pattern entry (must contain user_id and type)."""
+        self._db.write(INSERT_PATTERN, (
+            entry["user_id"], entry["type"], entry.get("description", ""),
+            json.dumps(entry.get("data", {})), entry.get("identified_at", ""),
+        ))
+
+    def extend(self, entries: Iterable[Dict]) -> int:
+        """Add many pattern entries with one executemany()."""
+        rows = [(entry["user_id"], entry["type"], entry.get("description", ""),
+                 json.dumps(entry.get("data", {})), entry.get("identified_at", ""))
+                for entry in entries]
+        self._db.write_many(INSERT_PATTERN, rows)
+        return len(rows)
+
+    def query(self, user_id: str, pattern_type: Optional[str] = None) -> List[Dict]:
+        """Return a user's patterns in the order they were stored."""
+        if pattern_type:
+            rows = self._db.query(SELECT_PATTERNS_BY_TYPE, (user_id, pattern_type))
+        else:
+            rows = self._db.query(SELECT_PATTERNS, (user_id,))
+        return [_pattern_from_row(row) for row in rows]
+
+    def clear_user(self, user_id: str):
+        """Remove every pattern belonging to a user."""
+        self._db.execute("DELETE FROM patterns WHERE user_id = ?", (user_id,))
+
+    def clear_types(self, user_ids: Iterable[str], pattern_types: Iterable[str]):
+        """Remove the patterns of some types belonging to some users, in one statement."""
+        self._db.execute(DELETE_PATTERNS_OF_TYPES, (json.dumps(list(user_ids)), json.dumps(list(pattern_types))))
+
+    def __iter__(self) -> Iterator[Dict]:
+        rows = self._db.query(
+            "SELECT user_id, type, description, data, identified_at FROM patterns ORDER BY id"
+        )
+        return (_pattern_from_row(row) for row in rows)
+
+    def __len__(self) -> int:
+        return self._db.query("SELECT COUNT(*) FROM patterns")[0][0]
+
+
+class SQLiteMapping(MutableMapping):
+    """
+    Persistent dict of JSON values, used for cycle_info and user_preferences.
+
+    Args:
+        db: Shared database
+        namespace: Name that keeps this mapping's keys apart from other mappings
+    """
+
+    def __init__(self, db: SQLiteDatabase, namespace: str):
+        self._db = db
+        self._namespace = namespace
+
+    def __getitem__(self, key: str):
+        rows = self._db.query(
+            "SELECT value FROM key_value WHERE namespace = ? AND key = ?", (self._namespace, key)
+        )
+        if not rows:
+            raise KeyError(key)
+        return json.loads(rows[0][0])
+
+    def __setitem__(self, key: str, value):
+        self._db.execute(
+            "INSERT OR REPLACE INTO key_value (namespace, key, value) VALUES (?, ?, ?)",
+            (self._namespace, key, json.dumps(value)),
+        )
+
+    def __delitem__(self, key: str):
+        cursor = self._db.execute(
+            "DELETE FROM key_value WHERE namespace = ? AND key = ?", (self._namespace, key)
+        )
+        if cursor.rowcount == 0:
+            raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        rows = self._db.query(
+            "SELECT key FROM key_value WHERE namespace = ? ORDER BY key", (self._namespace,)
+        )
+        return (row[0] for row in rows)
+
+    def __len__(self) -> int:
+        return self._db.query(
+            "SELECT COUNT(*) FROM key_value WHERE namespace = ?", (self._namespace,)
+        )[0][0]
+
+
+def _mood_log_from_row(row: tuple) -> Dict:
+    user_id, date, cycle_phase, mood, symptoms, notes, logged_at = row
+    return {
+        "user_id": user_id,
+        "date": date,
+        "cycle_phase": cycle_phase,
+        "mood": mood,
+        "symptoms": json.loads(symptoms),
+        "notes": notes,
+        "logged_at": logged_at,
+    }
+
+
+def _iso_date(value, default: str) -> str:
+    """'YYYY-MM-DD' for a date bound (validated like the in-memory table), or the default."""
+    return default if value is None else day_iso(day_number(value))
+
+
+def _pattern_from_row(row: tuple) -> Dict:
+    user_id, pattern_type, description, data, identified_at = row
+    return {
+        "user_id": user_id,
+        "type": pattern_type,
+        "description": description,
+        "data": json.loads(data),
+        "identified_at": identified_at,
+    }
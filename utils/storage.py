@@ -0,0 +1,60 @@
+# Storage: Per-user storage for identified patterns
+# Mood logs live in utils/mood_table.py (in memory) and utils/sqlite_store.py (SQLite)
+
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+class PatternStore:
+    """Identified patterns partitioned by user with an index on pattern type."""
+
+    def __init__(self):
+        self._partitions: Dict[str, List[Dict]] = {}
+        self._by_type: Dict[Tuple[str, str], List[Dict]] = {}
+
+    def append(self, entry: Dict):
+        """Add a pattern entry (must contain user_id and type)."""
+        self._partitions.setdefault(entry["user_id"], []).append(entry)
+        self._by_type.setdefault((entry["user_id"], entry["type"]), []).append(entry)
+
+    def extend(self, entries: Iterable[Dict]) -> int:
+        """Add many pattern entries; returns how many."""
+        added = 0
+        for entry in entries:
+            self.append(entry)
+            added += 1
+        return added
+
+    def query(self, user_id: str, pattern_type: Optional[str] = None) -> List[Dict]:
+        """Return a user's patterns in the order they were stored."""
+        if pattern_type:
+            return list(self._by_type.get((user_id, pattern_type), []))
+        return list(self._partitions.get(user_id, []))
+
+    def clear_user(self, user_id: str):
+        """Remove every pattern belonging to a user."""
+        for entry in self._partitions.pop(user_id, []):
+            self._by_type.pop((user_id, entry["type"]), None)
+
+    def clear_types(self, user_ids: Iterable[str], pattern_types: Iterable[str]):
+        """Remove the patterns of some types belonging to some users."""
+        pattern_types = frozenset(pattern_types)
+        for user_id in user_ids:
+            entries = self._partitions.get(user_id)
+            if not entries:
+                continue
+            kept = [entry for entry in entries if entry["type"] not in pattern_types]
+            if len(kept) == len(entries):
+                continue
+            for pattern_type in pattern_types:
+                self._by_type.pop((user_id, pattern_type), None)
+            if kept:
+                self._partitions[user_id] = kept
+            else:
+                del self._partitions[user_id]
+
+    def __iter__(self) -> Iterator[Dict]:
+        for entries in self._partitions.values():
+            yield from entries
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._partitions.values())
@@ -0,0 +1,449 @@
+# Telemetry: Per-stage, per-model-call and per-tool-call spans for the agent pipeline
+# Spans are exported as JSON lines and aggregated into in-process latency histograms
+
+import atexit
+import contextvars
+import json
+import logging
+import math
+import os
+import queue
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.agents import ParallelAgent
+from google.adk.plugins.base_plugin import BasePlugin
+
+from config import TELEMETRY_SPANS_FILE
+from utils.logger import BatchedRotatingFileHandler, BatchingQueueListener, DeferredFormatQueueHandler
+
+# Span kinds, from outermost to innermost
+REQUEST, AGENT, MODEL, TOOL = "request", "agent", "model", "tool"
+# Derived per run: the longest chain of dependent stages through the agent tree
+CRITICAL_PATH = "critical_path"
+# Streamed requests: time from the request's start to the first reply chunk
+FIRST_TOKEN = "first_token"
+
+# Geometric latency buckets: 0.1 ms to ~5 min, each 20% wider than the last
+BUCKET_BASE_MS = 0.1
+BUCKET_GROWTH = 1.2
+BUCKET_COUNT = 82
+BUCKET_BOUNDS_MS = tuple(BUCKET_BASE_MS * BUCKET_GROWTH ** i for i in range(BUCKET_COUNT))
+
+# Model span currently in progress in this task, so model wrappers can report waits and retries
+_current_model_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar(
+    "current_model_span", default=None
+)
+
+
+class Span:
+    """One timed unit of work: a request, an agent stage, a model call or a tool call."""
+
+    __slots__ = ("kind", "name", "trace_id", "parent", "started_at", "_start", "wall_ms",
+                 "queue_wait_ms", "retries", "prompt_tokens", "output_tokens", "status")
+
+    def __init__(self, kind: str, name: str, trace_id: str = "", parent: Optional[str] = None):
+        self.kind = kind
+        self.name = name
+        self.trace_id = trace_id
+        self.parent = parent
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.wall_ms = 0.0
+        self.queue_wait_ms = 0.0
+        self.retries = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self.status = "ok"
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._start) * 1000
+
+    def finish(self, status: Optional[str] = None) -> "Span":
+        self.wall_ms = self.elapsed_ms()
+        if status:
+            self.status = status
+        return self
+
+    def to_dict(self) -> Dict:
+        return {
+            "ts": round(self.started_at, 6),
+            "trace_id": self.trace_id,
+            "kind": self.kind,
+            "name": self.name,
+            "parent": self.parent,
+            "wall_ms": round(self.wall_ms, 3),
+            "queue_wait_ms": round(self.queue_wait_ms, 3),
+            "retries": self.retries,
+            "prompt_tokens": self.prompt_tokens,
+            "output_tokens": self.output_tokens,
+            "status": self.status,
+        }
+
+
+class LatencyHistogram:
+    """
+    Fixed geometric-bucket latency histogram (about ±10% resolution at any scale).
+
+    Percentiles interpolate inside the bucket that holds the rank, clipped to the
+    observed min and max.
+    """
+
+    __slots__ = ("counts", "count", "total_ms", "min_ms", "max_ms")
+
+    def __init__(self):
+        self.counts = [0] * (BUCKET_COUNT + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms = math.inf
+        self.max_ms = 0.0
+
+    def add(self, value_ms: float):
+        if value_ms <= BUCKET_BASE_MS:
+            index = 0
+        else:
+            index = min(BUCKET_COUNT, math.ceil(math.log(value_ms / BUCKET_BASE_MS, BUCKET_GROWTH)))
+        self.counts[index] += 1
+        self.count += 1
+        self.total_ms += value_ms
+        self.min_ms = min(self.min_ms, value_ms)
+        self.max_ms = max(self.max_ms, value_ms)
+
+    def percentile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = BUCKET_BOUNDS_MS[index - 1] if index else 0.0
+                upper = BUCKET_BOUNDS_MS[index] if index < BUCKET_COUNT else self.max_ms
+                value = lower + (upper - lower) * (rank - seen) / bucket_count
+                return min(max(value, self.min_ms), self.max_ms)
+            seen += bucket_count
+        return self.max_ms
+
+    def summary(self) -> Dict:
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max_ms,
+        }
+
+
+class _SeriesStats:
+    """Histograms and counters for one (kind, name) series."""
+
+    __slots__ = ("wall", "queue_wait", "retries", "errors", "prompt_tokens", "output_tokens")
+
+    def __init__(self):
+        self.wall = LatencyHistogram()
+        self.queue_wait = LatencyHistogram()
+        self.retries = 0
+        self.errors = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+
+
+class Telemetry:
+    """
+    Collects finished spans into per-(kind, name) histograms and exports them as JSON lines.
+
+    Args:
+        spans_file: JSON-lines file for spans (rotated like the log file), or None for no export
+    """
+
+    def __init__(self, spans_file: Optional[str] = TELEMETRY_SPANS_FILE or None):
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, str], _SeriesStats] = {}
+        self.spans_file = spans_file
+        self._exporter: Optional[logging.Logger] = None
+        self._listener: Optional[BatchingQueueListener] = None
+        if spans_file:
+            self._start_exporter(spans_file)
+
+    def _start_exporter(self, spans_file: str):
+        handler = BatchedRotatingFileHandler(spans_file)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        span_queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._listener = BatchingQueueListener(span_queue, handler)
+        self._exporter = logging.Logger(f"CycleWellnessAgent.spans.{id(self)}", logging.INFO)
+        # The export thread starts, and the file opens, with the first recorded span
+        self._exporter.addHandler(DeferredFormatQueueHandler(span_queue, self._listener))
+
+    def record(self, span: Span):
+        """Add a finished span to the histograms and the JSON-lines export."""
+        key = (span.kind, span.name)
+        with self._lock:
+            stats = self._series.get(key)
+            if stats is None:
+                stats = self._series[key] = _SeriesStats()
+            stats.wall.add(span.wall_ms)
+            stats.queue_wait.add(span.queue_wait_ms)
+            stats.retries += span.retries
+            stats.errors += span.status == "error"
+            stats.prompt_tokens += span.prompt_tokens
+            stats.output_tokens += span.output_tokens
+        if self._exporter is not None:
+            self._exporter.info(json.dumps(span.to_dict()))
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Summary per series, keyed "kind:name"."""
+        with self._lock:
+            return {
+                f"{kind}:{name}": {
+                    **stats.wall.summary(),
+                    "queue_wait_p99_ms": stats.queue_wait.percentile(99),
+                    "retries": stats.retries,
+                    "errors": stats.errors,
+                    "prompt_tokens": stats.prompt_tokens,
+                    "output_tokens": stats.output_tokens,
+                }
+                for (kind, name), stats in sorted(self._series.items())
+            }
+
+    def report(self) -> str:
+        """Plain-text table of the snapshot, slowest p99 first within each kind."""
+        rows = sorted(self.snapshot().items(),
+                      key=lambda item: ([REQUEST, FIRST_TOKEN, CRITICAL_PATH, AGENT, MODEL, TOOL].index(item[0].split(":")[0]),
+                                        -item[1]["p99_ms"]))
+        lines = [f"{'span':38}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+                 f"{'wait p99':>10}{'retries':>9}{'tokens in/out':>16}"]
+        for name, s in rows:
+            lines.append(f"{name:38}{s['count']:7d}{s['p50_ms']:10.1f}{s['p95_ms']:10.1f}{s['p99_ms']:10.1f}"
+                         f"{s['queue_wait_p99_ms']:10.1f}{s['retries']:9d}"
+                         f"{s['prompt_tokens']:>9}/{s['output_tokens']:<6}")
+        return "\n".join(lines)
+
+    def render_prometheus(self) -> str:
+        """Histograms and counters in the Prometheus text exposition format."""
+        out = ["# TYPE cycle_span_duration_ms histogram"]
+        with self._lock:
+            for (kind, name), stats in sorted(self._series.items()):
+                labels = f'kind="{kind}",name="{name}"'
+                cumulative = 0
+                for index, bucket_count in enumerate(stats.wall.counts[:BUCKET_COUNT]):
+                    cumulative += bucket_count
+                    if bucket_count:
+                        out.append(f'cycle_span_duration_ms_bucket{{{labels},le="{BUCKET_BOUNDS_MS[index]:.4g}"}} '
+                                   f'{cumulative}')
+                out.append(f'cycle_span_duration_ms_bucket{{{labels},le="+Inf"}} {stats.wall.count}')
+                out.append(f"cycle_span_duration_ms_sum{{{labels}}} {stats.wall.total_ms:.3f}")
+                out.append(f"cycle_span_duration_ms_count{{{labels}}} {stats.wall.count}")
+            for metric in ("retries", "errors", "prompt_tokens", "output_tokens"):
+                out.append(f"# TYPE cycle_span_{metric}_total counter")
+                for (kind, name), stats in sorted(self._series.items()):
+                    out.append(f'cycle_span_{metric}_total{{kind="{kind}",name="{name}"}} '
+                               f"{getattr(stats, metric)}")
+        return "\n".join(out) + "\n"
+
+    def reset(self):
+        """Drop all aggregated series (the export file is left as is)."""
+        with self._lock:
+            self._series.clear()
+
+    def flush(self):
+        """Block until every exported span has been written."""
+        if self._listener is not None:
+            self._listener.stop()   # The next span starts it again
+            for handler in self._listener.handlers:
+                handler.force_flush()
+
+    def close(self):
+        """Write out pending spans and stop the export thread."""
+        if self._listener is not None:
+            self._listener.stop()
+            for handler in self._listener.handlers:
+                handler.close()
+            self._listener = None
+            self._exporter = None
+
+
+def note_model_queue_wait(seconds: float):
+    """Add time spent waiting for model admission (rate limits, concurrency caps) to the current model span."""
+    span = _current_model_span.get()
+    if span is not None:
+        span.queue_wait_ms += seconds * 1000
+
+
+def note_model_retry():
+    """Count a retried attempt on the current model span."""
+    span = _current_model_span.get()
+    if span is not None:
+        span.retries += 1
+
+
+def critical_path(agent, stage_ms: Dict[str, float]) -> Tuple[float, List[str]]:
+    """
+    Longest chain of dependent stages through an agent tree.
+
+    Sub-agents of a ParallelAgent run side by side (the slowest counts); any other
+    agent's sub-agents run one after another (they add up).
+
+    Args:
+        agent: Root of the agent tree
+        stage_ms: Measured wall time of leaf stages by agent name (missing: did not run)
+
+    Returns:
+        Critical-path milliseconds and the leaf stages on it, in order
+    """
+    if not agent.sub_agents:
+        if agent.name in stage_ms:
+            return stage_ms[agent.name], [agent.name]
+        return 0.0, []
+    paths = [critical_path(sub_agent, stage_ms) for sub_agent in agent.sub_agents]
+    if isinstance(agent, ParallelAgent):
+        return max(paths, key=lambda path: path[0])
+    return sum(ms for ms, _ in paths), [stage for _, stages in paths for stage in stages]
+
+
+class TelemetryPlugin(BasePlugin):
+    """
+    Runner plugin that times every agent stage, model call and tool call.
+
+    Agent spans carry the token counts and queue waits of their model calls. Spans still
+    open when a run ends (a stage short-circuited by a cache hit) are closed as "ended_early".
+    Each run also records a "critical_path" span: the stage times along the longest
+    dependency chain of the agent tree, i.e. the latency left after parallelism.
+
+    Args:
+        collector: Collector the spans are recorded into (default: the shared `telemetry`)
+        name: Plugin name, unique per runner
+    """
+
+    def __init__(self, collector: Optional[Telemetry] = None, name: str = "cycle_telemetry"):
+        super().__init__(name=name)
+        self.telemetry = collector or telemetry
+        self._agents: Dict[Tuple[str, str], Span] = {}
+        self._models: Dict[Tuple[str, str], Span] = {}
+        self._tools: Dict[Tuple[str, str], Span] = {}
+        self._stage_ms: Dict[str, Dict[str, float]] = {}
+
+    def _finish(self, span: Span, status: Optional[str] = None):
+        self.telemetry.record(span.finish(status))
+        if span.kind == AGENT:
+            self._stage_ms.setdefault(span.trace_id, {})[span.name] = span.wall_ms
+
+    async def before_agent_callback(self, *, agent, callback_context):
+        key = (callback_context.invocation_id, agent.name)
+        self._agents[key] = Span(AGENT, agent.name, callback_context.invocation_id)
+
+    async def after_agent_callback(self, *, agent, callback_context):
+        span = self._agents.pop((callback_context.invocation_id, agent.name), None)
+        if span is not None:
+            self._finish(span)
+
+    async def on_agent_error_callback(self, *, agent, callback_context, error):
+        span = self._agents.pop((callback_context.invocation_id, agent.name), None)
+        if span is not None:
+            self._finish(span, "error")
+
+    async def before_model_callback(self, *, callback_context, llm_request):
+        key = (callback_context.invocation_id, callback_context.agent_name)
+        span = self._models[key] = Span(MODEL, callback_context.agent_name, callback_context.invocation_id,
+                                        parent=callback_context.agent_name)
+        _current_model_span.set(span)
+
+    async def after_model_callback(self, *, callback_context, llm_response):
+        if llm_response.partial:
+            return None
+        key = (callback_context.invocation_id, callback_context.agent_name)
+        span = self._models.pop(key, None)
+        if span is None:
+            return None
+        usage = llm_response.usage_metadata
+        if usage is not None:
+            span.prompt_tokens = usage.prompt_token_count or 0
+            span.output_tokens = usage.candidates_token_count or 0
+        self._close_model_span(key, span, "error" if llm_response.error_code else None)
+        return None
+
+    async def on_model_error_callback(self, *, callback_context, llm_request, error):
+        key = (callback_context.invocation_id, callback_context.agent_name)
+        span = self._models.pop(key, None)
+        if span is not None:
+            self._close_model_span(key, span, "error")
+        return None
+
+    def _close_model_span(self, key: Tuple[str, str], span: Span, status: Optional[str]):
+        _current_model_span.set(None)
+        self._finish(span, status)
+        agent_span = self._agents.get(key)
+        if agent_span is not None:
+            agent_span.queue_wait_ms += span.queue_wait_ms
+            agent_span.retries += span.retries
+            agent_span.prompt_tokens += span.prompt_tokens
+            agent_span.output_tokens += span.output_tokens
+
+    async def before_tool_callback(self, *, tool, tool_args, tool_context):
+        key = (tool_context.invocation_id, tool_context.function_call_id or tool.name)
+        self._tools[key] = Span(TOOL, tool.name, tool_context.invocation_id, parent=tool_context.agent_name)
+
+    async def after_tool_callback(self, *, tool, tool_args, tool_context, result):
+        span = self._tools.pop((tool_context.invocation_id, tool_context.function_call_id or tool.name), None)
+        if span is not None:
+            self._finish(span, "error" if isinstance(result, dict) and "error" in result else None)
+
+    async def on_tool_error_callback(self, *, tool, tool_args, tool_context, error):
+        span = self._tools.pop((tool_context.invocation_id, tool_context.function_call_id or tool.name), None)
+        if span is not None:
+            self._finish(span, "error")
+
+    async def after_run_callback(self, *, invocation_context):
+        invocation_id = invocation_context.invocation_id
+        for spans in (self._tools, self._models, self._agents):
+            for key in [key for key in spans if key[0] == invocation_id]:
+                self._finish(spans.pop(key), "ended_early")
+        stage_ms = self._stage_ms.pop(invocation_id, None)
+        if stage_ms:
+            span = Span(CRITICAL_PATH, invocation_context.agent.name, invocation_id)
+            span.wall_ms = critical_path(invocation_context.agent, stage_ms)[0]
+            self.telemetry.record(span)
+
+
+def start_metrics_server(port: int, collector: Optional[Telemetry] = None, host: str = "127.0.0.1"):
+    """
+    Serve the histograms on a background thread for local scraping.
+
+    GET /metrics returns the Prometheus text format; GET /metrics.json returns the snapshot.
+
+    Returns:
+        The running ThreadingHTTPServer (call .shutdown() to stop it)
+    """
+    collector = collector or telemetry
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body, content_type = collector.render_prometheus(), "text/plain; version=0.0.4"
+            elif self.path == "/metrics.json":
+                body, content_type = json.dumps(collector.snapshot()), "application/json"
+            else:
+                self.send_error(404)
+                return
+            payload = body.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+
+# Shared collector for the app
+telemetry = Telemetry()
+atexit.register(telemetry.close)